@@ -1,37 +1,64 @@
-"""Ladder: Software engineering agent harness for cost-optimized LLM routing."""
-
-from .models import (
-    AgentResponse,
-    ClassificationResult,
-    CostRecord,
-    EscalationReason,
-    LadderLevel,
-    TaskCategory,
-    TaskResult,
-    TokenUsage,
-)
-from .levels import LevelConfig, get_config, next_level, LEVEL_CONFIGS
-from .cost import calculate_cost, format_cost_summary
-from .classifier import classify_task
-from .agent import LadderAgent
-from .orchestrator import Orchestrator
-
-__all__ = [
-    "AgentResponse",
-    "ClassificationResult",
-    "CostRecord",
-    "EscalationReason",
-    "LadderLevel",
-    "LadderAgent",
-    "LevelConfig",
-    "LEVEL_CONFIGS",
-    "Orchestrator",
-    "TaskCategory",
-    "TaskResult",
-    "TokenUsage",
-    "calculate_cost",
-    "classify_task",
-    "format_cost_summary",
-    "get_config",
-    "next_level",
-]
+"""Ladder: Software engineering agent harness for cost-optimized LLM routing.
+
+The public names below are resolved on first access, so importing ``ladder``
+(or running a light CLI command) does not load the Anthropic SDK or pydantic.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agent import LadderAgent
+    from .classifier import classify_task
+    from .cost import calculate_cost, format_cost_summary
+    from .enums import EscalationReason, EventType, LadderLevel, TaskCategory
+    from .levels import LEVEL_CONFIGS, LevelConfig, get_config, next_level
+    from .models import (
+        AgentResponse,
+        ClassificationResult,
+        CostRecord,
+        OrchestrationEvent,
+        TaskResult,
+        TokenUsage,
+    )
+    from .orchestrator import Orchestrator
+
+# Public name -> submodule that defines it.
+_EXPORTS = {
+    "AgentResponse": ".models",
+    "ClassificationResult": ".models",
+    "CostRecord": ".models",
+    "EscalationReason": ".enums",
+    "EventType": ".enums",
+    "LadderLevel": ".enums",
+    "LadderAgent": ".agent",
+    "LevelConfig": ".levels",
+    "LEVEL_CONFIGS": ".levels",
+    "OrchestrationEvent": ".models",
+    "Orchestrator": ".orchestrator",
+    "TaskCategory": ".enums",
+    "TaskResult": ".models",
+    "TokenUsage": ".models",
+    "calculate_cost": ".cost",
+    "classify_task": ".classifier",
+    "format_cost_summary": ".cost",
+    "get_config": ".levels",
+    "next_level": ".levels",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> object:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
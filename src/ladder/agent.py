@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import math
+import time
+from collections.abc import Callable
+
 from anthropic import AsyncAnthropic
 
 from .cost import calculate_cost
@@ -11,48 +15,270 @@ from .models import (
     CostRecord,
     EscalationReason,
     LadderLevel,
+    Span,
     TokenUsage,
 )
-from .prompts import LEVEL_PROMPTS
+from .prompts import agent_system
 
 ESCALATE_PREFIX = "ESCALATE:"
 
+# Once an escalation is detected, keep reading only until the reason is
+# complete (first paragraph) or this long, to hand it to the next level.
+ESCALATION_NOTE_MAX_CHARS = 400
+
+# Rough characters-per-token ratio, used to estimate output usage when a
+# stream is cancelled before the API reports final token counts.
+CHARS_PER_TOKEN = 4
+
+# Follow-up turns allowed when a response stops at max_tokens.
+MAX_CONTINUATIONS = 3
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off by the output limit. Continue exactly where "
+    "it stopped, without repeating anything or adding a preamble."
+)
+
+
+def escalation_state(text: str) -> bool | None:
+    """Decide from a response prefix whether the agent is escalating.
+
+    Returns None while the prefix is still ambiguous (e.g. "ESC").
+    """
+    head = text.lstrip().upper()
+    if len(head) >= len(ESCALATE_PREFIX):
+        return head.startswith(ESCALATE_PREFIX)
+    if ESCALATE_PREFIX.startswith(head):
+        return None
+    return False
+
+
+def escalation_note(text: str) -> str:
+    """Extract the explanation that follows the escalation prefix."""
+    note = text.lstrip()[len(ESCALATE_PREFIX):].strip()
+    return note.split("\n\n", 1)[0][:ESCALATION_NOTE_MAX_CHARS].strip()
+
+
+def _note_complete(text: str) -> bool:
+    note = text.lstrip()[len(ESCALATE_PREFIX):].lstrip()
+    return "\n\n" in note or len(note) >= ESCALATION_NOTE_MAX_CHARS
+
 
 class LadderAgent:
     """An agent tied to a specific ladder level."""
 
-    def __init__(self, client: AsyncAnthropic, level: LadderLevel) -> None:
+    def __init__(
+        self, client: AsyncAnthropic, level: LadderLevel, model_id: str | None = None
+    ) -> None:
         self.client = client
         self.level = level
         self.config = get_config(level)
+        # A fallback model of the same tier, if not the level's own.
+        self.model_id = model_id or self.config.model_id
+        # Progress of the current run, so a cancelled attempt can still be costed.
+        self._parts: list[str] = []
+        self._usage = TokenUsage()
+        # Usage of earlier, finished turns and where the current turn's text starts.
+        self._spent = TokenUsage()
+        self._turn_start = 0
+        self._started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._first_token_t: float | None = None
+        # Called with each chunk of answer text as it arrives; text is held
+        # back until the reply is known not to be an escalation.
+        self.on_text: Callable[[LadderAgent, str], None] | None = None
 
-    async def run(self, task: str, context: str = "") -> AgentResponse:
-        """Run the agent on a task, returning text and escalation info."""
-        user_content = task
-        if context:
-            user_content = f"Context:\n{context}\n\nTask:\n{task}"
-
-        response = await self.client.messages.create(
-            model=self.config.model_id,
-            max_tokens=self.config.max_output_tokens,
-            system=LEVEL_PROMPTS[self.level],
-            messages=[{"role": "user", "content": user_content}],
-        )
+    @property
+    def text(self) -> str:
+        """Text received so far in the current run, across continuation turns."""
+        return "".join(self._parts)
 
-        text = response.content[0].text
-        usage = TokenUsage(
-            input_tokens=response.usage.input_tokens,
-            output_tokens=response.usage.output_tokens,
-        )
+    def request_params(
+        self, task: str, context: str = "", handoff: str = "", max_tokens: int | None = None
+    ) -> dict:
+        """Messages API parameters for running this level on a task.
+
+        ``max_tokens`` is capped at the level's ``max_output_tokens``.
+        """
+        max_tokens = min(max_tokens or self.config.max_output_tokens, self.config.max_output_tokens)
+        content = [{"type": "text", "text": task}]
+        if handoff:
+            content.append({"type": "text", "text": handoff})
+        return {
+            "model": self.model_id,
+            "max_tokens": max_tokens,
+            "system": agent_system(self.level, context, self.model_id),
+            "messages": [{"role": "user", "content": content}],
+        }
+
+    def continuation_params(self, params: dict, text: str) -> dict:
+        """Parameters for a follow-up turn that asks for the rest of ``text``.
+
+        Each continuation gets twice the previous budget, up to the level's cap.
+        """
+        messages = params["messages"][:1] + [
+            {"role": "assistant", "content": text},
+            {"role": "user", "content": CONTINUE_PROMPT},
+        ]
+        max_tokens = min(params["max_tokens"] * 2, self.config.max_output_tokens)
+        return {**params, "max_tokens": max_tokens, "messages": messages}
+
+    def parse_message(self, message: object, batch: bool = False) -> AgentResponse:
+        """Build a response from a complete (non-streamed) API message."""
+        text = "".join(block.text for block in message.content if block.type == "text")
+        escalated = bool(escalation_state(text))
+        description = self.describe("batch") if batch else self.describe()
         cost = calculate_cost(
-            self.level, usage, description=f"Agent ({self.level.value})"
+            self.level,
+            TokenUsage.from_api(message.usage),
+            description,
+            batch=batch,
+            model_id=self.model_id,
         )
+        return AgentResponse(
+            text=text,
+            escalated=escalated,
+            escalation_reason=EscalationReason.self_escalation if escalated else None,
+            escalation_note=escalation_note(text) if escalated else None,
+            cost=cost,
+            truncated=getattr(message, "stop_reason", None) == "max_tokens",
+        )
+
+    async def run(
+        self, task: str, context: str = "", handoff: str = "", max_tokens: int | None = None
+    ) -> AgentResponse:
+        """Run the agent on a task, returning text and escalation info.
+
+        The response is streamed so that an escalation can be detected from
+        the first few tokens; the stream is then closed as soon as the short
+        escalation reason has arrived, and the cost reflects only the tokens
+        consumed up to that point. The context and level prompt carry cache
+        breakpoints, so repeated and escalated calls read them from the prompt
+        cache. ``handoff`` (notes from lower levels) is sent after the task so
+        it never disturbs the cached prefix.
+
+        A response that stops at ``max_tokens`` is continued in a follow-up
+        turn (up to ``MAX_CONTINUATIONS``) rather than started over; all turns
+        are merged into one text and one cost record.
+        """
+        self._parts = parts = []
+        self._usage = TokenUsage()
+        self._spent = TokenUsage()
+        self._turn_start = 0
+        self._started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._first_token_t = None
+
+        params = self.request_params(task, context, handoff, max_tokens)
+        escalated, cut_short, stop_reason = await self._stream(params, None)
+        continuations = 0
+        while stop_reason == "max_tokens" and not escalated and continuations < MAX_CONTINUATIONS:
+            continuations += 1
+            self._spent = self._spent + self._usage
+            self._usage = TokenUsage()
+            self._turn_start = len(parts)
+            params = self.continuation_params(params, "".join(parts))
+            escalated, cut_short, stop_reason = await self._stream(params, escalated)
 
-        escalated = text.strip().upper().startswith(ESCALATE_PREFIX.upper())
+        text = "".join(parts)
+        description = self.describe()
+        if continuations:
+            plural = "s" if continuations > 1 else ""
+            description = self.describe(f"{continuations} continuation{plural}")
+        if cut_short:
+            # Cancelled mid-stream: the final usage event never arrived.
+            cost = self.partial_cost(description=description)
+        else:
+            escalated = bool(escalation_state(text))
+            cost = calculate_cost(
+                self.level, self._spent + self._usage, description, model_id=self.model_id
+            )
 
         return AgentResponse(
             text=text,
             escalated=escalated,
             escalation_reason=EscalationReason.self_escalation if escalated else None,
+            escalation_note=escalation_note(text) if escalated else None,
             cost=cost,
+            span=self.span(cost.usage.output_tokens, "escalated" if escalated else "ok"),
+            continuations=continuations,
+            truncated=stop_reason == "max_tokens" and not escalated,
+        )
+
+    async def _stream(
+        self, params: dict, escalated: bool | None
+    ) -> tuple[bool | None, bool, str | None]:
+        """Stream one turn into ``self._parts``.
+
+        Returns the escalation state, whether the stream was cut short after
+        an escalation, and the stop reason.
+        """
+        parts = self._parts
+        stream = await self.client.messages.create(**params, stream=True)
+        cut_short = False
+        stop_reason = None
+        async with stream:
+            async for event in stream:
+                if event.type == "message_start":
+                    self._usage = TokenUsage.from_api(event.message.usage)
+                elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    if self._first_token_t is None:
+                        self._first_token_t = time.perf_counter()
+                    parts.append(event.delta.text)
+                    if escalated is None:
+                        escalated = escalation_state("".join(parts))
+                    if escalated and _note_complete("".join(parts)):
+                        cut_short = True
+                        break
+                    if escalated is False and self.on_text is not None:
+                        self.on_text(self, event.delta.text)
+                elif event.type == "message_delta":
+                    self._usage.output_tokens = event.usage.output_tokens
+                    stop_reason = event.delta.stop_reason
+        return escalated, cut_short, stop_reason
+
+    def describe(self, *notes: str) -> str:
+        """Cost record description, e.g. ``Agent (mid, via <fallback model>, cancelled)``."""
+        if self.model_id != self.config.model_id:
+            notes = (f"via {self.model_id}", *notes)
+        return f"Agent ({', '.join((self.level.value, *notes))})"
+
+    @property
+    def ttft_s(self) -> float | None:
+        """Seconds from the start of the current run to its first token, if any yet."""
+        if self._first_token_t is None:
+            return None
+        return self._first_token_t - self._t0
+
+    def span(self, output_tokens: int, status: str) -> Span:
+        """Timing of the current run, measured up to now."""
+        now = time.perf_counter()
+        ttft = tps = None
+        if self._first_token_t is not None:
+            ttft = self._first_token_t - self._t0
+            generating = now - self._first_token_t
+            tps = output_tokens / generating if generating > 0 else None
+        return Span(
+            name="agent",
+            level=self.level,
+            start_time=self._started_at,
+            wall_s=now - self._t0,
+            ttft_s=ttft,
+            output_tokens=output_tokens,
+            output_tokens_per_s=tps,
+            status=status,
+        )
+
+    def partial_cost(self, description: str = "") -> CostRecord:
+        """Cost of a run that stopped before the final usage event arrived.
+
+        Output tokens of the current turn are estimated from the text received
+        so far; earlier turns use their reported usage.
+        """
+        text = "".join(self._parts[self._turn_start :])
+        output_tokens = max(self._usage.output_tokens, math.ceil(len(text) / CHARS_PER_TOKEN))
+        usage = self._spent + self._usage.model_copy(update={"output_tokens": output_tokens})
+        return calculate_cost(
+            self.level,
+            usage,
+            description=description or self.describe("cancelled"),
+            model_id=self.model_id,
         )
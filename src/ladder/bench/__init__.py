@@ -0,0 +1,20 @@
+"""Offline benchmarks: a local stand-in for AsyncAnthropic, a workload runner and import timing."""
+
+from .fake import FakeAnthropic, FakeConfig, ModelProfile
+from .imports import ImportReport, check_imports, measure_imports
+from .runner import BenchReport, compare_reports, run_benchmark
+from .workloads import WORKLOADS, build_workload
+
+__all__ = [
+    "BenchReport",
+    "FakeAnthropic",
+    "FakeConfig",
+    "ImportReport",
+    "ModelProfile",
+    "WORKLOADS",
+    "build_workload",
+    "check_imports",
+    "compare_reports",
+    "measure_imports",
+    "run_benchmark",
+]
@@ -0,0 +1,310 @@
+"""A local stand-in for ``AsyncAnthropic`` with simulated latency, usage and failures.
+
+The fake recognises classifier and agent calls from their system prompts and
+answers them the way the real API would, so workloads exercise the real
+``Orchestrator``, ``LadderAgent`` and ``classify_task`` code paths. Each task
+carries its true difficulty as a ``[bench:<level>]`` tag; agents below that
+level escalate with the configured probability.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+
+from ..models import LadderLevel
+from ..prompts import CLASSIFIER_PROMPT, LEVEL_PROMPTS, PLAN_PROMPT
+
+_TAG_RE = re.compile(r"\[bench:(\w+)")
+_BATCH_TASK_RE = re.compile(r'<task index="(\d+)">\n(.*?)\n</task>', re.DOTALL)
+_LEVEL_ORDER = list(LadderLevel)
+_PLAN_MARKER = PLAN_PROMPT.split("{", 1)[0]
+_REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+# Characters per token used to derive input usage from request text.
+_CHARS_PER_TOKEN = 4
+# Tokens per streamed text delta.
+_CHUNK_TOKENS = 16
+# Subtasks a staff or principal task is planned into, each two levels easier.
+_PLAN_SUBTASKS = 3
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Latency and throughput of one simulated model."""
+
+    ttft_median_s: float
+    ttft_sigma: float = 0.5
+    tokens_per_s: float = 80.0
+    output_tokens: tuple[int, int] = (200, 1200)
+
+
+DEFAULT_PROFILES: dict[str, ModelProfile] = {
+    "claude-haiku-4-5-20251001": ModelProfile(ttft_median_s=0.4, tokens_per_s=160.0),
+    "claude-sonnet-4-5-20250929": ModelProfile(ttft_median_s=0.9, tokens_per_s=80.0),
+    "claude-opus-4-6": ModelProfile(ttft_median_s=1.6, tokens_per_s=50.0),
+}
+
+
+@dataclass
+class FakeConfig:
+    """Behaviour of the fake API."""
+
+    profiles: dict[str, ModelProfile] = field(default_factory=lambda: dict(DEFAULT_PROFILES))
+    # Multiplies every simulated delay; 0.01 runs a 1s call in 10ms.
+    time_scale: float = 0.01
+    # Probability that an agent below the task's true level escalates.
+    escalation_rate: float = 0.9
+    # Probability that the classifier returns the true level.
+    classifier_accuracy: float = 0.8
+    rate_limit_rate: float = 0.0
+    overload_rate: float = 0.0
+    seed: int | None = 0
+
+
+@dataclass
+class FakeStats:
+    """Counters of what the fake served."""
+
+    calls: int = 0
+    streams: int = 0
+    cancelled_streams: int = 0
+    rate_limited: int = 0
+    overloaded: int = 0
+
+
+def _status_error(cls: type[anthropic.APIStatusError], status: int, message: str):
+    response = httpx.Response(status, request=_REQUEST)
+    return cls(message, response=response, body={"error": {"type": "error", "message": message}})
+
+
+def _text_of(content: object) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+class _FakeStream:
+    """Async iterator of raw stream events, closable mid-way like ``AsyncStream``."""
+
+    def __init__(self, owner: FakeAnthropic, events) -> None:
+        self._owner = owner
+        self._events = events
+        self._finished = False
+
+    async def __aenter__(self) -> _FakeStream:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if not self._finished:
+            self._finished = True
+            self._owner.stats.cancelled_streams += 1
+            await self._events.aclose()
+
+    async def __aiter__(self):
+        async for event in self._events:
+            yield event
+        self._finished = True
+
+
+class _FakeBatches:
+    """Message Batches that end as soon as they are created."""
+
+    def __init__(self, owner: FakeAnthropic) -> None:
+        self._owner = owner
+        self._results: dict[str, list[SimpleNamespace]] = {}
+
+    async def create(self, *, requests: list[dict]):
+        batch_id = f"msgbatch_fake_{len(self._results)}"
+        results = []
+        for request in requests:
+            try:
+                message = await self._owner._create(stream=False, **request["params"])
+                result = SimpleNamespace(type="succeeded", message=message, error=None)
+            except anthropic.APIStatusError as exc:
+                result = SimpleNamespace(type="errored", message=None, error=str(exc))
+            results.append(SimpleNamespace(custom_id=request["custom_id"], result=result))
+        self._results[batch_id] = results
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    async def retrieve(self, batch_id: str):
+        return SimpleNamespace(id=batch_id, processing_status="ended")
+
+    async def results(self, batch_id: str):
+        async def entries():
+            for entry in self._results[batch_id]:
+                yield entry
+
+        return entries()
+
+
+class _FakeMessages:
+    def __init__(self, owner: FakeAnthropic) -> None:
+        self._owner = owner
+        self.batches = _FakeBatches(owner)
+
+    async def create(self, *, stream: bool = False, **params):
+        return await self._owner._create(stream=stream, **params)
+
+    async def count_tokens(self, **params):
+        return SimpleNamespace(input_tokens=self._owner._usage(params, 0).input_tokens)
+
+
+class FakeAnthropic:
+    """Drop-in replacement for the subset of ``AsyncAnthropic`` that ladder uses."""
+
+    def __init__(self, config: FakeConfig | None = None) -> None:
+        self.config = config or FakeConfig()
+        self.stats = FakeStats()
+        self.messages = _FakeMessages(self)
+        self._rng = random.Random(self.config.seed)
+
+    async def _sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds * self.config.time_scale)
+
+    def _profile(self, model: str) -> ModelProfile:
+        return self.config.profiles.get(model) or DEFAULT_PROFILES["claude-sonnet-4-5-20250929"]
+
+    def _maybe_fail(self) -> None:
+        roll = self._rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats.rate_limited += 1
+            raise _status_error(anthropic.RateLimitError, 429, "rate limited (simulated)")
+        if roll < self.config.rate_limit_rate + self.config.overload_rate:
+            self.stats.overloaded += 1
+            overloaded = getattr(anthropic, "OverloadedError", anthropic.InternalServerError)
+            raise _status_error(overloaded, 529, "overloaded (simulated)")
+
+    def _reply(self, params: dict) -> tuple[str, int]:
+        """The reply text and its output token count for a request."""
+        system = _text_of(params.get("system", ""))
+        task = _text_of(params["messages"][0]["content"])
+        match = _TAG_RE.search(task)
+        true_level = LadderLevel(match.group(1)) if match else LadderLevel.mid
+        profile = self._profile(params["model"])
+
+        if CLASSIFIER_PROMPT in system:
+            if params.get("tools"):
+                # Batched classification: one entry per task, as tool input.
+                entries = [
+                    {"index": int(index), **self._classification(text)}
+                    for index, text in _BATCH_TASK_RE.findall(task)
+                ]
+                reply = json.dumps({"classifications": entries})
+            else:
+                reply = json.dumps(self._classification(task))
+            return reply, len(reply) // _CHARS_PER_TOKEN
+
+        if _PLAN_MARKER in system:
+            reply = json.dumps({"subtasks": self._plan(true_level)})
+            return reply, len(reply) // _CHARS_PER_TOKEN
+
+        level = next(
+            (lvl for lvl, prompt in LEVEL_PROMPTS.items() if prompt in system),
+            LadderLevel.mid,
+        )
+        if _LEVEL_ORDER.index(level) < _LEVEL_ORDER.index(true_level) and (
+            self._rng.random() < self.config.escalation_rate
+        ):
+            reply = "ESCALATE: This task is beyond this level (simulated).\n\n" + "detail " * 200
+            return reply, len(reply) // _CHARS_PER_TOKEN
+
+        tokens = self._rng.randint(*profile.output_tokens)
+        tokens = min(tokens, params.get("max_tokens", tokens))
+        return "x" * (tokens * _CHARS_PER_TOKEN), tokens
+
+    def _plan(self, level: LadderLevel) -> list[dict]:
+        """Subtasks two levels easier for staff and principal tasks; none for the rest."""
+        idx = _LEVEL_ORDER.index(level)
+        if idx < _LEVEL_ORDER.index(LadderLevel.staff):
+            return []
+        easier = _LEVEL_ORDER[idx - 2].value
+        return [
+            {"title": f"Part {i}", "task": f"Implement part {i} of the plan [bench:{easier}:{i}]"}
+            for i in range(1, _PLAN_SUBTASKS + 1)
+        ]
+
+    def _classification(self, task: str) -> dict:
+        """A classifier verdict for a task, right with ``classifier_accuracy``."""
+        match = _TAG_RE.search(task)
+        level = LadderLevel(match.group(1)) if match else LadderLevel.mid
+        if self._rng.random() > self.config.classifier_accuracy:
+            idx = _LEVEL_ORDER.index(level) + self._rng.choice((-1, 1))
+            level = _LEVEL_ORDER[min(max(idx, 0), len(_LEVEL_ORDER) - 1)]
+        return {
+            "level": level.value,
+            "category": "implementation",
+            "confidence": round(self._rng.uniform(0.5, 1.0), 2),
+            "reasoning": "Simulated classification.",
+            "estimated_complexity": _LEVEL_ORDER.index(level) + 2,
+        }
+
+    def _usage(self, params: dict, output_tokens: int) -> SimpleNamespace:
+        text = _text_of(params.get("system", "")) + "".join(
+            _text_of(m["content"]) for m in params["messages"]
+        )
+        return SimpleNamespace(
+            input_tokens=len(text) // _CHARS_PER_TOKEN,
+            output_tokens=output_tokens,
+            cache_creation_input_tokens=0,
+            cache_read_input_tokens=0,
+        )
+
+    async def _create(self, *, stream: bool, **params):
+        self.stats.calls += 1
+        profile = self._profile(params["model"])
+        ttft = self._rng.lognormvariate(0.0, profile.ttft_sigma) * profile.ttft_median_s
+        self._maybe_fail()
+        text, output_tokens = self._reply(params)
+        truncated = output_tokens >= params.get("max_tokens", output_tokens + 1)
+        stop_reason = "max_tokens" if truncated else "end_turn"
+
+        if stream:
+            self.stats.streams += 1
+            events = self._events(params, text, output_tokens, stop_reason, ttft, profile)
+            return _FakeStream(self, events)
+
+        await self._sleep(ttft + output_tokens / profile.tokens_per_s)
+        if params.get("tool_choice", {}).get("type") == "tool":
+            block = SimpleNamespace(
+                type="tool_use",
+                id="toolu_fake",
+                name=params["tool_choice"]["name"],
+                input=json.loads(text),
+            )
+            return SimpleNamespace(
+                content=[block], usage=self._usage(params, output_tokens), stop_reason="tool_use"
+            )
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=text)],
+            usage=self._usage(params, output_tokens),
+            stop_reason=stop_reason,
+        )
+
+    async def _events(self, params, text, output_tokens, stop_reason, ttft, profile):
+        ns = SimpleNamespace
+        await self._sleep(ttft)
+        yield ns(type="message_start", message=ns(usage=self._usage(params, 1)))
+        yield ns(type="content_block_start", index=0, content_block=ns(type="text", text=""))
+        chunk_chars = _CHUNK_TOKENS * _CHARS_PER_TOKEN
+        for start in range(0, len(text), chunk_chars):
+            await self._sleep(_CHUNK_TOKENS / profile.tokens_per_s)
+            delta = ns(type="text_delta", text=text[start : start + chunk_chars])
+            yield ns(type="content_block_delta", index=0, delta=delta)
+        yield ns(type="content_block_stop", index=0)
+        yield ns(
+            type="message_delta",
+            delta=ns(stop_reason=stop_reason),
+            usage=ns(output_tokens=output_tokens),
+        )
+        yield ns(type="message_stop")
@@ -0,0 +1,102 @@
+"""Import-time benchmark: how long entry points take to load, and what they pull in."""
+
+from __future__ import annotations
+
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+
+# Dependencies that light entry points must not load.
+HEAVY_MODULES = ("anthropic", "httpx", "pydantic")
+# Timing regressions smaller than this are treated as noise.
+MIN_REGRESSION_MS = 10.0
+
+# Runs ``code`` in a fresh interpreter and reports its import time and sys.modules.
+_PROBE = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+@dataclass(frozen=True)
+class ImportProbe:
+    """An entry point to time; ``light`` ones must not load ``HEAVY_MODULES``."""
+
+    name: str
+    code: str
+    light: bool = True
+
+
+PROBES = (
+    ImportProbe("import ladder", "import ladder"),
+    ImportProbe("import ladder.cli", "import ladder.cli"),
+    ImportProbe(
+        "ladder levels",
+        "from ladder.cli import main; main(['levels'], standalone_mode=False)",
+    ),
+    ImportProbe("import ladder.orchestrator", "import ladder.orchestrator", light=False),
+)
+
+
+@dataclass
+class ImportReport:
+    """Median import time per probe in milliseconds, and heavy modules each loaded."""
+
+    runs: int
+    import_ms: dict[str, float] = field(default_factory=dict)
+    heavy_modules: dict[str, list[str]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _run_probe(probe: ImportProbe) -> tuple[float, set[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=probe.code)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    data = json.loads(output.strip().splitlines()[-1])
+    return data["ms"], set(data["modules"])
+
+
+def measure_imports(probes: tuple[ImportProbe, ...] = PROBES, runs: int = 5) -> ImportReport:
+    """Time each probe in ``runs`` fresh interpreters."""
+    report = ImportReport(runs=runs)
+    for probe in probes:
+        timings = []
+        for _ in range(runs):
+            ms, modules = _run_probe(probe)
+            timings.append(ms)
+        report.import_ms[probe.name] = round(statistics.median(timings), 2)
+        report.heavy_modules[probe.name] = [m for m in HEAVY_MODULES if m in modules]
+    return report
+
+
+def check_imports(
+    current: dict,
+    baseline: dict | None = None,
+    tolerance: float = 0.10,
+    probes: tuple[ImportProbe, ...] = PROBES,
+) -> list[str]:
+    """List light probes that load heavy modules, and import times that regressed."""
+    problems = [
+        f"{probe.name} loads {', '.join(current['heavy_modules'][probe.name])}"
+        for probe in probes
+        if probe.light and current["heavy_modules"].get(probe.name)
+    ]
+    for name, new in current["import_ms"].items():
+        old = (baseline or {}).get("import_ms", {}).get(name)
+        if not old:
+            continue
+        change = (new - old) / old
+        if change > tolerance and new - old > MIN_REGRESSION_MS:
+            problems.append(f"{name}: {old:.1f}ms -> {new:.1f}ms ({change:+.1%} slower)")
+    return problems
@@ -0,0 +1,161 @@
+"""Run benchmark workloads through the real orchestrator against the fake API."""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+
+from ..levels import next_level
+from ..models import BatchTask, EscalationReason, LadderLevel, TaskResult
+from ..orchestrator import Orchestrator
+from .fake import FakeAnthropic, FakeConfig
+from .workloads import build_workload
+
+
+@dataclass
+class BenchReport:
+    """Machine-readable benchmark results. Latencies are wall-clock seconds."""
+
+    workload: str
+    tasks: int
+    concurrency: int
+    time_scale: float
+    failures: int = 0
+    failure_rate: float = 0.0
+    wall_s: float = 0.0
+    tasks_per_s: float = 0.0
+    latency_p50_s: float = 0.0
+    latency_p95_s: float = 0.0
+    latency_p99_s: float = 0.0
+    cost_per_task_usd: float = 0.0
+    api_calls: int = 0
+    cancelled_streams: int = 0
+    attempts: dict[str, int] = field(default_factory=dict)
+    escalation_rate: dict[str, float] = field(default_factory=dict)
+    failure_types: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _attempts(result: TaskResult) -> list[tuple[LadderLevel, bool]]:
+    """Reconstruct (level, escalated) for each agent attempt of a result."""
+    path: list[tuple[LadderLevel, bool]] = []
+    level = result.initial_level
+    for reason in result.escalations:
+        if reason == EscalationReason.self_escalation:
+            path.append((level, True))
+        level = next_level(level) or level
+    if not path or path[-1][0] != result.final_level:
+        path.append((result.final_level, False))
+    return path
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+async def run_benchmark(
+    workload: str = "mixed",
+    num_tasks: int = 200,
+    concurrency: int = 32,
+    config: FakeConfig | None = None,
+    context_chars: int = 0,
+    make_orchestrator: Callable[[FakeAnthropic], Orchestrator] = Orchestrator,
+) -> BenchReport:
+    """Run a scripted workload and measure throughput, latency, cost and escalations."""
+    config = config or FakeConfig()
+    client = FakeAnthropic(config)
+    orchestrator = make_orchestrator(client)
+    tasks = build_workload(workload, num_tasks, seed=config.seed or 0, context_chars=context_chars)
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    results: list[TaskResult] = []
+    failures: Counter[str] = Counter()
+
+    async def one(item: BatchTask) -> None:
+        async with slots:
+            start = time.perf_counter()
+            try:
+                result = await orchestrator.run(item.task, item.context)
+            except Exception as exc:
+                failures[type(exc).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            results.append(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in tasks))
+    wall = time.perf_counter() - start
+
+    attempts: Counter[str] = Counter()
+    escalated: Counter[str] = Counter()
+    for result in results:
+        for level, did_escalate in _attempts(result):
+            attempts[level.value] += 1
+            escalated[level.value] += did_escalate
+
+    return BenchReport(
+        workload=workload,
+        tasks=num_tasks,
+        concurrency=concurrency,
+        time_scale=config.time_scale,
+        failures=sum(failures.values()),
+        failure_rate=sum(failures.values()) / num_tasks if num_tasks else 0.0,
+        wall_s=wall,
+        tasks_per_s=len(results) / wall if wall else 0.0,
+        latency_p50_s=_percentile(latencies, 50),
+        latency_p95_s=_percentile(latencies, 95),
+        latency_p99_s=_percentile(latencies, 99),
+        cost_per_task_usd=(
+            sum(r.total_cost_usd for r in results) / len(results) if results else 0.0
+        ),
+        api_calls=client.stats.calls,
+        cancelled_streams=client.stats.cancelled_streams,
+        attempts={lvl.value: attempts[lvl.value] for lvl in LadderLevel},
+        escalation_rate={
+            lvl.value: escalated[lvl.value] / attempts[lvl.value]
+            for lvl in LadderLevel
+            if attempts[lvl.value]
+        },
+        failure_types=dict(failures),
+    )
+
+
+# Metrics where a higher value is a regression, and where a lower one is.
+_HIGHER_IS_WORSE = (
+    "latency_p50_s",
+    "latency_p95_s",
+    "latency_p99_s",
+    "cost_per_task_usd",
+    "failure_rate",
+)
+_LOWER_IS_WORSE = ("tasks_per_s",)
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float = 0.10) -> list[str]:
+    """List metrics that regressed by more than ``tolerance`` relative to a baseline."""
+    regressions = []
+    for metric in _HIGHER_IS_WORSE + _LOWER_IS_WORSE:
+        old, new = baseline.get(metric), current.get(metric)
+        if old is None or new is None:
+            continue
+        if old == 0:
+            if new > 0 and metric in _HIGHER_IS_WORSE:
+                regressions.append(f"{metric}: 0 -> {new:.6g}")
+            continue
+        change = (new - old) / old
+        if metric in _LOWER_IS_WORSE:
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{metric}: {old:.6g} -> {new:.6g} ({change:+.1%} worse)")
+    return regressions
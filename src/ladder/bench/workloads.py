@@ -0,0 +1,46 @@
+"""Scripted benchmark workloads with a known difficulty mix."""
+
+from __future__ import annotations
+
+import random
+
+from ..models import BatchTask, LadderLevel
+
+_TEMPLATES: dict[LadderLevel, list[str]] = {
+    LadderLevel.intern: ["Fix the typo in {name}", "Add a docstring to {name}"],
+    LadderLevel.junior: ["Write a unit test for {name}", "Fix the off-by-one error in {name}"],
+    LadderLevel.mid: ["Review the changes to {name}", "Debug the flaky test in {name}"],
+    LadderLevel.senior: ["Optimize the hot path in {name}", "Refactor {name} across services"],
+    LadderLevel.staff: ["Design the architecture for {name}"],
+    LadderLevel.principal: ["Plan the org-wide migration of {name}"],
+}
+
+# Share of tasks at each true difficulty level.
+WORKLOADS: dict[str, dict[LadderLevel, float]] = {
+    "simple": {LadderLevel.intern: 0.6, LadderLevel.junior: 0.4},
+    "mixed": {
+        LadderLevel.intern: 0.25,
+        LadderLevel.junior: 0.25,
+        LadderLevel.mid: 0.25,
+        LadderLevel.senior: 0.15,
+        LadderLevel.staff: 0.07,
+        LadderLevel.principal: 0.03,
+    },
+    "hard": {LadderLevel.senior: 0.5, LadderLevel.staff: 0.35, LadderLevel.principal: 0.15},
+}
+
+
+def build_workload(
+    name: str, num_tasks: int, seed: int = 0, context_chars: int = 0
+) -> list[BatchTask]:
+    """Generate tasks tagged with their true level, e.g. ``[bench:mid:17]``."""
+    mix = WORKLOADS[name]
+    rng = random.Random(seed)
+    levels = rng.choices(list(mix), weights=list(mix.values()), k=num_tasks)
+    context = "y" * context_chars
+    tasks = []
+    for i, level in enumerate(levels):
+        template = rng.choice(_TEMPLATES[level])
+        text = f"{template.format(name=f'module_{i % 97}.py')} [bench:{level.value}:{i}]"
+        tasks.append(BatchTask(task=text, context=context, id=str(i)))
+    return tasks
@@ -0,0 +1,226 @@
+"""Offline bulk runs on the Message Batches API with resumable local state.
+
+A job moves through rounds: the first classifies every task, and each later
+round runs the current agent attempt for every unfinished task, so
+escalations and continuations of answers cut off at max_tokens land in a
+follow-up batch. The state file is rewritten after
+every step, so a crashed process resumes without resubmitting work.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from anthropic import AsyncAnthropic
+from pydantic import BaseModel, Field
+
+from .agent import MAX_CONTINUATIONS, LadderAgent
+from .classifier import classifier_request, parse_classification
+from .cost import calculate_cost
+from .levels import next_level
+from .models import (
+    BatchOutcome,
+    BatchTask,
+    ClassificationResult,
+    CostRecord,
+    EscalationReason,
+    LadderLevel,
+    TaskResult,
+    TokenUsage,
+)
+from .orchestrator import CONFIDENCE_THRESHOLD, MAX_ESCALATIONS
+from .prompts import handoff_note
+
+# Results of these types are retried in the next round rather than failing the task.
+_RETRYABLE_RESULTS = {"expired", "canceled"}
+
+
+class BulkTaskState(BaseModel):
+    """Progress of one task through a bulk job."""
+
+    task: str
+    context: str = ""
+    id: str | None = None
+    classification: ClassificationResult | None = None
+    initial_level: LadderLevel | None = None
+    level: LadderLevel | None = None
+    escalations: list[EscalationReason] = Field(default_factory=list)
+    notes: list[tuple[LadderLevel, str]] = Field(default_factory=list)
+    costs: list[CostRecord] = Field(default_factory=list)
+    response: str | None = None
+    # Follow-up turns asked for the current answer after it hit max_tokens.
+    continuations: int = 0
+    truncated: bool = False
+    error: str | None = None
+    done: bool = False
+
+
+class BulkJobState(BaseModel):
+    """Checkpointed state of a bulk job."""
+
+    tasks: list[BulkTaskState]
+    round: int = 0
+    batch_id: str | None = None
+    batch_ids: list[str] = Field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return self.batch_id is None and all(t.done for t in self.tasks)
+
+
+class BulkJob:
+    """A resumable bulk job backed by a JSON state file."""
+
+    def __init__(self, path: str | Path, state: BulkJobState) -> None:
+        self.path = Path(path)
+        self.state = state
+
+    @classmethod
+    def create(cls, path: str | Path, tasks: Iterable[BatchTask]) -> BulkJob:
+        state = BulkJobState(
+            tasks=[BulkTaskState(task=t.task, context=t.context, id=t.id) for t in tasks]
+        )
+        job = cls(path, state)
+        job.save()
+        return job
+
+    @classmethod
+    def load(cls, path: str | Path) -> BulkJob:
+        return cls(path, BulkJobState.model_validate_json(Path(path).read_text()))
+
+    def save(self) -> None:
+        """Atomically rewrite the state file."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(self.state.model_dump_json())
+        os.replace(tmp, self.path)
+
+    def _requests(self, client: AsyncAnthropic) -> list[dict]:
+        """Batch requests for the current round, one per unfinished task."""
+        requests = []
+        for index, t in enumerate(self.state.tasks):
+            if t.done:
+                continue
+            if t.classification is None:
+                params = classifier_request(t.task)
+            else:
+                agent = LadderAgent(client, t.level)
+                params = agent.request_params(t.task, t.context, handoff_note(t.notes))
+                for _ in range(t.continuations):
+                    params = agent.continuation_params(params, t.response)
+            requests.append({"custom_id": f"t{index}", "params": params})
+        return requests
+
+    async def submit(self, client: AsyncAnthropic) -> str | None:
+        """Submit the current round, unless a batch is already in flight.
+
+        Returns the in-flight batch ID, or None when every task is finished.
+        """
+        if self.state.batch_id is not None:
+            return self.state.batch_id
+        requests = self._requests(client)
+        if not requests:
+            return None
+        batch = await client.messages.batches.create(requests=requests)
+        self.state.batch_id = batch.id
+        self.state.batch_ids.append(batch.id)
+        self.save()
+        return batch.id
+
+    async def poll(self, client: AsyncAnthropic) -> str:
+        """Check the in-flight batch; ingest it and submit the next round if it ended.
+
+        Returns the batch's processing status, or "done" once the job is complete.
+        """
+        if self.state.batch_id is None:
+            await self.submit(client)
+            if self.state.batch_id is None:
+                return "done"
+        batch = await client.messages.batches.retrieve(self.state.batch_id)
+        if batch.processing_status != "ended":
+            return batch.processing_status
+
+        async for entry in await client.messages.batches.results(self.state.batch_id):
+            t = self.state.tasks[int(entry.custom_id[1:])]
+            if entry.result.type == "succeeded":
+                self._ingest(client, t, entry.result.message)
+            elif entry.result.type not in _RETRYABLE_RESULTS:
+                t.error = f"{entry.result.type}: {entry.result.error}"
+                t.done = True
+
+        self.state.batch_id = None
+        self.state.round += 1
+        self.save()
+        await self.submit(client)
+        return "done" if self.state.done else "ended"
+
+    def _ingest(self, client: AsyncAnthropic, t: BulkTaskState, message: object) -> None:
+        """Apply one successful result to its task, following the orchestrator's routing."""
+        if t.classification is None:
+            try:
+                classification = parse_classification(message.content[0].text)
+            except (ValueError, KeyError, IndexError) as exc:
+                t.error = f"classification failed: {exc}"
+                t.done = True
+                return
+            usage = TokenUsage.from_api(message.usage)
+            t.costs.append(
+                calculate_cost(
+                    LadderLevel.intern, usage, "Classification (batch)", batch=True
+                )
+            )
+            t.classification = classification
+            t.initial_level = t.level = classification.level
+            # Bump level if classifier confidence is low
+            bumped = next_level(classification.level)
+            if classification.confidence < CONFIDENCE_THRESHOLD and bumped is not None:
+                t.level = bumped
+                t.escalations.append(EscalationReason.low_confidence)
+            return
+
+        response = LadderAgent(client, t.level).parse_message(message, batch=True)
+        t.costs.append(response.cost)
+        # A continuation carries on an answer already known not to be an escalation.
+        continuing = t.continuations > 0
+        t.response = t.response + response.text if continuing else response.text
+        if continuing or not response.escalated:
+            t.truncated = response.truncated
+            if response.truncated and t.continuations < MAX_CONTINUATIONS:
+                t.continuations += 1
+            else:
+                t.done = True
+            return
+        t.escalations.append(EscalationReason.self_escalation)
+        escalation_count = t.escalations.count(EscalationReason.self_escalation)
+        higher = next_level(t.level)
+        if higher is None or escalation_count > MAX_ESCALATIONS:
+            t.done = True
+            return
+        if response.escalation_note:
+            t.notes.append((t.level, response.escalation_note))
+        t.level = higher
+
+    def outcomes(self) -> Iterable[BatchOutcome]:
+        """Outcomes for finished tasks, in input order."""
+        for index, t in enumerate(self.state.tasks):
+            if not t.done:
+                continue
+            if t.error is not None:
+                yield BatchOutcome(index=index, id=t.id, error=t.error)
+                continue
+            yield BatchOutcome(
+                index=index,
+                id=t.id,
+                result=TaskResult(
+                    task=t.task,
+                    classification=t.classification,
+                    initial_level=t.initial_level,
+                    final_level=t.level,
+                    response=t.response,
+                    escalations=t.escalations,
+                    costs=t.costs,
+                    total_cost_usd=sum(c.cost_usd for c in t.costs),
+                    truncated=t.truncated,
+                ),
+            )
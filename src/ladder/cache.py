@@ -0,0 +1,233 @@
+"""Key/value cache backends: an in-process LRU, a SQLite store, and a tier of both."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("LADDER_CACHE_DIR") or Path.home() / ".cache" / "ladder"
+)
+
+
+def _size(value: str) -> int:
+    return len(value.encode())
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CacheBackend(Protocol):
+    """A string key/value store with its own expiry and eviction policy."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryCache:
+    """In-process LRU cache with optional TTL and size limits."""
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float | None, str]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.delete(key)
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires_at, value)
+        self._bytes += _size(value)
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes and self._entries
+        ):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= _size(evicted)
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= _size(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache in a SQLite file, with TTL and least-recently-used eviction."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int = 100_000,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " expires_at REAL,"
+            " size INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "size" not in columns:
+            self._conn.execute(
+                "ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self.delete(key)
+            return None
+        self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, accessed_at, expires_at, size)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, value, now, expires_at, _size(value)),
+        )
+        self._evict(now)
+        self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond the caps."""
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN"
+                " (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+        if self.max_bytes is not None:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if total > self.max_bytes:
+                evict = []
+                for key, size in self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed_at"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", evict)
+
+    def delete(self, key: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM entries")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+
+class TieredCache:
+    """An in-process LRU in front of an optional persistent SQLite store.
+
+    Hits in the persistent store are promoted into memory.
+    """
+
+    def __init__(self, memory: CacheBackend, disk: CacheBackend | None = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> str | None:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+from collections.abc import Sequence
+from pathlib import Path
 
 from anthropic import AsyncAnthropic
 
-from .cost import calculate_cost
+from .cache import DEFAULT_CACHE_DIR, CacheStats, MemoryCache, SQLiteCache, TieredCache
+from .cost import calculate_cost, combine_costs, zero_cost
 from .models import (
     ClassificationResult,
     CostRecord,
@@ -14,27 +19,123 @@ from .models import (
     TaskCategory,
     TokenUsage,
 )
-from .prompts import CLASSIFIER_PROMPT
+from .prompts import CLASSIFIER_BATCH_PROMPT, CLASSIFIER_PROMPT
 
 CLASSIFIER_MODEL = "claude-haiku-4-5-20251001"
 
+CLASSIFICATION_CACHE_TTL = 7 * 24 * 3600
 
-async def classify_task(
-    client: AsyncAnthropic, task: str
-) -> tuple[ClassificationResult, CostRecord]:
-    """Classify a task's complexity using Haiku with structured output.
+# Tasks packed into one classifier request by classify_tasks.
+CLASSIFY_BATCH_SIZE = 20
+# Output budget per task in a batched request.
+BATCH_OUTPUT_TOKENS_PER_TASK = 256
+
+CLASSIFY_TOOL_NAME = "record_classifications"
+# Forced tool whose input schema mirrors ClassificationResult, plus the task index.
+CLASSIFY_TOOL = {
+    "name": CLASSIFY_TOOL_NAME,
+    "description": "Record the classification of every task.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "classifications": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer", "minimum": 0},
+                        "level": {"type": "string", "enum": [l.value for l in LadderLevel]},
+                        "category": {"type": "string", "enum": [c.value for c in TaskCategory]},
+                        "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                        "reasoning": {"type": "string"},
+                        "estimated_complexity": {"type": "integer", "minimum": 1, "maximum": 10},
+                    },
+                    "required": [
+                        "index",
+                        "level",
+                        "category",
+                        "confidence",
+                        "reasoning",
+                        "estimated_complexity",
+                    ],
+                },
+            }
+        },
+        "required": ["classifications"],
+    },
+}
+
+
+def classifier_fingerprint(model: str = CLASSIFIER_MODEL) -> str:
+    """Hash of everything that shapes a classification: the model that made it,
+    both prompts and the batch tool schema, so cached results track them all."""
+    schema = json.dumps(CLASSIFY_TOOL, sort_keys=True)
+    parts = (model, CLASSIFIER_PROMPT, CLASSIFIER_BATCH_PROMPT, schema)
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
 
-    Returns the classification result and its associated cost record.
+
+class ClassificationCache:
+    """Caches classifications keyed on normalized task text and classifier config.
+
+    Keys include ``classifier_fingerprint(model)``, so a fallback model's
+    results are kept apart, and changing a prompt or the tool schema
+    invalidates every earlier entry; stale rows age out via TTL/size eviction.
     """
-    response = await client.messages.create(
-        model=CLASSIFIER_MODEL,
-        max_tokens=1024,
-        system=CLASSIFIER_PROMPT,
-        messages=[{"role": "user", "content": task}],
-        headers={"anthropic-beta": "output-128k-2025-02-19"},
-    )
 
-    text = response.content[0].text
+    def __init__(self, store: TieredCache) -> None:
+        self.store = store
+
+    @classmethod
+    def open(
+        cls,
+        path: str | Path | None = None,
+        max_entries: int = 100_000,
+        ttl: float | None = CLASSIFICATION_CACHE_TTL,
+    ) -> ClassificationCache:
+        """Open a memory + SQLite cache, by default under the user cache dir."""
+        path = path or DEFAULT_CACHE_DIR / "classifications.sqlite3"
+        return cls(
+            TieredCache(
+                MemoryCache(max_entries=min(max_entries, 4096), ttl=ttl),
+                SQLiteCache(path, max_entries=max_entries, ttl=ttl),
+            )
+        )
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.store.stats
+
+    @staticmethod
+    def key(task: str, model: str = CLASSIFIER_MODEL) -> str:
+        normalized = " ".join(task.split()).casefold()
+        digest = hashlib.sha256(normalized.encode()).hexdigest()
+        return f"{classifier_fingerprint(model)}:{digest}"
+
+    def get(self, task: str, model: str = CLASSIFIER_MODEL) -> ClassificationResult | None:
+        value = self.store.get(self.key(task, model))
+        if value is None:
+            return None
+        return ClassificationResult.model_validate_json(value).model_copy(update={"cached": True})
+
+    def put(
+        self, task: str, classification: ClassificationResult, model: str = CLASSIFIER_MODEL
+    ) -> None:
+        value = classification.model_dump_json(exclude={"cached"})
+        self.store.set(self.key(task, model), value)
+
+
+def classifier_request(task: str, model: str = CLASSIFIER_MODEL) -> dict:
+    """Messages API parameters for classifying a task."""
+    return {
+        "model": model,
+        "max_tokens": 1024,
+        "system": CLASSIFIER_PROMPT,
+        "messages": [{"role": "user", "content": task}],
+    }
+
+
+def parse_classification(text: str) -> ClassificationResult:
+    """Parse the classifier's JSON reply into a ClassificationResult."""
     # Parse the JSON from the response, handling possible markdown fencing
     cleaned = text.strip()
     if cleaned.startswith("```"):
@@ -45,7 +146,7 @@ async def classify_task(
 
     data = json.loads(cleaned)
 
-    classification = ClassificationResult(
+    return ClassificationResult(
         level=LadderLevel(data["level"]),
         category=TaskCategory(data["category"]),
         confidence=float(data["confidence"]),
@@ -53,10 +154,169 @@ async def classify_task(
         estimated_complexity=int(data["estimated_complexity"]),
     )
 
-    usage = TokenUsage(
-        input_tokens=response.usage.input_tokens,
-        output_tokens=response.usage.output_tokens,
+
+async def classify_task(
+    client: AsyncAnthropic,
+    task: str,
+    cache: ClassificationCache | None = None,
+    model: str = CLASSIFIER_MODEL,
+) -> tuple[ClassificationResult, CostRecord]:
+    """Classify a task's complexity using Haiku with structured output.
+
+    Returns the classification result and its associated cost record. With a
+    cache, a hit skips the API call, is marked ``cached`` and carries a
+    zero-cost record. ``model``
+    overrides the classifier model, e.g. with a fallback of the same tier.
+    """
+    if cache is not None:
+        cached = cache.get(task, model)
+        if cached is not None:
+            return cached, zero_cost(LadderLevel.intern, "Classification (cached)")
+
+    response = await client.messages.create(
+        **classifier_request(task, model),
+        headers={"anthropic-beta": "output-128k-2025-02-19"},
     )
-    cost = calculate_cost(LadderLevel.intern, usage, description="Classification")
+
+    classification = parse_classification(response.content[0].text)
+
+    usage = TokenUsage.from_api(response.usage)
+    cost = calculate_cost(LadderLevel.intern, usage, "Classification", model_id=model)
+
+    if cache is not None:
+        cache.put(task, classification, model)
 
     return classification, cost
+
+
+def batch_classifier_request(tasks: Sequence[str], model: str = CLASSIFIER_MODEL) -> dict:
+    """Messages API parameters for classifying several tasks with one forced tool call."""
+    content = "\n\n".join(
+        f'<task index="{i}">\n{task}\n</task>' for i, task in enumerate(tasks)
+    )
+    return {
+        "model": model,
+        "max_tokens": BATCH_OUTPUT_TOKENS_PER_TASK * len(tasks),
+        "system": [
+            {"type": "text", "text": CLASSIFIER_PROMPT},
+            {"type": "text", "text": CLASSIFIER_BATCH_PROMPT},
+        ],
+        "tools": [CLASSIFY_TOOL],
+        "tool_choice": {"type": "tool", "name": CLASSIFY_TOOL_NAME},
+        "messages": [{"role": "user", "content": content}],
+    }
+
+
+def parse_batch_classifications(
+    message: object, num_tasks: int
+) -> dict[int, ClassificationResult]:
+    """Valid classifications by task index from a batched reply; invalid entries are dropped."""
+    results: dict[int, ClassificationResult] = {}
+    for block in message.content:
+        if block.type != "tool_use" or block.name != CLASSIFY_TOOL_NAME:
+            continue
+        entries = block.input.get("classifications") if isinstance(block.input, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                index = int(entry["index"])
+                result = ClassificationResult.model_validate(
+                    {k: v for k, v in entry.items() if k != "index"}
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < num_tasks:
+                results.setdefault(index, result)
+    return results
+
+
+def _apportion(total: int, weights: Sequence[float]) -> list[int]:
+    """Split ``total`` in proportion to ``weights`` into integers that sum to it."""
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        weights, weight_sum = [1.0] * len(weights), float(len(weights))
+    exact = [total * w / weight_sum for w in weights]
+    parts = [int(x) for x in exact]
+    by_remainder = sorted(range(len(exact)), key=lambda i: parts[i] - exact[i])
+    for i in by_remainder[: total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+def split_usage(
+    usage: TokenUsage, input_weights: Sequence[float], output_weights: Sequence[float]
+) -> list[TokenUsage]:
+    """Split a shared call's usage: input tokens by ``input_weights``, output by ``output_weights``."""
+    columns = [
+        _apportion(usage.input_tokens, input_weights),
+        _apportion(usage.output_tokens, output_weights),
+        _apportion(usage.cache_creation_input_tokens, input_weights),
+        _apportion(usage.cache_read_input_tokens, input_weights),
+    ]
+    return [
+        TokenUsage(
+            input_tokens=inp,
+            output_tokens=out,
+            cache_creation_input_tokens=write,
+            cache_read_input_tokens=read,
+        )
+        for inp, out, write, read in zip(*columns)
+    ]
+
+
+async def classify_tasks(
+    client: AsyncAnthropic,
+    tasks: Sequence[str],
+    cache: ClassificationCache | None = None,
+    model: str = CLASSIFIER_MODEL,
+    batch_size: int = CLASSIFY_BATCH_SIZE,
+) -> list[tuple[ClassificationResult, CostRecord]]:
+    """Classify many tasks, packing up to ``batch_size`` of them into each Haiku call.
+
+    Returns one result and cost record per task, in order. Each task is
+    charged its share of its call: input tokens in proportion to its length,
+    output tokens to the length of its classification. Cache hits cost
+    nothing. A task the reply leaves out or gets wrong is classified on its
+    own with ``classify_task``, and that call is added to its cost.
+    """
+    results: list[tuple[ClassificationResult, CostRecord] | None] = [None] * len(tasks)
+    misses = []
+    for i, task in enumerate(tasks):
+        cached = cache.get(task, model) if cache is not None else None
+        if cached is not None:
+            results[i] = cached, zero_cost(LadderLevel.intern, "Classification (cached)")
+        else:
+            misses.append(i)
+
+    async def classify_chunk(chunk: list[int]) -> None:
+        batch = [tasks[i] for i in chunk]
+        if len(batch) == 1:
+            results[chunk[0]] = await classify_task(client, batch[0], cache, model)
+            return
+        message = await client.messages.create(**batch_classifier_request(batch, model))
+        parsed = parse_batch_classifications(message, len(batch))
+        shares = split_usage(
+            TokenUsage.from_api(message.usage),
+            [len(task) for task in batch],
+            [len(parsed[j].model_dump_json()) if j in parsed else 0 for j in range(len(batch))],
+        )
+        missing = [j for j in range(len(batch)) if j not in parsed]
+        retried = await asyncio.gather(
+            *(classify_task(client, batch[j], cache, model) for j in missing)
+        )
+        retried_by_index = dict(zip(missing, retried))
+        description = f"Classification (batch of {len(batch)})"
+        for j, i in enumerate(chunk):
+            share = calculate_cost(LadderLevel.intern, shares[j], description, model_id=model)
+            if j in parsed:
+                results[i] = parsed[j], share
+                if cache is not None:
+                    cache.put(batch[j], parsed[j], model)
+            else:
+                classification, cost = retried_by_index[j]
+                results[i] = classification, combine_costs(
+                    [share, cost], f"Classification (batch of {len(batch)}, retried alone)"
+                )
+
+    chunks = [misses[start : start + batch_size] for start in range(0, len(misses), batch_size)]
+    await asyncio.gather(*(classify_chunk(chunk) for chunk in chunks))
+    return results
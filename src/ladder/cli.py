@@ -3,13 +3,29 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
 
-from .cost import format_cost_summary
-from .levels import LEVEL_CONFIGS
-from .orchestrator import Orchestrator
+# Only light modules load here; each command imports the heavy ones it needs
+# (the Anthropic SDK, httpx, pydantic models), so `ladder levels` stays fast.
+from .client import DEFAULT_HOST, DEFAULT_PORT, RemoteError, run_remote
+from .enums import ContextPolicy
+from .ledger import DEFAULT_LEDGER_PATH, CostLedger, format_spend_table
+from .levels import DEFAULT_BATCH_CONCURRENCY, LEVEL_CONFIGS
+from .task_queue import MAX_ATTEMPTS, PRIORITIES, VISIBILITY_TIMEOUT_S
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+    from .bulk import BulkJob
+    from .orchestrator import Orchestrator
+    from .sink import SinkSummary
 
 
 @click.group()
@@ -17,11 +33,164 @@ def main() -> None:
     """Ladder: Software engineering agent harness for cost-optimized LLM routing."""
 
 
+def _routing_options(f):
+    """Options shared by commands that build an Orchestrator."""
+    f = click.option(
+        "--no-local",
+        is_flag=True,
+        help="Always classify with Haiku, even once a local model is trained",
+    )(f)
+    f = click.option("--no-cache", is_flag=True, help="Bypass the classification cache")(f)
+    f = click.option("--no-ledger", is_flag=True, help="Do not record costs in the ledger")(f)
+    f = click.option(
+        "--span-log", type=click.Path(), help="Append per-phase timing spans to a JSONL file"
+    )(f)
+    f = click.option(
+        "--result-cache", is_flag=True, help="Reuse stored results for exact repeat tasks"
+    )(f)
+    f = click.option(
+        "--speculative",
+        is_flag=True,
+        help="Race adjacent levels on low-confidence tasks (faster, costs more)",
+    )(f)
+    f = click.option(
+        "--fan-out",
+        is_flag=True,
+        help="Split staff+ tasks into subtasks run in parallel at cheaper levels, then merge",
+    )(f)
+    f = click.option(
+        "--select-context",
+        is_flag=True,
+        help="Send each level only the context chunks most relevant to the task",
+    )(f)
+    f = click.option(
+        "--repo",
+        type=click.Path(exists=True, file_okay=False),
+        help="Index this repository and add its most relevant chunks (implies --select-context)",
+    )(f)
+    f = click.option(
+        "--context-policy",
+        type=click.Choice([p.value for p in ContextPolicy]),
+        default=ContextPolicy.reject.value,
+        show_default=True,
+        help="What to do with context too large for the starting level",
+    )(f)
+    f = click.option(
+        "--count-tokens-api",
+        is_flag=True,
+        help="Count input tokens with the API instead of estimating locally",
+    )(f)
+    f = click.option(
+        "--max-cost", type=float, help="Reject tasks whose estimated first attempt costs more (USD)"
+    )(f)
+    f = click.option(
+        "--max-usd-per-hour", type=float, help="Hold API calls once spend nears this hourly cap"
+    )(f)
+    f = click.option(
+        "--max-retries",
+        default=3,
+        show_default=True,
+        help="Retries per call on transient errors, moving to fallback models",
+    )(f)
+    f = click.option(
+        "--hedge-quantile",
+        type=click.FloatRange(0.5, 0.99),
+        help="Duplicate calls slower than this quantile of recent latency (e.g. 0.95)",
+    )(f)
+    f = click.option(
+        "--no-calibration",
+        is_flag=True,
+        help="Always start at the classified level, ignoring past escalations",
+    )(f)
+    return f
+
+
+def _build_orchestrator(
+    no_cache: bool = False,
+    no_local: bool = False,
+    speculative: bool = False,
+    fan_out: bool = False,
+    result_cache: bool = False,
+    span_log: str | None = None,
+    select_context: bool = False,
+    repo: str | None = None,
+    context_policy: str = ContextPolicy.reject.value,
+    count_tokens_api: bool = False,
+    max_cost: float | None = None,
+    no_ledger: bool = False,
+    max_usd_per_hour: float | None = None,
+    max_retries: int = 3,
+    hedge_quantile: float | None = None,
+    no_calibration: bool = False,
+    client: AsyncAnthropic | None = None,
+) -> Orchestrator:
+    """Build an Orchestrator from the shared routing options."""
+    from anthropic import AsyncAnthropic
+
+    from .classifier import ClassificationCache
+    from .context_index import ContextSelector
+    from .local_classifier import LocalClassifier
+    from .orchestrator import Orchestrator
+    from .output_budget import OutputBudget
+    from .preflight import Preflight, TokenCounter
+    from .resilience import CLIENT_MAX_RETRIES, HedgePolicy, Resilience, RetryPolicy
+    from .result_cache import ResultCache
+    from .routing import RoutingStats
+    from .scheduler import Scheduler
+    from .telemetry import JsonlSpanExporter
+
+    client = client or AsyncAnthropic(max_retries=CLIENT_MAX_RETRIES)
+    exporters = [JsonlSpanExporter(span_log)] if span_log else []
+    if not no_ledger:
+        exporters.append(CostLedger())
+    return Orchestrator(
+        client=client,
+        classification_cache=None if no_cache else ClassificationCache.open(),
+        local_classifier=None if no_local else LocalClassifier.load(),
+        speculative=speculative,
+        fan_out=fan_out,
+        result_cache=ResultCache.sqlite() if result_cache else None,
+        exporters=exporters,
+        preflight=Preflight(
+            client,
+            TokenCounter(client, use_api=count_tokens_api),
+            policy=ContextPolicy(context_policy),
+            max_cost_usd=max_cost,
+        ),
+        output_budget=OutputBudget.load(),
+        scheduler=Scheduler(max_usd_per_hour=max_usd_per_hour),
+        resilience=Resilience(
+            RetryPolicy(max_retries=max_retries),
+            HedgePolicy(quantile=hedge_quantile) if hedge_quantile is not None else None,
+        ),
+        routing=None if no_calibration else RoutingStats.load(),
+        context_selector=ContextSelector(repo) if select_context or repo else None,
+    )
+
+
 @main.command()
 @click.argument("task", required=False)
 @click.option("-v", "--verbose", is_flag=True, help="Show classification and cost details")
 @click.option("-f", "--file", "task_file", type=click.Path(exists=True), help="Read task from file")
-def run(task: str | None, verbose: bool, task_file: str | None) -> None:
+@click.option(
+    "--server",
+    envvar="LADDER_SERVER",
+    help="Forward the task to a running `ladder serve` at this URL (routing options are ignored)",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Print the answer as it is generated; escalation markers and -v details go to stderr",
+)
+@_routing_options
+def run(
+    task: str | None,
+    verbose: bool,
+    task_file: str | None,
+    server: str | None,
+    stream: bool,
+    **routing,
+) -> None:
     """Submit a task to the ladder harness."""
     if task_file:
         with open(task_file) as f:
@@ -32,33 +201,841 @@ def run(task: str | None, verbose: bool, task_file: str | None) -> None:
         click.echo("Error: Provide a task as an argument or via -f/--file.", err=True)
         sys.exit(1)
 
-    result = asyncio.run(_run_task(task_text, verbose))
+    if server:
+        if stream:
+            click.echo("Error: --stream cannot be used with --server.", err=True)
+            sys.exit(1)
+        try:
+            result = run_remote(server, task_text)
+        except RemoteError as exc:
+            retry = f"; retry in {exc.retry_after:.0f}s" if exc.retry_after else ""
+            click.echo(f"Error ({exc.status}): {exc}{retry}", err=True)
+            sys.exit(1)
+    else:
+        from .preflight import PreflightError
+        from .scheduler import BackpressureError
 
-    if verbose:
-        click.echo(f"\nClassification:")
-        click.echo(f"  Level: {result.classification.level.value}")
-        click.echo(f"  Category: {result.classification.category.value}")
-        click.echo(f"  Confidence: {result.classification.confidence:.2f}")
-        click.echo(f"  Complexity: {result.classification.estimated_complexity}/10")
-        click.echo(f"  Reasoning: {result.classification.reasoning}")
-        click.echo(f"\nRouting:")
-        click.echo(f"  Initial level: {result.initial_level.value}")
-        click.echo(f"  Final level: {result.final_level.value}")
-        if result.escalations:
-            click.echo(f"  Escalations: {', '.join(e.value for e in result.escalations)}")
-        click.echo()
+        try:
+            if stream:
+                result = asyncio.run(_stream_task(task_text, verbose, **routing))
+            else:
+                result = asyncio.run(_run_task(task_text, verbose, **routing))
+        except PreflightError as exc:
+            click.echo(f"Error: {exc}", err=True)
+            sys.exit(1)
+        except BackpressureError as exc:
+            click.echo(f"Error: {exc}; retry in {exc.retry_after:.0f}s", err=True)
+            sys.exit(1)
 
-    click.echo(result.response)
+    if stream:
+        # End the streamed answer's last line.
+        click.echo()
+    else:
+        if verbose:
+            _echo_classification(result.classification)
+            _echo_routing(result)
+            _echo_preflight(result.preflight)
+            click.echo()
+        click.echo(result.response)
 
     if verbose:
-        click.echo()
-        click.echo(format_cost_summary(result.costs))
+        from .cost import format_cost_summary
+        from .telemetry import format_timing_summary
+
+        if stream:
+            _echo_routing(result, err=True)
+        click.echo(err=stream)
+        click.echo(format_cost_summary(result.costs), err=stream)
+        click.echo(err=stream)
+        click.echo(format_timing_summary(result.spans), err=stream)
+
 
+def _echo_classification(classification, err: bool = False) -> None:
+    click.echo(f"\nClassification:", err=err)
+    click.echo(f"  Level: {classification.level.value}", err=err)
+    click.echo(f"  Category: {classification.category.value}", err=err)
+    click.echo(f"  Confidence: {classification.confidence:.2f}", err=err)
+    click.echo(f"  Complexity: {classification.estimated_complexity}/10", err=err)
+    click.echo(f"  Reasoning: {classification.reasoning}", err=err)
 
-async def _run_task(task: str, verbose: bool) -> object:
+
+def _echo_routing(result, err: bool = False) -> None:
+    click.echo(f"\nRouting:", err=err)
+    click.echo(f"  Initial level: {result.initial_level.value}", err=err)
+    click.echo(f"  Final level: {result.final_level.value}", err=err)
+    if result.escalations:
+        click.echo(f"  Escalations: {', '.join(e.value for e in result.escalations)}", err=err)
+    if result.truncated:
+        click.echo("  Truncated: the answer was still cut off at max_tokens", err=err)
+    if result.subtasks:
+        click.echo(f"\nSubtasks:", err=err)
+        for i, sub in enumerate(result.subtasks, 1):
+            click.echo(
+                f"  {i}. {sub.final_level.value:<10} ${sub.total_cost_usd:.6f}  "
+                f"{sub.task.splitlines()[0][:60]}",
+                err=err,
+            )
+
+
+def _echo_preflight(estimate, err: bool = False) -> None:
+    if estimate is None:
+        return
+    click.echo(f"\nPreflight:", err=err)
+    click.echo(f"  Input tokens: {estimate.input_tokens:,}", err=err)
+    click.echo(f"  Estimated cost: ${estimate.estimated_cost_usd:.6f}", err=err)
+    if estimate.skipped_levels:
+        click.echo(f"  Skipped: {', '.join(l.value for l in estimate.skipped_levels)}", err=err)
+    if estimate.context_action != "none":
+        click.echo(f"  Context: {estimate.context_action}", err=err)
+
+
+async def _run_task(task: str, verbose: bool, **routing) -> object:
     """Run a task through the orchestrator."""
-    orchestrator = Orchestrator()
-    return await orchestrator.run(task)
+    orchestrator = _build_orchestrator(**routing)
+    try:
+        return await orchestrator.run(task)
+    finally:
+        await _close_orchestrator(orchestrator)
+
+
+async def _stream_task(task: str, verbose: bool, **routing) -> object:
+    """Run a task, writing answer tokens to stdout and markers and phase details to stderr."""
+    from .enums import EscalationReason, EventType
+
+    orchestrator = _build_orchestrator(**routing)
+    result = None
+    try:
+        async for event in orchestrator.stream(task):
+            if event.type == EventType.token:
+                sys.stdout.write(event.text)
+                sys.stdout.flush()
+            elif event.type == EventType.restart:
+                click.echo(f"\n[{event.level.value}: call failed, answer restarts]", err=True)
+            elif event.type == EventType.escalated:
+                if event.reason == EscalationReason.self_escalation or verbose:
+                    target = event.to_level.value if event.to_level else "no higher level"
+                    note = f": {event.text}" if event.text else ""
+                    click.echo(
+                        f"[{event.level.value} -> {target} ({event.reason.value}){note}]", err=True
+                    )
+            elif event.type == EventType.result:
+                result = event.result
+            elif not verbose:
+                continue
+            elif event.type == EventType.classified:
+                _echo_classification(event.classification, err=True)
+            elif event.type == EventType.preflight:
+                _echo_preflight(event.preflight, err=True)
+                click.echo(err=True)
+            elif event.type == EventType.plan:
+                click.echo(f"[{event.level.value} plan: {len(event.subtasks)} subtasks]", err=True)
+            elif event.type == EventType.subtask:
+                sub = event.result
+                click.echo(
+                    f"[subtask done at {sub.final_level.value}, ${sub.total_cost_usd:.6f}: "
+                    f"{event.text}]",
+                    err=True,
+                )
+            elif event.type == EventType.attempt:
+                cost = sum(c.cost_usd for c in event.costs)
+                wall = f", {event.span.wall_s:.2f}s" if event.span is not None else ""
+                click.echo(f"\n[{event.level.value} attempt: ${cost:.6f}{wall}]", err=True)
+    finally:
+        await _close_orchestrator(orchestrator)
+    return result
+
+
+async def _close_orchestrator(orchestrator: Orchestrator) -> None:
+    """Persist learned output budgets and routing statistics, and flush the cost ledger."""
+    orchestrator.output_budget.save()
+    if orchestrator.routing is not None:
+        orchestrator.routing.save()
+    if orchestrator.context_selector is not None:
+        orchestrator.context_selector.close()
+    for exporter in orchestrator.exporters:
+        if isinstance(exporter, CostLedger):
+            await exporter.aclose()
+
+
+@main.command("run-batch")
+@click.argument("tasks_file", type=click.Path(exists=True))
+@click.option(
+    "-c",
+    "--concurrency",
+    default=DEFAULT_BATCH_CONCURRENCY,
+    show_default=True,
+    help="Maximum number of tasks in flight",
+)
+@click.option(
+    "-o", "--output", type=click.Path(), help="Write outcomes to a JSONL file (.gz to compress)"
+)
+@click.option("--resume", is_flag=True, help="Append to --output, skipping tasks it already has")
+@click.option(
+    "--blob-threshold",
+    type=int,
+    help="Store responses longer than this many characters in files beside --output "
+    "[default: 16384]",
+)
+@_routing_options
+def run_batch(
+    tasks_file: str,
+    concurrency: int,
+    output: str | None,
+    resume: bool,
+    blob_threshold: int | None,
+    **routing,
+) -> None:
+    """Run every task in a JSONL file, one outcome per line in completion order.
+
+    Each input line is a JSON object with a "task" and optional "context" and "id".
+    With -o, each outcome is flushed as soon as it finishes and noted in an index
+    beside the output, which --resume uses to skip tasks that already succeeded.
+    Tasks without an id are then identified by their line number (from 0).
+    A malformed line stops the batch once the tasks in flight finish; fix it
+    and rerun with --resume to carry on.
+    """
+    if resume and not output:
+        click.echo("Error: --resume needs -o/--output.", err=True)
+        sys.exit(1)
+    summary = asyncio.run(
+        _run_batch(tasks_file, concurrency, output, resume, blob_threshold, **routing)
+    )
+    click.echo(
+        f"{summary.succeeded} succeeded, {summary.failed} failed, "
+        f"{summary.escalated_tasks} escalated, total cost ${summary.total_cost_usd:.6f}",
+        err=True,
+    )
+    if summary.failed:
+        sys.exit(1)
+
+
+def _read_batch_tasks(path: str, number: bool = False):
+    """Yield batch tasks from a JSONL file, skipping blank lines.
+
+    With ``number``, a task without an id gets its line number as one. A line
+    that is not a valid task raises a ClickException naming it.
+    """
+    from .models import BatchTask
+
+    with open(path) as f:
+        for line_number, line in enumerate(f):
+            if line.strip():
+                try:
+                    task = BatchTask.model_validate(json.loads(line))
+                except ValueError as exc:
+                    raise click.ClickException(f"{path}:{line_number + 1}: {exc}") from exc
+                if number and task.id is None:
+                    task.id = str(line_number)
+                yield task
+
+
+async def _run_batch(
+    tasks_file: str,
+    concurrency: int,
+    output: str | None,
+    resume: bool = False,
+    blob_threshold: int | None = None,
+    **routing,
+) -> SinkSummary:
+    """Run a batch through the orchestrator, streaming outcomes to a sink or stdout."""
+    from .sink import DEFAULT_BLOB_THRESHOLD, ResultSink, SinkSummary, index_entry
+
+    sink = None
+    if output:
+        threshold = DEFAULT_BLOB_THRESHOLD if blob_threshold is None else blob_threshold
+        sink = ResultSink(output, resume, threshold)
+    summary = sink.summary if sink is not None else SinkSummary()
+    tasks = _read_batch_tasks(tasks_file, number=sink is not None)
+    if resume and sink is not None:
+        click.echo(f"Resuming after {summary.succeeded} finished tasks", err=True)
+        tasks = (task for task in tasks if not sink.done(task.id))
+
+    orchestrator = _build_orchestrator(**routing)
+    cache = orchestrator.classification_cache
+    try:
+        async for outcome in orchestrator.run_many(tasks, concurrency):
+            if sink is not None:
+                sink.write(outcome)
+            else:
+                sys.stdout.write(outcome.model_dump_json() + "\n")
+                sys.stdout.flush()
+                summary.add(index_entry(outcome))
+    finally:
+        await _close_orchestrator(orchestrator)
+        if sink is not None:
+            sink.close()
+    if cache is not None:
+        click.echo(
+            f"Classification cache: {cache.stats.hits} hits, {cache.stats.misses} misses",
+            err=True,
+        )
+    return summary
+
+
+@main.command()
+@click.argument("task", required=False)
+@click.option("-f", "--file", "task_file", type=click.Path(exists=True), help="Read task from file")
+@click.option(
+    "--jsonl",
+    "tasks_file",
+    type=click.Path(exists=True),
+    help='Enqueue every task in a JSONL file ("task", optional "context" and "id")',
+)
+@click.option(
+    "--priority",
+    type=click.Choice(list(PRIORITIES)),
+    default="batch",
+    show_default=True,
+    help="Interactive tasks are leased and admitted before batch ones",
+)
+@click.option(
+    "--queue",
+    "queue_path",
+    type=click.Path(),
+    help="Queue file [default: queue.sqlite3 in the cache dir]",
+)
+def enqueue(
+    task: str | None,
+    task_file: str | None,
+    tasks_file: str | None,
+    priority: str,
+    queue_path: str | None,
+) -> None:
+    """Add tasks to the queue served by `ladder worker`, printing their queue ids.
+
+    Returns as soon as the tasks are stored; collect results with `ladder queue --results`.
+    """
+    from .task_queue import DEFAULT_QUEUE_PATH, TaskQueue
+
+    if tasks_file:
+        items = [(t.task, t.context, t.id) for t in _read_batch_tasks(tasks_file)]
+    elif task_file:
+        with open(task_file) as f:
+            items = [(f.read().strip(), "", None)]
+    elif task:
+        items = [(task, "", None)]
+    else:
+        click.echo("Error: Provide a task as an argument, via -f/--file or --jsonl.", err=True)
+        sys.exit(1)
+
+    queue = TaskQueue(queue_path or DEFAULT_QUEUE_PATH)
+    try:
+        ids = queue.enqueue(items, PRIORITIES[priority])
+    finally:
+        queue.close()
+    click.echo("\n".join(str(i) for i in ids))
+
+
+@main.command()
+@click.option(
+    "-c",
+    "--consumers",
+    default=DEFAULT_BATCH_CONCURRENCY,
+    show_default=True,
+    help="Tasks run at once per process, on one shared orchestrator",
+)
+@click.option("-p", "--processes", default=1, show_default=True, help="Worker processes")
+@click.option(
+    "--visibility-timeout",
+    default=VISIBILITY_TIMEOUT_S,
+    show_default=True,
+    help="Seconds before the task of a worker that stopped heartbeating is handed out again",
+)
+@click.option(
+    "--max-attempts",
+    default=MAX_ATTEMPTS,
+    show_default=True,
+    help="Leases per task before it fails",
+)
+@click.option("--exit-when-empty", is_flag=True, help="Exit once no task is queued or running")
+@click.option(
+    "--queue",
+    "queue_path",
+    type=click.Path(),
+    help="Queue file [default: queue.sqlite3 in the cache dir]",
+)
+@_routing_options
+def worker(
+    consumers: int,
+    processes: int,
+    visibility_timeout: float,
+    max_attempts: int,
+    exit_when_empty: bool,
+    queue_path: str | None,
+    **routing,
+) -> None:
+    """Run queued tasks until interrupted, writing each result back to the queue.
+
+    A task whose worker dies is run again once its lease expires, so every task
+    runs at least once. Each process has its own client and scheduler;
+    --max-usd-per-hour is split between them. SIGINT or SIGTERM stops taking
+    tasks and lets the running ones finish, in every process.
+    """
+    import multiprocessing
+
+    from .task_queue import DEFAULT_QUEUE_PATH
+
+    if routing.get("max_usd_per_hour") is not None:
+        routing["max_usd_per_hour"] /= processes
+    args = (
+        str(queue_path or DEFAULT_QUEUE_PATH),
+        consumers,
+        visibility_timeout,
+        max_attempts,
+        exit_when_empty,
+        routing,
+    )
+    context = multiprocessing.get_context("spawn")
+    children = [context.Process(target=_worker_process, args=args) for _ in range(processes - 1)]
+    for child in children:
+        child.start()
+
+    def stop_children() -> None:
+        # A signal sent to this process alone would otherwise leave them running;
+        # SIGTERM lets each finish its tasks in flight.
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+
+    try:
+        _worker_process(*args, on_stop=stop_children)
+    finally:
+        stop_children()
+        for child in children:
+            child.join()
+
+
+def _worker_process(
+    queue_path: str,
+    consumers: int,
+    visibility_timeout: float,
+    max_attempts: int,
+    exit_when_empty: bool,
+    routing: dict,
+    on_stop: Callable[[], None] | None = None,
+) -> None:
+    stats = asyncio.run(
+        _work(
+            queue_path,
+            consumers,
+            visibility_timeout,
+            max_attempts,
+            exit_when_empty,
+            on_stop,
+            **routing,
+        )
+    )
+    click.echo(
+        f"Worker {stats['owner']}: {stats['completed']} completed, {stats['failed']} failed, "
+        f"{stats['retried']} retried, {stats['released']} released",
+        err=True,
+    )
+
+
+async def _work(
+    queue_path: str,
+    consumers: int,
+    visibility_timeout: float,
+    max_attempts: int,
+    exit_when_empty: bool,
+    on_stop: Callable[[], None] | None = None,
+    **routing,
+) -> dict:
+    """Run one worker process's consumers until stopped or, optionally, the queue is drained.
+
+    ``on_stop`` is also called when a signal stops the worker.
+    """
+    import signal
+
+    from .task_queue import TaskQueue
+    from .worker import Worker
+
+    queue = TaskQueue(queue_path, max_attempts)
+    orchestrator = _build_orchestrator(**routing)
+    worker = Worker(queue, orchestrator, consumers, visibility_timeout)
+    loop = asyncio.get_running_loop()
+
+    def stop() -> None:
+        worker.stop()
+        if on_stop is not None:
+            on_stop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+    try:
+        stats = await worker.run(exit_when_empty)
+    finally:
+        await _close_orchestrator(orchestrator)
+        queue.close()
+    return {"owner": worker.owner, **stats.to_dict()}
+
+
+@main.command()
+@click.option("--results", is_flag=True, help="Print finished tasks as JSONL instead of counts")
+@click.option(
+    "--after", default=0, show_default=True, help="With --results, only queue ids above this"
+)
+@click.option(
+    "--queue",
+    "queue_path",
+    type=click.Path(),
+    help="Queue file [default: queue.sqlite3 in the cache dir]",
+)
+def queue(results: bool, after: int, queue_path: str | None) -> None:
+    """Show how many queued tasks are waiting, running, done and failed, or their results."""
+    from .task_queue import DEFAULT_QUEUE_PATH, TaskQueue
+
+    task_queue = TaskQueue(queue_path or DEFAULT_QUEUE_PATH)
+    try:
+        if not results:
+            click.echo(" ".join(f"{n} {status}" for status, n in task_queue.counts().items()))
+            return
+        while finished := task_queue.finished(after):
+            for item in finished:
+                record = {
+                    "queue_id": item.id,
+                    "id": item.task_id,
+                    "status": item.status,
+                    "attempts": item.attempts,
+                    "result": json.loads(item.result) if item.result else None,
+                    "error": item.error,
+                }
+                sys.stdout.write(json.dumps(record) + "\n")
+            after = finished[-1].id
+    finally:
+        task_queue.close()
+
+
+@main.command()
+@click.argument("repo", default=".", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--index-dir",
+    type=click.Path(file_okay=False),
+    help="Where indexes are kept [default: index/ in the cache dir]",
+)
+def index(repo: str, index_dir: str | None) -> None:
+    """Build or update the on-disk search index of a repository used by --repo."""
+    from .context_index import DEFAULT_INDEX_DIR, ContextIndex
+
+    repo_index = ContextIndex.for_repo(repo, index_dir or DEFAULT_INDEX_DIR)
+    try:
+        update = repo_index.update_repo(repo)
+        stats = repo_index.stats()
+    finally:
+        repo_index.close()
+    click.echo(
+        f"Indexed {stats['files']:,} files ({stats['chunks']:,} chunks) in {update.seconds:.2f}s: "
+        f"{update.added:,} added, {update.changed:,} changed, {update.removed:,} removed, "
+        f"{update.unchanged:,} unchanged"
+    )
+
+
+@main.command()
+@click.option("--host", default=DEFAULT_HOST, show_default=True)
+@click.option("--port", default=DEFAULT_PORT, show_default=True)
+@_routing_options
+def serve(host: str, port: int, **routing) -> None:
+    """Serve the harness over HTTP with one warm client (POST /run, POST /batch)."""
+    click.echo(f"Serving on http://{host}:{port}", err=True)
+    try:
+        asyncio.run(_serve(host, port, **routing))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(host: str, port: int, **routing) -> None:
+    from .server import LadderServer, warm_client
+
+    orchestrator = _build_orchestrator(client=warm_client(), **routing)
+    try:
+        await LadderServer(orchestrator, host, port).serve_forever()
+    finally:
+        await _close_orchestrator(orchestrator)
+
+
+@main.group()
+def batch() -> None:
+    """Offline bulk runs on the Message Batches API (half price, asynchronous)."""
+
+
+def _default_state_path(tasks_file: str) -> str:
+    return f"{tasks_file}.batch-state.json"
+
+
+@batch.command("submit")
+@click.argument("tasks_file", type=click.Path(exists=True))
+@click.option("--state", "state_path", type=click.Path(), help="Job state file")
+def batch_submit(tasks_file: str, state_path: str | None) -> None:
+    """Classify every task in a JSONL file through a message batch."""
+    from anthropic import AsyncAnthropic
+
+    from .bulk import BulkJob
+
+    state_path = state_path or _default_state_path(tasks_file)
+    if Path(state_path).exists():
+        job = BulkJob.load(state_path)
+        click.echo(f"Resuming existing job in {state_path}", err=True)
+    else:
+        job = BulkJob.create(state_path, _read_batch_tasks(tasks_file))
+    batch_id = asyncio.run(job.submit(AsyncAnthropic()))
+    click.echo(f"{len(job.state.tasks)} tasks, batch {batch_id}, state {state_path}")
+
+
+@batch.command("poll")
+@click.argument("state_path", type=click.Path(exists=True))
+@click.option("--wait", is_flag=True, help="Keep polling until the whole job is done")
+@click.option("--interval", default=60.0, show_default=True, help="Seconds between polls")
+def batch_poll(state_path: str, wait: bool, interval: float) -> None:
+    """Advance a job: ingest finished batches and submit follow-up rounds."""
+    from .bulk import BulkJob
+
+    job = BulkJob.load(state_path)
+    status = asyncio.run(_poll_job(job, wait, interval))
+    finished = sum(t.done for t in job.state.tasks)
+    click.echo(
+        f"Round {job.state.round}: {status}, {finished}/{len(job.state.tasks)} tasks finished"
+    )
+
+
+async def _poll_job(job: BulkJob, wait: bool, interval: float) -> str:
+    from anthropic import AsyncAnthropic
+
+    client = AsyncAnthropic()
+    while True:
+        status = await job.poll(client)
+        if status == "done" or not wait:
+            return status
+        if status != "ended":
+            await asyncio.sleep(interval)
+
+
+@batch.command("collect")
+@click.argument("state_path", type=click.Path(exists=True))
+@click.option("-o", "--output", type=click.Path(), help="Write outcomes to a JSONL file")
+def batch_collect(state_path: str, output: str | None) -> None:
+    """Write outcomes for every finished task in a job."""
+    from .bulk import BulkJob
+
+    job = BulkJob.load(state_path)
+    out = open(output, "w") if output else sys.stdout
+    total_cost = 0.0
+    try:
+        for outcome in job.outcomes():
+            out.write(outcome.model_dump_json() + "\n")
+            if outcome.ok:
+                total_cost += outcome.result.total_cost_usd
+    finally:
+        if output:
+            out.close()
+    pending = sum(not t.done for t in job.state.tasks)
+    click.echo(f"Total cost ${total_cost:.6f}; {pending} tasks still pending", err=True)
+
+
+@main.group()
+def bench() -> None:
+    """Offline benchmarks against a local fake of the Anthropic API."""
+
+
+@bench.command("run")
+@click.option("-w", "--workload", default="mixed", show_default=True, help="simple, mixed or hard")
+@click.option("-n", "--tasks", "num_tasks", default=200, show_default=True)
+@click.option("-c", "--concurrency", default=32, show_default=True)
+@click.option("--time-scale", default=0.01, show_default=True, help="Multiplier on simulated delays")
+@click.option("--escalation-rate", default=0.9, show_default=True)
+@click.option("--rate-limit-rate", default=0.0, show_default=True, help="Share of calls that 429")
+@click.option("--overload-rate", default=0.0, show_default=True, help="Share of calls that 529")
+@click.option("--context-chars", default=0, show_default=True, help="Context size per task")
+@click.option("--hedge-quantile", type=click.FloatRange(0.5, 0.99), help="Enable hedged calls")
+@click.option("--calibrate", is_flag=True, help="Learn starting levels from escalations as it runs")
+@click.option("--fan-out", is_flag=True, help="Plan staff+ tasks into parallel subtasks")
+@click.option("--seed", default=0, show_default=True)
+@click.option("-o", "--output", type=click.Path(), help="Write the JSON report to a file")
+@click.option("--baseline", type=click.Path(exists=True), help="Fail if worse than this report")
+@click.option("--tolerance", default=0.10, show_default=True, help="Allowed relative regression")
+def bench_run(
+    workload: str,
+    num_tasks: int,
+    concurrency: int,
+    time_scale: float,
+    escalation_rate: float,
+    rate_limit_rate: float,
+    overload_rate: float,
+    context_chars: int,
+    hedge_quantile: float | None,
+    calibrate: bool,
+    fan_out: bool,
+    seed: int,
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    """Run a scripted workload through the real orchestrator and report metrics."""
+    from .bench import FakeConfig, compare_reports, run_benchmark
+    from .orchestrator import Orchestrator
+    from .resilience import HedgePolicy, Resilience
+    from .routing import RoutingStats
+
+    config = FakeConfig(
+        time_scale=time_scale,
+        escalation_rate=escalation_rate,
+        rate_limit_rate=rate_limit_rate,
+        overload_rate=overload_rate,
+        seed=seed,
+    )
+    hedge = HedgePolicy(quantile=hedge_quantile) if hedge_quantile is not None else None
+    report = asyncio.run(
+        run_benchmark(
+            workload,
+            num_tasks,
+            concurrency,
+            config,
+            context_chars=context_chars,
+            make_orchestrator=lambda client: Orchestrator(
+                client,
+                resilience=Resilience(hedge=hedge),
+                routing=RoutingStats(seed=seed) if calibrate else None,
+                fan_out=fan_out,
+            ),
+        )
+    ).to_dict()
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text + "\n")
+    click.echo(text)
+
+    if baseline:
+        regressions = compare_reports(report, json.loads(Path(baseline).read_text()), tolerance)
+        for line in regressions:
+            click.echo(f"Regression: {line}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+@bench.command("imports")
+@click.option("-n", "--runs", default=5, show_default=True, help="Fresh interpreters per probe")
+@click.option("-o", "--output", type=click.Path(), help="Write the JSON report to a file")
+@click.option("--baseline", type=click.Path(exists=True), help="Fail if slower than this report")
+@click.option("--tolerance", default=0.10, show_default=True, help="Allowed relative regression")
+def bench_imports(runs: int, output: str | None, baseline: str | None, tolerance: float) -> None:
+    """Time package and CLI imports; fail if light entry points load heavy dependencies."""
+    from .bench import check_imports, measure_imports
+
+    report = measure_imports(runs=runs).to_dict()
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text + "\n")
+    click.echo(text)
+
+    problems = check_imports(
+        report, json.loads(Path(baseline).read_text()) if baseline else None, tolerance
+    )
+    for line in problems:
+        click.echo(f"Regression: {line}", err=True)
+    if problems:
+        sys.exit(1)
+
+
+@main.command()
+@click.option(
+    "--by",
+    "dimension",
+    type=click.Choice(["level", "model", "category", "day"]),
+    default="level",
+    show_default=True,
+    help="Group spend by this dimension",
+)
+@click.option("--days", type=int, help="Only include the last N days")
+@click.option(
+    "--ledger",
+    "ledger_path",
+    type=click.Path(),
+    default=str(DEFAULT_LEDGER_PATH),
+    show_default=True,
+)
+@click.option("--json", "as_json", is_flag=True, help="Print machine-readable JSON")
+def costs(dimension: str, days: int | None, ledger_path: str, as_json: bool) -> None:
+    """Show recorded spend and escalation rates from the cost ledger."""
+    if not Path(ledger_path).exists():
+        click.echo(f"No ledger at {ledger_path}", err=True)
+        sys.exit(1)
+    since = time.time() - days * 86400 if days is not None else None
+    ledger = CostLedger(ledger_path)
+    try:
+        spend = ledger.spend_by(dimension, since)
+        escalations = ledger.escalation_rates("initial_level", since)
+    finally:
+        ledger.close()
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "spend": [vars(row) for row in spend],
+                    "escalations": [{**vars(row), "rate": row.rate} for row in escalations],
+                },
+                indent=2,
+            )
+        )
+        return
+    click.echo(format_spend_table(spend, dimension))
+    if escalations:
+        click.echo("\nEscalation rates by starting level:")
+        for row in escalations:
+            click.echo(
+                f"  {row.key:<10} {row.rate:6.1%} of {row.tasks:,} tasks "
+                f"({row.escalations:,} escalations)"
+            )
+
+
+@main.command()
+@click.option(
+    "--stats",
+    "stats_path",
+    type=click.Path(),
+    help="Routing statistics file [default: routing_stats.json in the cache dir]",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print machine-readable JSON")
+def routing(stats_path: str | None, as_json: bool) -> None:
+    """Show escalation outcomes per kind of task and the level each now starts at."""
+    from .routing import DEFAULT_STATS_PATH, RoutingStats, format_routing_table
+
+    stats = RoutingStats.load(stats_path or DEFAULT_STATS_PATH)
+    if as_json:
+        click.echo(json.dumps(stats.to_dict(), indent=2))
+    else:
+        click.echo(format_routing_table(stats))
+
+
+@main.command("train-classifier")
+@click.argument("history", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(),
+    help="Where to write the trained model [default: local_classifier.json in the cache dir]",
+)
+@click.option("--no-seed", is_flag=True, help="Train only on history, without the seed examples")
+def train_classifier(history: tuple[str, ...], output: str | None, no_seed: bool) -> None:
+    """Fit the local pre-classifier from logged TaskResult JSONL files."""
+    from .local_classifier import (
+        DEFAULT_MODEL_PATH,
+        HOLDOUT_EVERY,
+        SEED_EXAMPLES,
+        LocalClassifier,
+        examples_from_history,
+    )
+
+    output = output or str(DEFAULT_MODEL_PATH)
+    try:
+        model = LocalClassifier.train(examples_from_history(history), seed=not no_seed)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    model.save(output)
+    seeded = 0 if no_seed else len(SEED_EXAMPLES)
+    click.echo(
+        f"Trained on {model.num_examples - seeded} logged tasks, calibrated on every "
+        f"{HOLDOUT_EVERY}th; saved to {output}"
+    )
 
 
 @main.command()
@@ -69,7 +1046,11 @@ def levels() -> None:
     for level, config in LEVEL_CONFIGS.items():
         click.echo(f"\n  {level.value.upper()}")
         click.echo(f"    Model:       {config.model_id}")
+        if config.fallback_model_ids:
+            click.echo(f"    Fallbacks:   {', '.join(config.fallback_model_ids)}")
         click.echo(f"    Max tokens:  {config.max_output_tokens:,}")
+        click.echo(f"    Context:     {config.context_window:,} tokens")
+        click.echo(f"    Selected:    {config.context_budget_tokens:,} tokens of context")
         click.echo(f"    Input cost:  ${config.pricing.input_per_mtok:.2f}/MTok")
         click.echo(f"    Output cost: ${config.pricing.output_per_mtok:.2f}/MTok")
         click.echo(f"    Description: {config.description}")
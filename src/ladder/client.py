@@ -0,0 +1,56 @@
+"""Thin client that forwards tasks to a running ``ladder serve``."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from .models import TaskResult
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class RemoteError(Exception):
+    """The server rejected or failed a task."""
+
+    def __init__(self, status: int, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def run_remote(
+    url: str, task: str, context: str = "", timeout: float | None = None
+) -> TaskResult:
+    """Run a task on the server at ``url`` and return its result."""
+    import http.client
+
+    from .models import TaskResult
+
+    parts = urlsplit(url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.hostname, parts.port, timeout=timeout)
+    try:
+        conn.request(
+            "POST",
+            parts.path.rstrip("/") + "/run",
+            body=json.dumps({"task": task, "context": context}),
+            headers={"Content-Type": "application/json"},
+        )
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        try:
+            message = json.loads(body)["error"]
+        except (ValueError, KeyError):
+            message = body.decode(errors="replace")
+        retry_after = response.getheader("Retry-After")
+        raise RemoteError(
+            response.status, message, float(retry_after) if retry_after else None
+        )
+    return TaskResult.model_validate_json(body)
@@ -0,0 +1,520 @@
+"""On-disk BM25 index of repository and context chunks, to send each level only what matters."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+from .enums import LadderLevel
+from .levels import get_config
+
+DEFAULT_INDEX_DIR = DEFAULT_CACHE_DIR / "index"
+
+# Lines per chunk; a chunk is the unit that is ranked and sent.
+CHUNK_LINES = 40
+# Longest chunk in characters: fewer lines are taken when they are long, and a
+# single longer line (minified code, one-line dumps) is cut into pieces.
+MAX_CHUNK_CHARS = 8000
+# Stored in each index; bumped when chunking changes, so older indexes are rebuilt.
+INDEX_VERSION = 2
+# Files larger than this are not indexed (generated code, data, lockfiles).
+MAX_FILE_BYTES = 1024 * 1024
+# Directories never indexed, besides hidden ones.
+IGNORED_DIRS = frozenset("node_modules __pycache__ venv dist build".split())
+# Same rough ratio as agent.CHARS_PER_TOKEN, used to fill budgets without a tokenizer.
+CHARS_PER_TOKEN = 4
+# Bytes of each index file the OS may map into memory instead of reading through the cache.
+MMAP_SIZE = 256 * 1024 * 1024
+# Candidates ranked per search before the budget is filled.
+SEARCH_LIMIT = 200
+# Minimum seconds between rescans of a repository by one selector.
+REFRESH_INTERVAL_S = 5.0
+# Context bundle indexes kept on disk; the least recently used are deleted.
+MAX_BUNDLE_INDEXES = 32
+# Bundles used this recently are never deleted, as another process may have them open.
+BUNDLE_KEEP_S = 3600.0
+# Context bundle indexes a selector keeps open.
+OPEN_BUNDLES = 8
+
+# Words too common in task descriptions to help ranking.
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it its of on or our should that the "
+    "this to we what when where which with why you add make fix use".split()
+)
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+# Index files open in this process, which pruning must not delete.
+_open_paths: Counter[Path] = Counter()
+_open_lock = threading.Lock()
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_path ON chunks (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(name, text, parts);
+"""
+# bm25 weights of the fts5 columns: path words, chunk text, camelCase parts of identifiers.
+_BM25 = "bm25(chunk_text, 2.0, 1.0, 1.0)"
+
+
+def _split_words(text: str) -> list[str]:
+    """Words of ``text`` with identifiers also split at camelCase boundaries, lowercased."""
+    words = []
+    for word in _WORD_RE.findall(text):
+        parts = _CAMEL_RE.findall(word)
+        words.append(word.lower())
+        if len(parts) > 1:
+            words.extend(part.lower() for part in parts)
+    return words
+
+
+def _parts(text: str) -> str:
+    """The camelCase parts of the identifiers in ``text``, which fts5 would not split."""
+    return " ".join(
+        part
+        for word in set(_WORD_RE.findall(text))
+        if len(parts := _CAMEL_RE.findall(word)) > 1
+        for part in parts
+    )
+
+
+def _query(task: str) -> str:
+    """An fts5 query matching any distinctive word of the task."""
+    words = dict.fromkeys(w for w in _split_words(task) if len(w) > 1 and w not in _STOPWORDS)
+    return " OR ".join(f'"{word}"' for word in list(words)[:64])
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _chunks(text: str) -> Iterator[tuple[int, int, str]]:
+    """(start line, end line, text) of each non-blank chunk, in order."""
+    for start, end, chunk in _runs(text):
+        if chunk.strip():
+            yield start, end, chunk
+
+
+def _runs(text: str) -> Iterator[tuple[int, int, str]]:
+    run: list[str] = []
+    start = size = 0
+    for number, line in enumerate(text.splitlines(keepends=True), 1):
+        if run and (len(run) == CHUNK_LINES or size + len(line) > MAX_CHUNK_CHARS):
+            yield start, number - 1, "".join(run)
+            run, size = [], 0
+        if len(line) > MAX_CHUNK_CHARS:
+            for offset in range(0, len(line), MAX_CHUNK_CHARS):
+                yield number, number, line[offset : offset + MAX_CHUNK_CHARS]
+            continue
+        if not run:
+            start = number
+        run.append(line)
+        size += len(line)
+    if run:
+        yield start, start + len(run) - 1, "".join(run)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A run of lines from an indexed file or context bundle."""
+
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+    score: float = 0.0
+    # Row id, in text order within a path; orders and joins the pieces of a long line.
+    id: int = 0
+
+
+@dataclass
+class IndexUpdate:
+    """What a repository rescan changed."""
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+def format_chunks(chunks: list[Chunk]) -> str:
+    """Chunks in file and line order, adjacent ones merged, each tagged with its source."""
+    merged: list[Chunk] = []
+    for chunk in sorted(chunks, key=lambda c: (c.path, c.id)):
+        last = merged[-1] if merged else None
+        if last is not None and last.path == chunk.path and last.id + 1 == chunk.id:
+            merged[-1] = Chunk(
+                last.path, last.start_line, chunk.end_line, last.text + chunk.text, id=chunk.id
+            )
+        else:
+            merged.append(chunk)
+    return "\n\n".join(
+        f'<chunk path="{c.path}" lines="{c.start_line}-{c.end_line}">\n'
+        f"{c.text.rstrip()}\n</chunk>"
+        for c in merged
+    )
+
+
+class ContextIndex:
+    """A BM25 index of text chunks in a memory-mapped SQLite FTS5 file.
+
+    Files are split into ``CHUNK_LINES``-line chunks. ``update_repo`` rescans
+    a directory and re-indexes only files whose size or mtime changed (and
+    whose content hash then differs), so reopening the index of a repository
+    that was indexed before costs one ``stat`` per file.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._closed = False
+        with _open_lock:
+            _open_paths[self.path.resolve()] += 1
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            with self._transaction() as conn:
+                for table in ("chunk_text", "chunks", "files"):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    @classmethod
+    def for_repo(cls, root: str | Path, index_dir: str | Path = DEFAULT_INDEX_DIR) -> ContextIndex:
+        """The index of a repository, one file per resolved root path."""
+        digest = hashlib.sha256(str(Path(root).resolve()).encode()).hexdigest()[:16]
+        return cls(Path(index_dir) / f"repo-{digest}.sqlite3")
+
+    @classmethod
+    def for_bundle(cls, text: str, index_dir: str | Path = DEFAULT_INDEX_DIR) -> ContextIndex:
+        """The index of a context string, built on first use and found by content hash."""
+        digest = hashlib.sha256(text.encode()).hexdigest()[:16]
+        index = cls(Path(index_dir) / f"bundle-{digest}.sqlite3")
+        if index.stats()["files"]:
+            index.touch()
+        else:
+            index._replace_file("context", text, 0, 0, digest)
+            _prune_bundles(Path(index_dir))
+        return index
+
+    def _replace_file(self, path: str, text: str, mtime_ns: int, size: int, digest: str) -> None:
+        with self._transaction() as conn:
+            self._delete_file(conn, path)
+            name = " ".join(_split_words(path))
+            for start, end, chunk in _chunks(text):
+                cursor = conn.execute(
+                    "INSERT INTO chunks (path, start_line, end_line) VALUES (?, ?, ?)",
+                    (path, start, end),
+                )
+                conn.execute(
+                    "INSERT INTO chunk_text (rowid, name, text, parts) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, name, chunk, _parts(chunk)),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, size, digest),
+            )
+
+    @staticmethod
+    def _delete_file(conn: sqlite3.Connection, path: str) -> None:
+        conn.execute(
+            "DELETE FROM chunk_text WHERE rowid IN (SELECT id FROM chunks WHERE path = ?)", (path,)
+        )
+        conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def update_repo(self, root: str | Path) -> IndexUpdate:
+        """Bring the index in line with the text files under ``root``."""
+        t0 = time.perf_counter()
+        root = Path(root)
+        update = IndexUpdate()
+        with self._lock:
+            known = {
+                path: (mtime_ns, size, digest)
+                for path, mtime_ns, size, digest in self._conn.execute(
+                    "SELECT path, mtime_ns, size, digest FROM files"
+                )
+            }
+        for path, stat in _walk(root):
+            seen = known.pop(path, None)
+            if seen is not None and seen[:2] == (stat.st_mtime_ns, stat.st_size):
+                update.unchanged += 1
+                continue
+            try:
+                data = (root / path).read_bytes()
+            except OSError:
+                continue
+            if b"\0" in data[:8192]:
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            if seen is not None and seen[2] == digest:
+                # Touched but not changed: remember the new mtime only.
+                with self._transaction() as conn:
+                    conn.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, path),
+                    )
+                update.unchanged += 1
+                continue
+            text = data.decode("utf-8", errors="replace")
+            self._replace_file(path, text, stat.st_mtime_ns, stat.st_size, digest)
+            if seen is None:
+                update.added += 1
+            else:
+                update.changed += 1
+        if known:
+            with self._transaction() as conn:
+                for path in known:
+                    self._delete_file(conn, path)
+            update.removed = len(known)
+        update.seconds = time.perf_counter() - t0
+        return update
+
+    def search(self, query: str, max_tokens: int) -> list[Chunk]:
+        """The best-ranked chunks for ``query`` whose text fits in ``max_tokens``."""
+        match = _query(query)
+        if not match or max_tokens <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c.path, c.start_line, c.end_line, t.text, {_BM25} AS score, c.id"
+                " FROM chunk_text t JOIN chunks c ON c.id = t.rowid"
+                " WHERE chunk_text MATCH ? ORDER BY score LIMIT ?",
+                (match, SEARCH_LIMIT),
+            ).fetchall()
+        return _fill(rows, max_tokens)
+
+    def leading(self, max_tokens: int) -> list[Chunk]:
+        """The first chunks in path and line order whose text fits in ``max_tokens``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.path, c.start_line, c.end_line, t.text, 0.0, c.id"
+                " FROM chunk_text t JOIN chunks c ON c.id = t.rowid"
+                " ORDER BY c.path, c.id LIMIT ?",
+                (SEARCH_LIMIT,),
+            ).fetchall()
+        chunks = []
+        for chunk in _fill(rows, max_tokens):
+            if chunks and chunks[-1].id + 1 != chunk.id:
+                break
+            chunks.append(chunk)
+        return chunks
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"files": files, "chunks": chunks}
+
+    def touch(self) -> None:
+        """Mark the index as just used, so pruning keeps it."""
+        os.utime(self.path)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._conn.close()
+        with _open_lock:
+            path = self.path.resolve()
+            _open_paths[path] -= 1
+            if not _open_paths[path]:
+                del _open_paths[path]
+
+
+def _fill(rows: list[tuple], max_tokens: int) -> list[Chunk]:
+    """Chunks from ``rows`` in order, skipping those that no longer fit the budget."""
+    chunks, remaining = [], max_tokens
+    for path, start, end, text, score, chunk_id in rows:
+        tokens = estimate_tokens(text) + 16
+        if tokens <= remaining:
+            chunks.append(Chunk(path, start, end, text, score, chunk_id))
+            remaining -= tokens
+    return chunks
+
+
+def _walk(root: Path) -> Iterator[tuple[str, os.stat_result]]:
+    """Relative paths and stats of the indexable files under ``root``."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith(".")]
+        dirnames.sort()
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(full)
+            except OSError:
+                continue
+            if 0 < stat.st_size <= MAX_FILE_BYTES:
+                yield os.path.relpath(full, root).replace(os.sep, "/"), stat
+
+
+def _last_used(path: Path) -> float:
+    """Latest mtime of a bundle's database and WAL files; 0 if it is gone."""
+    mtimes = []
+    for suffix in ("", "-wal"):
+        try:
+            mtimes.append(os.stat(f"{path}{suffix}").st_mtime)
+        except FileNotFoundError:
+            pass
+    return max(mtimes, default=0.0)
+
+
+def _prune_bundles(index_dir: Path) -> None:
+    """Delete the least recently used bundle indexes beyond ``MAX_BUNDLE_INDEXES``.
+
+    Bundles open in this process or used within ``BUNDLE_KEEP_S`` are kept.
+    """
+    cutoff = time.time() - BUNDLE_KEEP_S
+    bundles = sorted((_last_used(path), path) for path in index_dir.glob("bundle-*.sqlite3"))
+    for used, path in bundles[:-MAX_BUNDLE_INDEXES]:
+        with _open_lock:
+            if used >= cutoff or path.resolve() in _open_paths:
+                continue
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+class ContextSelector:
+    """Chooses the context each level is sent, within its ``context_budget_tokens``.
+
+    Context passed with a task is sent whole when it fits the level's budget,
+    and otherwise replaced by its chunks most relevant to the task, from an
+    index of the context built once and kept on disk (its first chunks when
+    none match). With a repository, its most relevant chunks fill whatever
+    budget remains; the repository is rescanned for changes at most every
+    ``refresh_interval`` seconds. ``select`` may be called from many threads.
+    """
+
+    def __init__(
+        self,
+        repo: str | Path | None = None,
+        index_dir: str | Path = DEFAULT_INDEX_DIR,
+        budgets: dict[LadderLevel, int] | None = None,
+        refresh_interval: float = REFRESH_INTERVAL_S,
+    ) -> None:
+        self.repo = Path(repo) if repo is not None else None
+        self.index_dir = Path(index_dir)
+        self.budgets = budgets or {}
+        self.refresh_interval = refresh_interval
+        self.repo_index = ContextIndex.for_repo(self.repo, index_dir) if self.repo else None
+        self._refreshed = float("-inf")
+        self._bundles: OrderedDict[str, ContextIndex] = OrderedDict()
+        # Selections using each open bundle index; an evicted one closes when unused.
+        self._users: Counter[ContextIndex] = Counter()
+        self._lock = threading.Lock()
+
+    def budget(self, level: LadderLevel) -> int:
+        return self.budgets.get(level) or get_config(level).context_budget_tokens
+
+    def refresh(self) -> IndexUpdate | None:
+        """Rescan the repository if it was not rescanned recently."""
+        with self._lock:
+            now = time.monotonic()
+            if self.repo_index is None or now - self._refreshed < self.refresh_interval:
+                return None
+            self._refreshed = now
+        return self.repo_index.update_repo(self.repo)
+
+    def _use(self, key: str, index: ContextIndex) -> None:
+        """Count a user of an open bundle and evict the least recently used (under the lock)."""
+        self._users[index] += 1
+        self._bundles.move_to_end(key)
+        while len(self._bundles) > OPEN_BUNDLES:
+            evicted = self._bundles.popitem(last=False)[1]
+            if not self._users[evicted]:
+                evicted.close()
+
+    @contextmanager
+    def _bundle(self, context: str) -> Iterator[ContextIndex]:
+        """The open index of a context, built outside the lock on first use."""
+        key = hashlib.sha256(context.encode()).hexdigest()
+        with self._lock:
+            index = self._bundles.get(key)
+            if index is not None:
+                self._use(key, index)
+        if index is not None:
+            index.touch()
+        else:
+            built = ContextIndex.for_bundle(context, self.index_dir)
+            with self._lock:
+                index = self._bundles.setdefault(key, built)
+                self._use(key, index)
+            if index is not built:
+                # Another selection opened it meanwhile.
+                built.close()
+        try:
+            yield index
+        finally:
+            with self._lock:
+                self._users[index] -= 1
+                if not self._users[index]:
+                    del self._users[index]
+                    if self._bundles.get(key) is not index:
+                        index.close()
+
+    def select(self, level: LadderLevel, task: str, context: str = "") -> str:
+        """The context to send ``level`` for ``task``. Blocking; may rescan the repository."""
+        remaining = self.budget(level)
+        parts = []
+        if context:
+            tokens = estimate_tokens(context)
+            if tokens <= remaining:
+                parts.append(context)
+                remaining -= tokens
+            else:
+                with self._bundle(context) as index:
+                    chunks = index.search(task, remaining) or index.leading(remaining)
+                if chunks:
+                    parts.append(format_chunks(chunks))
+                    remaining -= sum(estimate_tokens(c.text) for c in chunks)
+                else:
+                    # A budget smaller than any chunk: send its first characters.
+                    parts.append(context[: remaining * CHARS_PER_TOKEN])
+                    remaining = 0
+        if self.repo_index is not None and remaining > 0:
+            self.refresh()
+            parts.append(format_chunks(self.repo_index.search(task, remaining)))
+        return "\n\n".join(part for part in parts if part)
+
+    def close(self) -> None:
+        if self.repo_index is not None:
+            self.repo_index.close()
+        for index in self._bundles.values():
+            index.close()
+        self._bundles.clear()
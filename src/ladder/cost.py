@@ -2,26 +2,59 @@
 
 from __future__ import annotations
 
-from .levels import get_config
+from .levels import BATCH_MULTIPLIER, get_config
 from .models import CostRecord, LadderLevel, TokenUsage
 
 
 def calculate_cost(
-    level: LadderLevel, usage: TokenUsage, description: str = ""
+    level: LadderLevel,
+    usage: TokenUsage,
+    description: str = "",
+    batch: bool = False,
+    model_id: str | None = None,
 ) -> CostRecord:
-    """Calculate the USD cost for token usage at a given level."""
+    """Calculate the USD cost for token usage at a given level.
+
+    ``batch`` applies the Message Batches API discount. ``model_id`` is the
+    model that served the call (a fallback of the same tier), by default the
+    level's own.
+    """
     config = get_config(level)
     pricing = config.pricing
     input_cost = (usage.input_tokens / 1_000_000) * pricing.input_per_mtok
     output_cost = (usage.output_tokens / 1_000_000) * pricing.output_per_mtok
+    cache_write_cost = (
+        usage.cache_creation_input_tokens / 1_000_000
+    ) * pricing.cache_write_per_mtok
+    cache_read_cost = (usage.cache_read_input_tokens / 1_000_000) * pricing.cache_read_per_mtok
     return CostRecord(
         level=level,
         usage=usage,
-        cost_usd=input_cost + output_cost,
+        cost_usd=(input_cost + output_cost + cache_write_cost + cache_read_cost)
+        * (BATCH_MULTIPLIER if batch else 1.0),
+        description=description,
+        model_id=model_id or config.model_id,
+    )
+
+
+def combine_costs(records: list[CostRecord], description: str = "") -> CostRecord:
+    """One cost record for several calls at the same level (and model)."""
+    return CostRecord(
+        level=records[0].level,
+        model_id=records[0].model_id,
+        usage=sum((r.usage for r in records), TokenUsage()),
+        cost_usd=sum(r.cost_usd for r in records),
         description=description,
     )
 
 
+def zero_cost(level: LadderLevel, description: str = "", model_id: str = "") -> CostRecord:
+    """A cost record for work that billed nothing (cache hits, local results, failed calls)."""
+    return CostRecord(
+        level=level, usage=TokenUsage(), cost_usd=0.0, description=description, model_id=model_id
+    )
+
+
 def format_cost_summary(records: list[CostRecord]) -> str:
     """Format a list of cost records into a human-readable summary."""
     if not records:
@@ -31,11 +64,13 @@ def format_cost_summary(records: list[CostRecord]) -> str:
     total = 0.0
     for i, rec in enumerate(records, 1):
         desc = rec.description or f"Call {i}"
-        lines.append(
-            f"  {desc}: ${rec.cost_usd:.6f} "
-            f"({rec.level.value}, "
-            f"{rec.usage.input_tokens}in/{rec.usage.output_tokens}out)"
-        )
+        tokens = f"{rec.usage.input_tokens}in/{rec.usage.output_tokens}out"
+        if rec.usage.cache_creation_input_tokens or rec.usage.cache_read_input_tokens:
+            tokens += (
+                f", cache {rec.usage.cache_read_input_tokens}read/"
+                f"{rec.usage.cache_creation_input_tokens}write"
+            )
+        lines.append(f"  {desc}: ${rec.cost_usd:.6f} ({rec.level.value}, {tokens})")
         total += rec.cost_usd
     lines.append("-" * 50)
     lines.append(f"  Total: ${total:.6f}")
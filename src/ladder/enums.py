@@ -0,0 +1,60 @@
+"""Enums shared across the harness, kept free of heavy imports."""
+
+from __future__ import annotations
+
+from enum import Enum
+
+
+class LadderLevel(str, Enum):
+    """Career ladder levels mapping to LLM capability tiers."""
+
+    intern = "intern"
+    junior = "junior"
+    mid = "mid"
+    senior = "senior"
+    staff = "staff"
+    principal = "principal"
+
+
+class TaskCategory(str, Enum):
+    """Categories of software engineering tasks."""
+
+    code_review = "code_review"
+    implementation = "implementation"
+    debugging = "debugging"
+    testing = "testing"
+    architecture = "architecture"
+    documentation = "documentation"
+    refactoring = "refactoring"
+
+
+class EscalationReason(str, Enum):
+    """Why a task was escalated to a higher level."""
+
+    low_confidence = "low_confidence"
+    self_escalation = "self_escalation"
+    # Started above the classified level because similar tasks usually escalate there.
+    calibrated = "calibrated"
+
+
+class ContextPolicy(str, Enum):
+    """What to do with context that does not fit any level's input budget."""
+
+    reject = "reject"
+    truncate = "truncate"
+    summarize = "summarize"
+
+
+class EventType(str, Enum):
+    """Kinds of event yielded by ``Orchestrator.stream``, in the order a run emits them."""
+
+    classified = "classified"
+    preflight = "preflight"
+    plan = "plan"
+    subtask = "subtask"
+    token = "token"
+    # Text shown for a level so far was discarded (its call failed or lost a hedge).
+    restart = "restart"
+    attempt = "attempt"
+    escalated = "escalated"
+    result = "result"
@@ -0,0 +1,106 @@
+"""Planning and merge requests for tasks fanned out into parallel subtasks."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from pydantic import ValidationError
+
+from .enums import LadderLevel
+from .models import Subtask, TaskResult
+from .prompts import MERGE_PROMPT, PLAN_PROMPT, agent_system
+
+# Levels whose tasks are planned into subtasks before being done in one generation.
+FAN_OUT_LEVELS = (LadderLevel.staff, LadderLevel.principal)
+MAX_SUBTASKS = 8
+PLAN_MAX_TOKENS = 4096
+
+PLAN_TOOL_NAME = "plan_subtasks"
+# Forced tool for the plan; an empty list means the task is done without fanning out.
+PLAN_TOOL = {
+    "name": PLAN_TOOL_NAME,
+    "description": "Record the independent subtasks of the task, or none to do it whole.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "subtasks": {
+                "type": "array",
+                "maxItems": MAX_SUBTASKS,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "task": {"type": "string"},
+                    },
+                    "required": ["title", "task"],
+                },
+            }
+        },
+        "required": ["subtasks"],
+    },
+}
+
+
+def plan_request(
+    level: LadderLevel, model_id: str, task: str, context: str = "", handoff: str = ""
+) -> dict:
+    """Messages API parameters for asking ``level`` to split a task into subtasks.
+
+    The context and level prompt keep their cache breakpoints (when long
+    enough to be cached), so the merge call at the same level reads them
+    from the cache.
+    """
+    content = [{"type": "text", "text": task}]
+    if handoff:
+        content.append({"type": "text", "text": handoff})
+    return {
+        "model": model_id,
+        "max_tokens": PLAN_MAX_TOKENS,
+        "system": [
+            *agent_system(level, context, model_id),
+            {"type": "text", "text": PLAN_PROMPT.format(max_subtasks=MAX_SUBTASKS)},
+        ],
+        "tools": [PLAN_TOOL],
+        "tool_choice": {"type": "tool", "name": PLAN_TOOL_NAME},
+        "messages": [{"role": "user", "content": content}],
+    }
+
+
+def parse_plan(message: object) -> list[Subtask]:
+    """The valid subtasks of a plan reply, at most ``MAX_SUBTASKS``."""
+    subtasks: list[Subtask] = []
+    for block in message.content:
+        if block.type != "tool_use" or block.name != PLAN_TOOL_NAME:
+            continue
+        entries = block.input.get("subtasks") if isinstance(block.input, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                subtask = Subtask.model_validate(entry)
+            except ValidationError:
+                continue
+            if subtask.task.strip():
+                subtasks.append(subtask)
+    return subtasks[:MAX_SUBTASKS]
+
+
+def merge_task(task: str, subtasks: Sequence[Subtask], results: Sequence[TaskResult]) -> str:
+    """The task text for the merge step: the original task and every subtask's answer."""
+    parts = [MERGE_PROMPT.format(task=task)]
+    for i, (subtask, result) in enumerate(zip(subtasks, results), 1):
+        parts.append(
+            f'<subtask index="{i}" title="{subtask.title}">\n'
+            f"{subtask.task}\n\n<answer>\n{result.response}\n</answer>\n</subtask>"
+        )
+    return "\n\n".join(parts)
+
+
+def merged_response(
+    merge: str, subtasks: Sequence[Subtask], results: Sequence[TaskResult]
+) -> str:
+    """The final answer: the merge step's notes followed by every subtask's answer."""
+    parts = [merge.strip()]
+    parts += [
+        f"## {subtask.title}\n\n{result.response.strip()}"
+        for subtask, result in zip(subtasks, results)
+    ]
+    return "\n\n".join(parts)
@@ -0,0 +1,357 @@
+"""Append-only SQLite ledger of every cost record and task result, with daily rollups."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import hashlib
+import sqlite3
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .cache import DEFAULT_CACHE_DIR
+from .enums import EscalationReason, LadderLevel, TaskCategory
+from .levels import get_config
+
+if TYPE_CHECKING:
+    from .models import TaskResult
+
+DEFAULT_LEDGER_PATH = DEFAULT_CACHE_DIR / "ledger.sqlite3"
+# Buffered results are written at least this often, or sooner once this many queue up.
+FLUSH_INTERVAL = 1.0
+FLUSH_ROWS = 500
+
+# Levels and categories are stored as their position in the enum.
+_LEVELS = list(LadderLevel)
+_CATEGORIES = list(TaskCategory)
+_DIMENSIONS = {"level", "model", "category", "day"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day INTEGER NOT NULL,
+    task_sha256 TEXT NOT NULL,
+    category INTEGER NOT NULL,
+    initial_level INTEGER NOT NULL,
+    final_level INTEGER NOT NULL,
+    escalations INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    cached INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_day ON tasks (day);
+CREATE TABLE IF NOT EXISTS costs (
+    task_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    model INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS costs_task ON costs (task_id);
+CREATE INDEX IF NOT EXISTS costs_day ON costs (day);
+CREATE TABLE IF NOT EXISTS daily_costs (
+    day INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    model INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    calls INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    PRIMARY KEY (day, level, model, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_tasks (
+    day INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    initial_level INTEGER NOT NULL,
+    final_level INTEGER NOT NULL,
+    tasks INTEGER NOT NULL,
+    escalated INTEGER NOT NULL,
+    escalations INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    PRIMARY KEY (day, category, initial_level, final_level)
+) WITHOUT ROWID;
+"""
+
+
+def _day(ts: float) -> int:
+    return int(ts // 86400)
+
+
+def _date(day: int) -> str:
+    return datetime.date.fromordinal(datetime.date(1970, 1, 1).toordinal() + day).isoformat()
+
+
+@dataclass
+class SpendRow:
+    """Aggregate spend for one value of a dimension."""
+
+    key: str
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cost_usd: float
+
+
+@dataclass
+class EscalationRow:
+    """How often tasks starting at one level (or in one category) escalated."""
+
+    key: str
+    tasks: int
+    escalated: int
+    escalations: int
+    cost_usd: float
+
+    @property
+    def rate(self) -> float:
+        return self.escalated / self.tasks if self.tasks else 0.0
+
+
+class CostLedger:
+    """Persistent record of every ``CostRecord`` and ``TaskResult`` summary.
+
+    ``export`` only appends to an in-memory buffer, so it can be passed to the
+    orchestrator as an exporter without blocking the request path; a
+    background task writes the buffer in one transaction per flush. Each
+    flush also updates per-day rollups, which aggregate queries read instead
+    of scanning raw rows.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_LEDGER_PATH,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_rows: int = FLUSH_ROWS,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._models = dict(self._conn.execute("SELECT name, id FROM models"))
+        self._buffer: list[tuple[float, TaskResult]] = []
+        self._lock = asyncio.Lock()
+        self._wake: asyncio.Event | None = None
+        self._flusher: asyncio.Task[None] | None = None
+
+    def export(self, result: TaskResult) -> None:
+        """Queue a result; it is written by the background flusher."""
+        self._buffer.append((time.time(), result))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._take())
+            return
+        if self._flusher is None or self._flusher.done():
+            self._wake = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_loop())
+        if len(self._buffer) >= self.flush_rows:
+            self._wake.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def _take(self) -> list[tuple[float, TaskResult]]:
+        buffer, self._buffer = self._buffer, []
+        return buffer
+
+    async def flush(self) -> None:
+        """Write everything buffered so far."""
+        async with self._lock:
+            if self._buffer:
+                entries = self._take()
+                try:
+                    await asyncio.to_thread(self._write, entries)
+                except BaseException:
+                    # Nothing was written; keep the entries for the next flush.
+                    self._buffer[:0] = entries
+                    raise
+
+    async def aclose(self) -> None:
+        """Stop the flusher, write what is left and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _model(self, name: str) -> int:
+        model = self._models.get(name)
+        if model is None:
+            self._conn.execute("INSERT OR IGNORE INTO models (name) VALUES (?)", (name,))
+            (model,) = self._conn.execute(
+                "SELECT id FROM models WHERE name = ?", (name,)
+            ).fetchone()
+            self._models[name] = model
+        return model
+
+    def _write(self, entries: list[tuple[float, TaskResult]]) -> None:
+        """Insert raw rows and fold them into the daily rollups, in one transaction."""
+        # calls, input, output, cache write, cache read, cost
+        cost_rollup: defaultdict[tuple, list] = defaultdict(lambda: [0, 0, 0, 0, 0, 0.0])
+        # tasks, escalated tasks, escalations, cost
+        task_rollup: defaultdict[tuple, list] = defaultdict(lambda: [0, 0, 0, 0.0])
+        known = dict(self._models)
+        try:
+            self._insert(entries, cost_rollup, task_rollup)
+        except BaseException:
+            # Model ids inserted by the rolled-back transaction no longer exist.
+            self._models = known
+            raise
+
+    def _insert(
+        self,
+        entries: list[tuple[float, TaskResult]],
+        cost_rollup: defaultdict[tuple, list],
+        task_rollup: defaultdict[tuple, list],
+    ) -> None:
+        with self._conn:
+            for ts, result in entries:
+                day = _day(ts)
+                category = _CATEGORIES.index(result.classification.category)
+                initial = _LEVELS.index(result.initial_level)
+                final = _LEVELS.index(result.final_level)
+                escalations = result.escalations.count(EscalationReason.self_escalation)
+                task_hash = hashlib.sha256(result.task.encode()).hexdigest()[:16]
+                cursor = self._conn.execute(
+                    "INSERT INTO tasks (ts, day, task_sha256, category, initial_level,"
+                    " final_level, escalations, cost_usd, cached)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ts, day, task_hash, category, initial, final, escalations,
+                     result.total_cost_usd, int(result.cached)),
+                )
+                totals = task_rollup[day, category, initial, final]
+                totals[0] += 1
+                totals[1] += escalations > 0
+                totals[2] += escalations
+                totals[3] += result.total_cost_usd
+
+                rows = []
+                for record in result.costs:
+                    level = _LEVELS.index(record.level)
+                    # Records from before models were tracked fall back to the level's.
+                    model = self._model(record.model_id or get_config(record.level).model_id)
+                    usage = record.usage
+                    tokens = (
+                        usage.input_tokens,
+                        usage.output_tokens,
+                        usage.cache_creation_input_tokens,
+                        usage.cache_read_input_tokens,
+                    )
+                    rows.append(
+                        (cursor.lastrowid, day, level, model, category, *tokens,
+                         record.cost_usd, record.description)
+                    )
+                    totals = cost_rollup[day, level, model, category]
+                    totals[0] += 1
+                    for i, value in enumerate(tokens, 1):
+                        totals[i] += value
+                    totals[5] += record.cost_usd
+                self._conn.executemany(
+                    "INSERT INTO costs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+            self._conn.executemany(
+                "INSERT INTO daily_costs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (day, level, model, category) DO UPDATE SET"
+                " calls = calls + excluded.calls,"
+                " input_tokens = input_tokens + excluded.input_tokens,"
+                " output_tokens = output_tokens + excluded.output_tokens,"
+                " cache_write_tokens = cache_write_tokens + excluded.cache_write_tokens,"
+                " cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,"
+                " cost_usd = cost_usd + excluded.cost_usd",
+                [(*key, *totals) for key, totals in cost_rollup.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO daily_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (day, category, initial_level, final_level) DO UPDATE SET"
+                " tasks = tasks + excluded.tasks,"
+                " escalated = escalated + excluded.escalated,"
+                " escalations = escalations + excluded.escalations,"
+                " cost_usd = cost_usd + excluded.cost_usd",
+                [(*key, *totals) for key, totals in task_rollup.items()],
+            )
+
+    def _label(self, dimension: str, value: int) -> str:
+        if dimension in ("level", "initial_level"):
+            return _LEVELS[value].value
+        if dimension == "category":
+            return _CATEGORIES[value].value
+        if dimension == "day":
+            return _date(value)
+        names = {id_: name for name, id_ in self._models.items()}
+        return names.get(value, str(value))
+
+    def spend_by(self, dimension: str, since: float | None = None) -> list[SpendRow]:
+        """Spend grouped by level, model, category or day, optionally since a timestamp."""
+        if dimension not in _DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}; use one of {sorted(_DIMENSIONS)}")
+        self._models = dict(self._conn.execute("SELECT name, id FROM models"))
+        rows = self._conn.execute(
+            f"SELECT {dimension}, SUM(calls), SUM(input_tokens), SUM(output_tokens),"
+            " SUM(cache_read_tokens), SUM(cost_usd) FROM daily_costs"
+            f" WHERE day >= ? GROUP BY {dimension} ORDER BY {dimension}",
+            (_day(since) if since is not None else 0,),
+        )
+        return [SpendRow(self._label(dimension, key), *rest) for key, *rest in rows]
+
+    def escalation_rates(
+        self, by: str = "initial_level", since: float | None = None
+    ) -> list[EscalationRow]:
+        """Share of tasks that self-escalated, grouped by starting level or category."""
+        if by not in ("initial_level", "category"):
+            raise ValueError("Escalation rates group by 'initial_level' or 'category'")
+        rows = self._conn.execute(
+            f"SELECT {by}, SUM(tasks), SUM(escalated), SUM(escalations), SUM(cost_usd)"
+            f" FROM daily_tasks WHERE day >= ? GROUP BY {by} ORDER BY {by}",
+            (_day(since) if since is not None else 0,),
+        )
+        return [EscalationRow(self._label(by, key), *rest) for key, *rest in rows]
+
+
+def format_spend_table(rows: list[SpendRow], dimension: str) -> str:
+    """Format spend rows into a human-readable table."""
+    if not rows:
+        return "No spend recorded."
+    lines = [
+        f"{dimension.capitalize():<28} {'Calls':>10} {'In tok':>14} {'Out tok':>14} {'Cost':>14}",
+        "-" * 84,
+    ]
+    for row in rows:
+        lines.append(
+            f"{row.key:<28} {row.calls:>10,} {row.input_tokens:>14,} "
+            f"{row.output_tokens:>14,} {'$' + format(row.cost_usd, ',.4f'):>14}"
+        )
+    total = "$" + format(sum(r.cost_usd for r in rows), ",.4f")
+    lines.append("-" * 84)
+    lines.append(f"{'Total':<28} {total:>56}")
+    return "\n".join(lines)
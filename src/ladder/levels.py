@@ -4,7 +4,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from .models import LadderLevel
+from .enums import LadderLevel
+
+
+# Prompt-cache pricing relative to the base input rate (5-minute cache TTL).
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.10
+# Message Batches API requests are billed at half the standard rates.
+BATCH_MULTIPLIER = 0.50
 
 
 @dataclass(frozen=True)
@@ -14,6 +21,28 @@ class Pricing:
     input_per_mtok: float
     output_per_mtok: float
 
+    @property
+    def cache_write_per_mtok(self) -> float:
+        return self.input_per_mtok * CACHE_WRITE_MULTIPLIER
+
+    @property
+    def cache_read_per_mtok(self) -> float:
+        return self.input_per_mtok * CACHE_READ_MULTIPLIER
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Per-minute API limits for a model, shared by every level that uses it."""
+
+    requests_per_min: int
+    input_tokens_per_min: int
+    output_tokens_per_min: int
+
+
+HAIKU_RATE_LIMITS = RateLimits(4_000, 4_000_000, 800_000)
+SONNET_RATE_LIMITS = RateLimits(4_000, 2_000_000, 400_000)
+OPUS_RATE_LIMITS = RateLimits(4_000, 2_000_000, 400_000)
+
 
 @dataclass(frozen=True)
 class LevelConfig:
@@ -24,53 +53,87 @@ class LevelConfig:
     max_output_tokens: int
     pricing: Pricing
     description: str
+    # Input plus max_tokens must fit in the model's context window.
+    context_window: int = 200_000
+    # Tokens of context sent to this level when context selection is on.
+    context_budget_tokens: int = 32_000
+    rate_limits: RateLimits | None = None
+    # Same-tier models tried in order when the primary fails or its circuit is
+    # open. They are billed at this level's pricing, so list only same-priced ones.
+    fallback_model_ids: tuple[str, ...] = ()
 
 
 LEVEL_CONFIGS: dict[LadderLevel, LevelConfig] = {
     LadderLevel.intern: LevelConfig(
         level=LadderLevel.intern,
         model_id="claude-haiku-4-5-20251001",
+        rate_limits=HAIKU_RATE_LIMITS,
         max_output_tokens=2048,
+        context_budget_tokens=8_000,
         pricing=Pricing(input_per_mtok=1.00, output_per_mtok=5.00),
         description="Simple fixes: typos, formatting, trivial docstrings",
     ),
     LadderLevel.junior: LevelConfig(
         level=LadderLevel.junior,
         model_id="claude-haiku-4-5-20251001",
+        rate_limits=HAIKU_RATE_LIMITS,
         max_output_tokens=4096,
+        context_budget_tokens=16_000,
         pricing=Pricing(input_per_mtok=1.00, output_per_mtok=5.00),
         description="Straightforward tasks: basic implementations, simple tests",
     ),
     LadderLevel.mid: LevelConfig(
         level=LadderLevel.mid,
         model_id="claude-sonnet-4-5-20250929",
+        fallback_model_ids=("claude-sonnet-4-20250514",),
+        rate_limits=SONNET_RATE_LIMITS,
         max_output_tokens=8192,
+        context_budget_tokens=32_000,
         pricing=Pricing(input_per_mtok=3.00, output_per_mtok=15.00),
         description="Moderate tasks: feature implementation, debugging, code review",
     ),
     LadderLevel.senior: LevelConfig(
         level=LadderLevel.senior,
         model_id="claude-sonnet-4-5-20250929",
+        fallback_model_ids=("claude-sonnet-4-20250514",),
+        rate_limits=SONNET_RATE_LIMITS,
         max_output_tokens=16384,
+        context_budget_tokens=48_000,
         pricing=Pricing(input_per_mtok=3.00, output_per_mtok=15.00),
         description="Complex tasks: multi-file changes, performance optimization",
     ),
     LadderLevel.staff: LevelConfig(
         level=LadderLevel.staff,
         model_id="claude-opus-4-6",
+        fallback_model_ids=("claude-opus-4-5-20251101",),
+        rate_limits=OPUS_RATE_LIMITS,
         max_output_tokens=32768,
+        context_budget_tokens=64_000,
         pricing=Pricing(input_per_mtok=5.00, output_per_mtok=25.00),
         description="System-level tasks: architecture design, cross-team coordination",
     ),
     LadderLevel.principal: LevelConfig(
         level=LadderLevel.principal,
         model_id="claude-opus-4-6",
+        fallback_model_ids=("claude-opus-4-5-20251101",),
+        rate_limits=OPUS_RATE_LIMITS,
         max_output_tokens=65536,
+        context_budget_tokens=96_000,
         pricing=Pricing(input_per_mtok=5.00, output_per_mtok=25.00),
         description="Strategic tasks: system migrations, org-wide technical vision",
     ),
 }
 
+# Maximum in-flight API calls per model. Levels that share a model share its cap.
+MODEL_CONCURRENCY: dict[str, int] = {
+    "claude-haiku-4-5-20251001": 32,
+    "claude-sonnet-4-5-20250929": 16,
+    "claude-opus-4-6": 8,
+}
+DEFAULT_MODEL_CONCURRENCY = 8
+# Tasks in flight at once in a batch run.
+DEFAULT_BATCH_CONCURRENCY = 16
+
 _LEVEL_ORDER = list(LadderLevel)
 
 
@@ -85,3 +148,16 @@ def next_level(level: LadderLevel) -> LadderLevel | None:
     if idx + 1 < len(_LEVEL_ORDER):
         return _LEVEL_ORDER[idx + 1]
     return None
+
+
+def get_rate_limits(model_id: str) -> RateLimits | None:
+    """Get the rate limits configured for a model, if any level sets them."""
+    for config in LEVEL_CONFIGS.values():
+        if config.model_id == model_id and config.rate_limits is not None:
+            return config.rate_limits
+    return None
+
+
+def get_model_concurrency(model_id: str) -> int:
+    """Get the maximum number of concurrent calls allowed for a model."""
+    return MODEL_CONCURRENCY.get(model_id, DEFAULT_MODEL_CONCURRENCY)
@@ -0,0 +1,268 @@
+"""In-process naive Bayes pre-classifier that avoids a Haiku call for obvious tasks."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+from .models import ClassificationResult, LadderLevel, TaskCategory
+
+DEFAULT_MODEL_PATH = DEFAULT_CACHE_DIR / "local_classifier.json"
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_LEVEL_ORDER = list(LadderLevel)
+
+# Every this many logged tasks, one is held out of training to calibrate on.
+HOLDOUT_EVERY = 5
+# Held-out tasks needed before a trained model is trusted to skip Haiku.
+MIN_CALIBRATION_EXAMPLES = 20
+# Softmax temperatures tried when calibrating; naive Bayes is overconfident, so mostly > 1.
+CALIBRATION_TEMPERATURES = [2 ** (i / 4) for i in range(-4, 33)]
+
+# Seed examples so an untrained model still recognises the most obvious tasks.
+SEED_EXAMPLES: list[tuple[str, LadderLevel, TaskCategory]] = [
+    ("fix typo in readme", LadderLevel.intern, TaskCategory.documentation),
+    ("fix a typo in the docs", LadderLevel.intern, TaskCategory.documentation),
+    ("fix spelling mistake in comment", LadderLevel.intern, TaskCategory.documentation),
+    ("add a docstring to this function", LadderLevel.intern, TaskCategory.documentation),
+    ("add docstrings to the module", LadderLevel.intern, TaskCategory.documentation),
+    ("fix formatting and indentation", LadderLevel.intern, TaskCategory.refactoring),
+    ("rename this variable", LadderLevel.intern, TaskCategory.refactoring),
+    ("write a unit test for this function", LadderLevel.junior, TaskCategory.testing),
+    ("add a simple test case", LadderLevel.junior, TaskCategory.testing),
+    ("implement a function that parses a date string", LadderLevel.junior, TaskCategory.implementation),
+    ("fix off by one error in loop", LadderLevel.junior, TaskCategory.debugging),
+    ("update the readme installation section", LadderLevel.junior, TaskCategory.documentation),
+    ("review this pull request", LadderLevel.mid, TaskCategory.code_review),
+    ("implement a new feature across these files", LadderLevel.mid, TaskCategory.implementation),
+    ("debug why this test fails intermittently", LadderLevel.mid, TaskCategory.debugging),
+    ("refactor this module for readability", LadderLevel.mid, TaskCategory.refactoring),
+    ("write a comprehensive test suite", LadderLevel.mid, TaskCategory.testing),
+    ("optimize performance of the database queries", LadderLevel.senior, TaskCategory.implementation),
+    ("debug a race condition between services", LadderLevel.senior, TaskCategory.debugging),
+    ("refactor the authentication system across components", LadderLevel.senior, TaskCategory.refactoring),
+    ("design the architecture for a new service", LadderLevel.staff, TaskCategory.architecture),
+    ("plan the migration to a new message queue", LadderLevel.staff, TaskCategory.architecture),
+    ("design a cross team integration api", LadderLevel.staff, TaskCategory.architecture),
+    ("define the org wide technical strategy", LadderLevel.principal, TaskCategory.architecture),
+    ("plan a system wide migration to microservices", LadderLevel.principal, TaskCategory.architecture),
+]
+
+
+def _features(text: str) -> list[str]:
+    """Unigram and bigram features of lowercased word tokens."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _softmax(scores: dict[str, float], temperature: float = 1.0) -> dict[str, float]:
+    top = max(scores.values())
+    exp = {label: math.exp((s - top) / temperature) for label, s in scores.items()}
+    norm = sum(exp.values())
+    return {label: v / norm for label, v in exp.items()}
+
+
+class _NaiveBayes:
+    """Multinomial naive Bayes over string labels with Laplace smoothing."""
+
+    def __init__(self) -> None:
+        self.label_counts: Counter[str] = Counter()
+        self.feature_counts: dict[str, Counter[str]] = defaultdict(Counter)
+        self.vocabulary: set[str] = set()
+        # Divides the log scores before normalizing; fitted by ``calibrate``.
+        self.temperature = 1.0
+
+    def add(self, features: list[str], label: str) -> None:
+        self.label_counts[label] += 1
+        self.feature_counts[label].update(features)
+        self.vocabulary.update(features)
+
+    def scores(self, features: list[str]) -> dict[str, float]:
+        """Log joint probability of each label, ignoring unseen features."""
+        known = [f for f in features if f in self.vocabulary]
+        total = sum(self.label_counts.values())
+        vocab_size = len(self.vocabulary)
+        scores: dict[str, float] = {}
+        for label, count in self.label_counts.items():
+            counts = self.feature_counts[label]
+            denom = sum(counts.values()) + vocab_size
+            score = math.log(count / total)
+            for f in known:
+                score += math.log((counts[f] + 1) / denom)
+            scores[label] = score
+        return scores
+
+    def predict(self, features: list[str]) -> dict[str, float]:
+        """Posterior probability of each label, scaled by the fitted temperature."""
+        return _softmax(self.scores(features), self.temperature)
+
+    def calibrate(self, examples: list[tuple[list[str], str]]) -> None:
+        """Fit the temperature minimizing log loss on held-out (features, label) pairs."""
+        scored = [(self.scores(features), label) for features, label in examples]
+
+        def log_loss(temperature: float) -> float:
+            return -sum(
+                math.log(max(_softmax(scores, temperature).get(label, 0.0), 1e-12))
+                for scores, label in scored
+            )
+
+        self.temperature = min(CALIBRATION_TEMPERATURES, key=log_loss)
+
+    def to_dict(self) -> dict:
+        return {
+            "label_counts": dict(self.label_counts),
+            "feature_counts": {k: dict(v) for k, v in self.feature_counts.items()},
+            "temperature": self.temperature,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> _NaiveBayes:
+        model = cls()
+        model.temperature = data.get("temperature", 1.0)
+        model.label_counts = Counter(data["label_counts"])
+        for label, counts in data["feature_counts"].items():
+            model.feature_counts[label] = Counter(counts)
+            model.vocabulary.update(counts)
+        return model
+
+
+class LocalClassifier:
+    """Keyword/n-gram classifier over ``LadderLevel`` and ``TaskCategory``.
+
+    Runs in-process with no network. Confidence is the lower of the two heads'
+    top posteriors, so a task is only trusted when both level and category are clear.
+    Naive Bayes posteriors are far too sharp as-is; ``train`` calibrates them
+    with a temperature fitted on held-out history.
+    """
+
+    def __init__(self) -> None:
+        self._levels = _NaiveBayes()
+        self._categories = _NaiveBayes()
+
+    @property
+    def num_examples(self) -> int:
+        return sum(self._levels.label_counts.values())
+
+    def fit(self, examples: Iterable[tuple[str, LadderLevel, TaskCategory]]) -> LocalClassifier:
+        """Add labelled examples to the model. Returns self."""
+        for text, level, category in examples:
+            features = _features(text)
+            self._levels.add(features, level.value)
+            self._categories.add(features, category.value)
+        return self
+
+    @property
+    def calibrated(self) -> bool:
+        return self._levels.temperature != 1.0 or self._categories.temperature != 1.0
+
+    def calibrate(
+        self, examples: Iterable[tuple[str, LadderLevel, TaskCategory]]
+    ) -> LocalClassifier:
+        """Fit each head's temperature on examples not used for training. Returns self."""
+        examples = [(_features(text), level, category) for text, level, category in examples]
+        self._levels.calibrate([(features, level.value) for features, level, _ in examples])
+        self._categories.calibrate(
+            [(features, category.value) for features, _, category in examples]
+        )
+        return self
+
+    @classmethod
+    def train(
+        cls, examples: Iterable[tuple[str, LadderLevel, TaskCategory]], seed: bool = True
+    ) -> LocalClassifier:
+        """Fit on logged examples, holding out every ``HOLDOUT_EVERY``-th to calibrate on.
+
+        Raises ValueError with fewer than ``MIN_CALIBRATION_EXAMPLES`` held out.
+        """
+        training, held_out = [], []
+        for i, example in enumerate(examples, 1):
+            (held_out if i % HOLDOUT_EVERY == 0 else training).append(example)
+        if len(held_out) < MIN_CALIBRATION_EXAMPLES:
+            raise ValueError(
+                f"{len(training) + len(held_out)} logged tasks are too few to calibrate on; "
+                f"need at least {MIN_CALIBRATION_EXAMPLES * HOLDOUT_EVERY}"
+            )
+        model = cls.seeded() if seed else cls()
+        return model.fit(training).calibrate(held_out)
+
+    def classify(self, task: str) -> ClassificationResult | None:
+        """Classify a task locally, or return None if nothing is known about it."""
+        features = _features(task)
+        if self.num_examples == 0 or not any(f in self._levels.vocabulary for f in features):
+            return None
+
+        level_probs = self._levels.predict(features)
+        category_probs = self._categories.predict(features)
+        level = max(level_probs, key=level_probs.get)
+        category = max(category_probs, key=category_probs.get)
+
+        expected_idx = sum(
+            p * _LEVEL_ORDER.index(LadderLevel(label)) for label, p in level_probs.items()
+        )
+        complexity = round(1 + 9 * expected_idx / (len(_LEVEL_ORDER) - 1))
+
+        return ClassificationResult(
+            level=LadderLevel(level),
+            category=TaskCategory(category),
+            confidence=min(level_probs[level], category_probs[category]),
+            reasoning=f"Local classifier (p_level={level_probs[level]:.2f}, "
+            f"p_category={category_probs[category]:.2f})",
+            estimated_complexity=complexity,
+        )
+
+    def save(self, path: str | Path = DEFAULT_MODEL_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"levels": self._levels.to_dict(), "categories": self._categories.to_dict()}
+        path.write_text(json.dumps(data))
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_MODEL_PATH) -> LocalClassifier | None:
+        """Load a trained model, or None if none has been trained yet.
+
+        The seed examples alone are too few to be trusted over Haiku.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        model = cls()
+        model._levels = _NaiveBayes.from_dict(data["levels"])
+        model._categories = _NaiveBayes.from_dict(data["categories"])
+        return model
+
+    @classmethod
+    def seeded(cls) -> LocalClassifier:
+        return cls().fit(SEED_EXAMPLES)
+
+
+def examples_from_history(
+    paths: Iterable[str | Path],
+) -> Iterable[tuple[str, LadderLevel, TaskCategory]]:
+    """Yield training examples from JSONL logs of ``TaskResult``s.
+
+    Lines may be bare task results or ``run-batch`` outcomes, and logs ending
+    in ``.gz`` are read compressed. The label is the level that actually
+    produced the answer, not the one originally predicted.
+    """
+    for path in paths:
+        with gzip.open(path, "rt") if str(path).endswith(".gz") else open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "index" in data:
+                    data = data.get("result")
+                    if data is None:
+                        continue
+                yield (
+                    data["task"],
+                    LadderLevel(data["final_level"]),
+                    TaskCategory(data["classification"]["category"]),
+                )
@@ -1,33 +1,10 @@
-"""Pydantic data models and enums for the ladder harness."""
+"""Pydantic data models for the ladder harness (the enums are re-exported from ``enums``)."""
 
 from __future__ import annotations
 
-from enum import Enum
-
 from pydantic import BaseModel, Field
 
-
-class LadderLevel(str, Enum):
-    """Career ladder levels mapping to LLM capability tiers."""
-
-    intern = "intern"
-    junior = "junior"
-    mid = "mid"
-    senior = "senior"
-    staff = "staff"
-    principal = "principal"
-
-
-class TaskCategory(str, Enum):
-    """Categories of software engineering tasks."""
-
-    code_review = "code_review"
-    implementation = "implementation"
-    debugging = "debugging"
-    testing = "testing"
-    architecture = "architecture"
-    documentation = "documentation"
-    refactoring = "refactoring"
+from .enums import EscalationReason, EventType, LadderLevel, TaskCategory
 
 
 class ClassificationResult(BaseModel):
@@ -38,13 +15,41 @@ class ClassificationResult(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0)
     reasoning: str
     estimated_complexity: int = Field(ge=1, le=10)
+    # Set when the result came from the classification cache, with no API call.
+    cached: bool = False
 
 
 class TokenUsage(BaseModel):
-    """Token usage from a single API call."""
+    """Token usage from a single API call.
+
+    ``input_tokens`` excludes tokens written to or read from the prompt cache,
+    which are counted separately and billed at their own rates.
+    """
 
     input_tokens: int = 0
     output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @classmethod
+    def from_api(cls, usage: object) -> TokenUsage:
+        """Build from an API ``Usage`` object, treating missing cache fields as zero."""
+        return cls(
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+        )
+
+    def __add__(self, other: TokenUsage) -> TokenUsage:
+        return TokenUsage(
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cache_creation_input_tokens=(
+                self.cache_creation_input_tokens + other.cache_creation_input_tokens
+            ),
+            cache_read_input_tokens=self.cache_read_input_tokens + other.cache_read_input_tokens,
+        )
 
 
 class CostRecord(BaseModel):
@@ -54,13 +59,23 @@ class CostRecord(BaseModel):
     usage: TokenUsage
     cost_usd: float
     description: str = ""
+    # The model that served the call, which may be a fallback of the level's
+    # own; empty when no API call was made.
+    model_id: str = ""
 
 
-class EscalationReason(str, Enum):
-    """Why a task was escalated to a higher level."""
+class Span(BaseModel):
+    """Timing of one phase of a task: the whole run, classification, or an agent attempt."""
 
-    low_confidence = "low_confidence"
-    self_escalation = "self_escalation"
+    name: str
+    level: LadderLevel | None = None
+    start_time: float  # Unix epoch seconds
+    wall_s: float
+    ttft_s: float | None = None
+    output_tokens: int = 0
+    output_tokens_per_s: float | None = None
+    retries: int = 0
+    status: str = "ok"
 
 
 class AgentResponse(BaseModel):
@@ -69,7 +84,30 @@ class AgentResponse(BaseModel):
     text: str
     escalated: bool = False
     escalation_reason: EscalationReason | None = None
+    escalation_note: str | None = None
     cost: CostRecord
+    span: Span | None = None
+    # Follow-up turns used after hitting max_tokens; truncated if still cut off.
+    continuations: int = 0
+    truncated: bool = False
+
+
+class PreflightEstimate(BaseModel):
+    """Input size and cost estimate for a task, made before any agent call."""
+
+    level: LadderLevel
+    skipped_levels: list[LadderLevel] = Field(default_factory=list)
+    input_tokens: int
+    output_tokens: int
+    context_action: str = "none"  # none, truncated or summarized
+    estimated_cost_usd: float
+
+
+class Subtask(BaseModel):
+    """An independent part of a larger task, planned by a high level."""
+
+    title: str
+    task: str
 
 
 class TaskResult(BaseModel):
@@ -83,3 +121,54 @@ class TaskResult(BaseModel):
     escalations: list[EscalationReason] = Field(default_factory=list)
     costs: list[CostRecord] = Field(default_factory=list)
     total_cost_usd: float = 0.0
+    cached: bool = False
+    # The final answer (or a subtask's) was still cut off at max_tokens after
+    # its continuation turns.
+    truncated: bool = False
+    spans: list[Span] = Field(default_factory=list)
+    preflight: PreflightEstimate | None = None
+    # Results of the subtasks a fanned-out task was split into; their costs are
+    # also included in ``costs``.
+    subtasks: list[TaskResult] = Field(default_factory=list)
+
+
+class OrchestrationEvent(BaseModel):
+    """One step of a streamed run; which fields are set depends on ``type``.
+
+    ``token`` events carry answer text as it arrives. Concatenated, they give
+    the final response, except that a ``restart`` discards the text before it.
+    """
+
+    type: EventType
+    level: LadderLevel | None = None
+    text: str = ""
+    classification: ClassificationResult | None = None
+    preflight: PreflightEstimate | None = None
+    subtasks: list[Subtask] = Field(default_factory=list)
+    costs: list[CostRecord] = Field(default_factory=list)
+    span: Span | None = None
+    # For ``escalated``: the level handed to and why.
+    to_level: LadderLevel | None = None
+    reason: EscalationReason | None = None
+    result: TaskResult | None = None
+
+
+class BatchTask(BaseModel):
+    """A single task submitted as part of a batch run."""
+
+    task: str
+    context: str = ""
+    id: str | None = None
+
+
+class BatchOutcome(BaseModel):
+    """Outcome of one task in a batch run: either a result or an error."""
+
+    index: int
+    id: str | None = None
+    result: TaskResult | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -2,91 +2,1161 @@
 
 from __future__ import annotations
 
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Iterable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
 from anthropic import AsyncAnthropic
 
 from .agent import LadderAgent
-from .classifier import classify_task
-from .levels import next_level
+from .classifier import (
+    CLASSIFIER_MODEL,
+    CLASSIFY_BATCH_SIZE,
+    ClassificationCache,
+    batch_classifier_request,
+    classifier_request,
+    classify_task,
+    classify_tasks,
+)
+from .context_index import ContextSelector
+from .cost import calculate_cost, combine_costs, zero_cost
+from .fan_out import FAN_OUT_LEVELS, merge_task, merged_response, parse_plan, plan_request
+from .levels import (
+    DEFAULT_BATCH_CONCURRENCY,
+    get_config,
+    get_model_concurrency,
+    next_level,
+)
+from .local_classifier import LocalClassifier
 from .models import (
+    AgentResponse,
+    BatchOutcome,
+    BatchTask,
+    ClassificationResult,
+    CostRecord,
     EscalationReason,
+    EventType,
     LadderLevel,
+    OrchestrationEvent,
+    PreflightEstimate,
+    Span,
+    Subtask,
     TaskResult,
+    TokenUsage,
 )
+from .output_budget import OutputBudget
+from .preflight import ApiCall, Preflight, PreflightPlan, estimate_tokens
+from .prompts import handoff_note
+from .resilience import CLIENT_MAX_RETRIES, CallAttempt, Resilience
+from .result_cache import ResultCache
+from .routing import RoutingStats
+from .scheduler import Priority, Reservation, Scheduler, current_priority
+from .telemetry import SpanExporter
+
+logger = logging.getLogger(__name__)
 
 MAX_ESCALATIONS = 3
 CONFIDENCE_THRESHOLD = 0.7
+# Minimum local-classifier confidence needed to skip the Haiku classifier.
+LOCAL_CONFIDENCE_THRESHOLD = 0.9
+
+# A classification and its share of a batched classifier call.
+_Classified = tuple[ClassificationResult, CostRecord]
+# The task being run by run_many and its batched classification, if any.
+_preclassified: ContextVar[tuple[str, ClassificationResult, CostRecord] | None] = ContextVar(
+    "ladder_preclassified", default=None
+)
+
+
+class _EventStream:
+    """Collects the events of one streamed run for ``Orchestrator.stream``.
+
+    Only the level the run is waiting on streams tokens, and of its calls
+    only the first to produce text, so racing levels and hedged calls never
+    interleave. ``finish`` makes what was shown add up to the final response.
+    """
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[OrchestrationEvent | None] = asyncio.Queue()
+        self.level: LadderLevel | None = None
+        self.owner: LadderAgent | None = None
+        self.shown = ""
+
+    def emit(self, type: EventType, **fields: object) -> None:
+        self.queue.put_nowait(OrchestrationEvent(type=type, **fields))
+
+    def watch(self, level: LadderLevel) -> None:
+        """The run now waits on ``level``; only its calls stream tokens."""
+        self.level, self.owner = level, None
+
+    def on_text(self, agent: LadderAgent, text: str) -> None:
+        if agent.level != self.level or (self.owner is not None and agent is not self.owner):
+            return
+        if self.owner is None:
+            # Catch up on what the call said before it was watched.
+            self.owner, text = agent, agent.text
+        self._show(agent.level, text)
+
+    def drop(self, agent: LadderAgent) -> None:
+        """A call ended without answering; discard any text it showed."""
+        if agent is self.owner:
+            self.owner = None
+            self._restart(agent.level)
+
+    def finish(self, level: LadderLevel, response: str) -> None:
+        """Show whatever of the final response has not been shown yet."""
+        if not response.startswith(self.shown):
+            self._restart(level)
+        self._show(level, response[len(self.shown) :])
+
+    def _show(self, level: LadderLevel, text: str) -> None:
+        if text:
+            self.shown += text
+            self.emit(EventType.token, level=level, text=text)
+
+    def _restart(self, level: LadderLevel) -> None:
+        if self.shown:
+            self.shown = ""
+            self.emit(EventType.restart, level=level)
+
+
+# Receives the events of the current run, if it is being streamed.
+_events: ContextVar[_EventStream | None] = ContextVar("ladder_events", default=None)
+
+
+def _emit(type: EventType, **fields: object) -> None:
+    """Send an event to the current run's stream, if it has one."""
+    events = _events.get()
+    if events is not None:
+        events.emit(type, **fields)
+
+
+@dataclass
+class _Attempt:
+    """A level's in-flight run, and every agent call it has made so far.
+
+    Retries, hedges and fallbacks each get their own agent; the one whose
+    call succeeded is marked ok.
+    """
+
+    level: LadderLevel
+    task: asyncio.Task[AgentResponse]
+    calls: list[CallAttempt[LadderAgent]] = field(default_factory=list)
+
+
+def _phase_span(name: str, started_at: float, t0: float, status: str) -> Span:
+    return Span(
+        name=name, start_time=started_at, wall_s=time.perf_counter() - t0, status=status
+    )
+
+
+def _unanswered_cost(
+    level: LadderLevel, label: str, params: dict, call: CallAttempt[None]
+) -> CostRecord:
+    """Cost of a call that failed (nothing billed) or lost a hedge (input only)."""
+    if call.status == "failed":
+        return zero_cost(
+            level, f"{label} (failed: {type(call.error).__name__})", model_id=call.model_id
+        )
+    usage = TokenUsage(input_tokens=estimate_tokens(params))
+    return calculate_cost(level, usage, f"{label} (cancelled hedge)", model_id=call.model_id)
 
 
 class Orchestrator:
-    """Routes tasks through the ladder based on classification."""
+    """Routes tasks through the ladder based on classification.
+
+    Retries are left to ``resilience``, so a ``client`` passed in should be
+    built with ``max_retries=0``, as the default one is.
+    """
+
+    def __init__(
+        self,
+        client: AsyncAnthropic | None = None,
+        model_concurrency: dict[str, int] | None = None,
+        classification_cache: ClassificationCache | None = None,
+        local_classifier: LocalClassifier | None = None,
+        local_confidence_threshold: float = LOCAL_CONFIDENCE_THRESHOLD,
+        speculative: bool = False,
+        result_cache: ResultCache | None = None,
+        exporters: list[SpanExporter] | None = None,
+        preflight: Preflight | None = None,
+        output_budget: OutputBudget | None = None,
+        scheduler: Scheduler | None = None,
+        resilience: Resilience | None = None,
+        routing: RoutingStats | None = None,
+        fan_out: bool = False,
+        context_selector: ContextSelector | None = None,
+    ) -> None:
+        self.client = client or AsyncAnthropic(max_retries=CLIENT_MAX_RETRIES)
+        self.model_concurrency = model_concurrency or {}
+        self.classification_cache = classification_cache
+        self.local_classifier = local_classifier
+        self.local_confidence_threshold = local_confidence_threshold
+        self.speculative = speculative
+        self.result_cache = result_cache
+        self.exporters = list(exporters or [])
+        self.preflight = preflight
+        self.output_budget = output_budget or OutputBudget()
+        self.scheduler = scheduler
+        self.resilience = resilience or Resilience()
+        self.routing = routing
+        self.fan_out = fan_out
+        self.context_selector = context_selector
+        self._model_slots: dict[str, asyncio.Semaphore] = {}
+
+    def _model_slot(self, model_id: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent calls to a model."""
+        slot = self._model_slots.get(model_id)
+        if slot is None:
+            limit = self.model_concurrency.get(model_id) or get_model_concurrency(model_id)
+            slot = self._model_slots[model_id] = asyncio.Semaphore(limit)
+        return slot
+
+    def _admit(
+        self, level: LadderLevel, params: dict
+    ) -> AbstractAsyncContextManager[Reservation | None]:
+        """Reserve scheduler capacity for a call, if there is a scheduler."""
+        if self.scheduler is None:
+            return nullcontext()
+        input_tokens = estimate_tokens(params)
+        usage = TokenUsage(input_tokens=input_tokens, output_tokens=params["max_tokens"])
+        return self.scheduler.slot(
+            params["model"],
+            input_tokens,
+            params["max_tokens"],
+            calculate_cost(level, usage).cost_usd,
+        )
+
+    def _result_options(self) -> dict:
+        """Settings that change a task's answer, for the result cache key."""
+        selector = self.context_selector
+        preflight = self.preflight
+        return {
+            "fan_out": self.fan_out,
+            "speculative": self.speculative,
+            "context_budgets": (
+                {level.value: selector.budget(level) for level in LadderLevel}
+                if selector is not None
+                else None
+            ),
+            "context_policy": preflight.policy.value if preflight is not None else None,
+            "max_input_tokens": preflight.max_input_tokens if preflight is not None else None,
+        }
+
+    async def run_many(
+        self,
+        tasks: Iterable[str | BatchTask],
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        priority: Priority = Priority.batch,
+        classify_batch_size: int = CLASSIFY_BATCH_SIZE,
+    ) -> AsyncIterator[BatchOutcome]:
+        """Run many tasks concurrently, yielding outcomes in completion order.
+
+        At most ``concurrency`` tasks are in flight at once, and calls to each
+        model are further bounded by its per-model cap. A task that raises is
+        reported as a failed outcome and does not stop the others. An error
+        raised by ``tasks`` itself stops new tasks from starting: those
+        already taken finish and are yielded, then the error is raised. With a
+        scheduler, the tasks queue behind interactive ones by default.
+
+        Tasks are taken ``classify_batch_size`` at a time and classified with
+        one Haiku call per group (1 classifies each task on its own), at
+        ``priority``. The next group is classified while the current one runs.
+        """
+        pending = enumerate(tasks)
+        group_size = max(1, classify_batch_size)
+        # Classified tasks waiting for a worker: one group, so one more is prefetched.
+        items: asyncio.Queue[tuple[int, BatchTask, _Classified | None] | None] = asyncio.Queue(
+            group_size
+        )
+        outcomes: asyncio.Queue[BatchOutcome | None] = asyncio.Queue()
+        failure: Exception | None = None
+
+        async def classify_groups() -> None:
+            nonlocal failure
+            current_priority.set(priority)
+            try:
+                while failure is None:
+                    group = []
+                    try:
+                        for index, item in itertools.islice(pending, group_size):
+                            group.append(
+                                (index, BatchTask(task=item) if isinstance(item, str) else item)
+                            )
+                    except Exception as exc:
+                        failure = exc
+                    if not group:
+                        break
+                    classified = await self._classify_many([item.task for _, item in group])
+                    for entry, c in zip(group, classified):
+                        await items.put((*entry, c))
+            except Exception as exc:
+                failure = exc
+            await items.put(None)
+
+        async def worker() -> None:
+            try:
+                while (entry := await items.get()) is not None:
+                    await outcomes.put(await self._run_batch_item(*entry, priority))
+                # Pass the end on to the next idle worker.
+                items.put_nowait(None)
+            finally:
+                outcomes.put_nowait(None)
+
+        producer = asyncio.create_task(classify_groups())
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        remaining = len(workers)
+        try:
+            while remaining:
+                outcome = await outcomes.get()
+                if outcome is None:
+                    remaining -= 1
+                    continue
+                yield outcome
+        finally:
+            for w in (producer, *workers):
+                w.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+        if failure is not None:
+            raise failure
+
+    async def _run_batch_item(
+        self,
+        index: int,
+        item: BatchTask,
+        classified: _Classified | None = None,
+        priority: Priority | None = None,
+    ) -> BatchOutcome:
+        """Run one batch task, capturing any error in the outcome."""
+        token = _preclassified.set((item.task, *classified) if classified else None)
+        try:
+            result = await self.run(item.task, item.context, priority)
+        except Exception as exc:
+            return BatchOutcome(
+                index=index, id=item.id, error=f"{type(exc).__name__}: {exc}"
+            )
+        finally:
+            _preclassified.reset(token)
+        return BatchOutcome(index=index, id=item.id, result=result)
+
+    def _local_classification(self, task: str) -> ClassificationResult | None:
+        """The local classifier's answer, if it is confident enough to skip Haiku."""
+        if self.local_classifier is None:
+            return None
+        local = self.local_classifier.classify(task)
+        if local is not None and local.confidence >= self.local_confidence_threshold:
+            return local
+        return None
+
+    async def _classify_many(self, tasks: list[str]) -> list[_Classified | None]:
+        """Classify a group of tasks with one Haiku call.
+
+        Returns None for the tasks ``_classify`` should handle itself: those
+        the local classifier is sure about, and all of them when there are
+        fewer than two left or the batched call fails.
+        """
+        results: list[_Classified | None] = [None] * len(tasks)
+        remote = [i for i, task in enumerate(tasks) if self._local_classification(task) is None]
+        if len(remote) < 2:
+            return results
+        batch = [tasks[i] for i in remote]
+
+        async def classify(model: str) -> list[_Classified]:
+            params = batch_classifier_request(batch, model)
+            async with self._admit(LadderLevel.intern, params) as reservation:
+                async with self._model_slot(model):
+                    classified = await classify_tasks(
+                        self.client, batch, self.classification_cache, model, len(batch)
+                    )
+                if reservation is not None:
+                    reservation.settle(combine_costs([cost for _, cost in classified]))
+            return classified
+
+        try:
+            classified = await self.resilience.call(
+                "classify_batch",
+                [CLASSIFIER_MODEL, *get_config(LadderLevel.intern).fallback_model_ids],
+                lambda model: (None, classify(model)),
+                [],
+            )
+        except Exception:
+            logger.warning("Batched classification failed; classifying one by one", exc_info=True)
+            return results
+        for i, item in zip(remote, classified):
+            results[i] = item
+        return results
+
+    async def _classify(
+        self, task: str
+    ) -> tuple[ClassificationResult, list[CostRecord], Span]:
+        """Classify locally when confident enough, otherwise ask Haiku.
+
+        Haiku calls go through the resilience policy; the costs include any
+        failed or hedged calls before the one that answered.
+        """
+        started_at, t0 = time.time(), time.perf_counter()
+        preclassified = _preclassified.get()
+        if preclassified is not None and preclassified[0] == task:
+            _, classification, cost = preclassified
+            return classification, [cost], _phase_span("classify", started_at, t0, "batched")
+        local = self._local_classification(task)
+        if local is not None:
+            cost = zero_cost(LadderLevel.intern, "Classification (local)")
+            return local, [cost], _phase_span("classify", started_at, t0, "local")
+
+        async def classify(model: str) -> tuple[ClassificationResult, CostRecord]:
+            params = classifier_request(task, model)
+            async with self._admit(LadderLevel.intern, params) as reservation:
+                async with self._model_slot(model):
+                    result = await classify_task(
+                        self.client, task, cache=self.classification_cache, model=model
+                    )
+                if reservation is not None:
+                    reservation.settle(result[1])
+            return result
+
+        calls: list[CallAttempt[None]] = []
+        classification, cost = await self.resilience.call(
+            "classify",
+            [CLASSIFIER_MODEL, *get_config(LadderLevel.intern).fallback_model_ids],
+            lambda model: (None, classify(model)),
+            calls,
+        )
+        costs = [
+            _unanswered_cost(
+                LadderLevel.intern, "Classification", classifier_request(task, call.model_id), call
+            )
+            for call in calls
+            if call.status != "ok"
+        ]
+        costs.append(cost)
+        span = _phase_span("classify", started_at, t0, "cached" if classification.cached else "ok")
+        span.retries = sum(call.status == "failed" for call in calls)
+        return classification, costs, span
+
+    async def estimate(self, task: str, context: str = "") -> PreflightEstimate:
+        """Classify a task and estimate its first attempt without running any agent.
+
+        Uses the configured preflight, or local token counting if there is none.
+        """
+        classification, _, _ = await self._classify(task)
+        level = classification.level
+        bumped = next_level(level)
+        start = self.routing.best_start(self.routing.key(classification)) if self.routing else level
+        if start != level:
+            level = start
+        elif classification.confidence < CONFIDENCE_THRESHOLD and bumped is not None:
+            level = bumped
+        if self.context_selector is not None:
+            context = await asyncio.to_thread(self.context_selector.select, level, task, context)
+        preflight = self.preflight or Preflight(self.client)
+        expected = self.output_budget.expected_tokens(classification)
+        plan = await preflight.check(
+            level, task, context, expected, dry_run=True, call=self._preflight_call([])
+        )
+        return plan.estimate
+
+    def _preflight_call(self, costs: list[CostRecord]) -> ApiCall:
+        """Make preflight API calls like the orchestrator's own.
+
+        Each is admitted by the scheduler (token counts take a request and no
+        tokens), bounded by its model's concurrency cap and run under the
+        resilience policy on the level's models. Summary calls that failed or
+        lost a hedge are added to ``costs``.
+        """
+
+        async def call(method: str, level: LadderLevel, params: dict) -> tuple[object, str]:
+            config = get_config(level)
+
+            async def send(model: str) -> tuple[object, str]:
+                request = {**params, "model": model}
+                if method == "count_tokens":
+                    admission = (
+                        self.scheduler.slot(model, 0, 0) if self.scheduler else nullcontext()
+                    )
+                else:
+                    admission = self._admit(level, request)
+                async with admission as reservation:
+                    async with self._model_slot(model):
+                        response = await getattr(self.client.messages, method)(**request)
+                    if reservation is not None and method == "create":
+                        usage = TokenUsage.from_api(response.usage)
+                        reservation.settle(calculate_cost(level, usage, model_id=model))
+                return response, model
+
+            calls: list[CallAttempt[None]] = []
+            try:
+                return await self.resilience.call(
+                    f"preflight_{method}",
+                    [config.model_id, *config.fallback_model_ids],
+                    lambda model: (None, send(model)),
+                    calls,
+                )
+            finally:
+                if method == "create":
+                    costs.extend(
+                        _unanswered_cost(
+                            level, "Context summary", {**params, "model": c.model_id}, c
+                        )
+                        for c in calls
+                        if c.status != "ok"
+                    )
+
+        return call
+
+    async def _preflight(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        costs: list[CostRecord],
+        spans: list[Span],
+        first: bool = False,
+        expected_output_tokens: int = 0,
+    ) -> PreflightPlan:
+        """Fit the input to a level; the first check also skips levels too small
+        for the expected answer and enforces the cost limit."""
+        started_at, t0 = time.time(), time.perf_counter()
+        unanswered: list[CostRecord] = []
+        call = self._preflight_call(unanswered)
+        if first:
+            plan = await self.preflight.check(
+                level, task, context, expected_output_tokens, call=call
+            )
+        else:
+            plan = await self.preflight.fit(level, task, context, call=call)
+        costs.extend([*unanswered, *plan.costs])
+        action = plan.estimate.context_action
+        spans.append(
+            _phase_span("preflight", started_at, t0, "ok" if action == "none" else action)
+        )
+        _emit(
+            EventType.preflight,
+            level=plan.estimate.level,
+            preflight=plan.estimate,
+            costs=[*unanswered, *plan.costs],
+            span=spans[-1],
+        )
+        return plan
+
+    async def _head_start_allowed(self, task: str, context: str) -> bool:
+        """Whether speculative mode may start the intern before classification.
+
+        With a preflight, only when the input fits the intern as-is and its
+        attempt is within the cost limit.
+        """
+        if self.preflight is None:
+            return True
+        level = LadderLevel.intern
+        tokens = await self.preflight.count(level, task, context, self._preflight_call([]))
+        if tokens > self.preflight.input_budget(level):
+            return False
+        if self.preflight.max_cost_usd is None:
+            return True
+        usage = TokenUsage(input_tokens=tokens, output_tokens=get_config(level).max_output_tokens)
+        return calculate_cost(level, usage).cost_usd <= self.preflight.max_cost_usd
+
+    def _start_attempt(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        handoff: str = "",
+        max_tokens: int | None = None,
+    ) -> _Attempt:
+        """Start an agent attempt in the background."""
+        calls: list[CallAttempt[LadderAgent]] = []
+        run = asyncio.create_task(self._attempt(level, task, context, handoff, max_tokens, calls))
+        return _Attempt(level, run, calls)
+
+    async def _attempt(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        handoff: str = "",
+        max_tokens: int | None = None,
+        calls: list[CallAttempt[LadderAgent]] | None = None,
+    ) -> AgentResponse:
+        """Run a level on a task, retrying, hedging and falling back per the resilience policy.
+
+        Every agent call made is appended to ``calls``.
+        """
+        config = get_config(level)
+        calls = [] if calls is None else calls
 
-    def __init__(self, client: AsyncAnthropic | None = None) -> None:
-        self.client = client or AsyncAnthropic()
+        events = _events.get()
 
-    async def run(self, task: str, context: str = "") -> TaskResult:
-        """Classify a task, route to the appropriate agent, and handle escalation."""
-        classification, classifier_cost = await classify_task(self.client, task)
-        costs = [classifier_cost]
+        def start(model_id: str) -> tuple[LadderAgent, Awaitable[AgentResponse]]:
+            agent = LadderAgent(self.client, level, model_id)
+            if events is not None:
+                agent.on_text = events.on_text
+            return agent, self._call_agent(agent, task, context, handoff, max_tokens)
+
+        response = await self.resilience.call(
+            "agent",
+            [config.model_id, *config.fallback_model_ids],
+            start,
+            calls,
+            first_output=lambda agent: agent.ttft_s,
+        )
+        response.span.retries = sum(call.status == "failed" for call in calls)
+        return response
+
+    async def _call_agent(
+        self,
+        agent: LadderAgent,
+        task: str,
+        context: str,
+        handoff: str = "",
+        max_tokens: int | None = None,
+    ) -> AgentResponse:
+        """Make one agent call within its model's concurrency cap and the scheduler."""
+        params = agent.request_params(task, context, handoff, max_tokens)
+        async with self._admit(agent.level, params) as reservation:
+            async with self._model_slot(agent.model_id):
+                try:
+                    response = await agent.run(task, context, handoff, max_tokens)
+                except BaseException:
+                    if reservation is not None:
+                        reservation.settle(agent.partial_cost())
+                    events = _events.get()
+                    if events is not None:
+                        events.drop(agent)
+                    raise
+            if reservation is not None:
+                reservation.settle(response.cost)
+            return response
+
+    @staticmethod
+    def _record_calls(
+        attempt: _Attempt, costs: list[CostRecord], spans: list[Span] | None = None
+    ) -> None:
+        """Record the calls of an attempt that failed or were cancelled."""
+        for call in attempt.calls:
+            if call.status == "ok":
+                continue
+            agent = call.handle
+            if call.status == "failed":
+                note = f"failed: {type(call.error).__name__}"
+            else:
+                note = "cancelled hedge" if call.hedge else "cancelled"
+            cost = agent.partial_cost(agent.describe(note))
+            costs.append(cost)
+            if spans is not None:
+                spans.append(agent.span(cost.usage.output_tokens, call.status))
+
+    @staticmethod
+    async def _cancel_attempts(
+        pending: dict[LadderLevel, _Attempt],
+        costs: list[CostRecord],
+        spans: list[Span] | None = None,
+    ) -> None:
+        """Cancel in-flight attempts, recording what each of their calls consumed."""
+        while pending:
+            _, attempt = pending.popitem()
+            attempt.task.cancel()
+            try:
+                response = await attempt.task
+            except (asyncio.CancelledError, Exception):
+                response = None
+            Orchestrator._record_calls(attempt, costs, spans)
+            if response is not None:
+                winner = next(call.handle for call in attempt.calls if call.status == "ok")
+                costs.append(
+                    response.cost.model_copy(update={"description": winner.describe("discarded")})
+                )
+                if spans is not None:
+                    spans.append(response.span.model_copy(update={"status": "discarded"}))
+
+    async def run(
+        self, task: str, context: str = "", priority: Priority | None = None
+    ) -> TaskResult:
+        """Classify a task, route to the appropriate agent, and handle escalation.
+
+        In speculative mode the intern attempt starts while classification is
+        still running, and a low-confidence classification races its level
+        against the next one up instead of bumping. Cancelled attempts are
+        recorded in ``costs`` with the tokens they consumed.
+
+        Each attempt's ``max_tokens`` comes from the output budget, which
+        learns answer lengths per category from finished runs. With routing
+        statistics, a task starts above its classified level when similar
+        tasks usually escalate from there, and every attempt is recorded.
+
+        With a preflight, the input is sized before the first attempt: levels
+        too small for the expected answer are skipped, oversized context is
+        shortened under its policy, and a task over the cost limit raises
+        ``BudgetExceededError`` before any agent call. Speculative mode then
+        starts the intern early only if its input fits as-is and its attempt
+        is within the cost limit.
+
+        With a scheduler, every call waits for rate-limit and spend capacity
+        at ``priority`` (interactive unless set), or raises
+        ``BackpressureError`` when the wait would be too long.
+
+        Every API call goes through the resilience policy: transient errors
+        are retried with backoff on the level's fallback models, and slow
+        calls may be hedged. Failed and cancelled calls appear in ``costs``.
+
+        With ``fan_out``, a task that reaches staff or principal is first
+        planned at that level into independent subtasks. These are classified
+        and routed like tasks of their own, concurrently, and the planning
+        level merges their answers. Their results form ``subtasks``, and
+        their costs are included in ``costs``.
+
+        With a context selector, each level sees the chunks of ``context`` and
+        of the indexed repository most relevant to the task, within its
+        ``context_budget_tokens``.
+
+        With a result cache, an exact repeat with the same options (fan-out,
+        speculation, context selection and policy) returns the stored result
+        without any API calls (unless a repository is indexed, as it may have
+        changed since). Timing spans for the run, classification and every
+        attempt are attached to the result and passed to the exporters.
+        """
+        if priority is not None:
+            token = current_priority.set(priority)
+            try:
+                return await self.run(task, context)
+            finally:
+                current_priority.reset(token)
+
+        started_at, t0 = time.time(), time.perf_counter()
+        result_cache = self.result_cache
+        if self.context_selector is not None and self.context_selector.repo is not None:
+            result_cache = None
+        if result_cache is not None:
+            cached = result_cache.get(task, context, self._result_options())
+            if cached is not None:
+                cached.spans = [_phase_span("run", started_at, t0, "cached")]
+                events = _events.get()
+                if events is not None:
+                    events.finish(cached.final_level, cached.response)
+                self._export(cached)
+                return cached
+
+        pending: dict[LadderLevel, _Attempt] = {}
+        try:
+            result = await self._run(task, context, pending)
+        finally:
+            await self._cancel_attempts(pending, [])
+        result.spans.insert(0, _phase_span("run", started_at, t0, "ok"))
+
+        if result_cache is not None:
+            result_cache.put(task, context, result, self._result_options())
+        self._export(result)
+        return result
+
+    async def stream(
+        self, task: str, context: str = "", priority: Priority | None = None
+    ) -> AsyncIterator[OrchestrationEvent]:
+        """Run a task like ``run``, yielding its events as they happen.
+
+        Phases are reported as they finish: ``classified``, ``preflight``,
+        ``plan`` and ``subtask`` (with fan-out), ``attempt`` for each level
+        tried, and ``escalated`` when a level hands off to the next. Between
+        them, ``token`` events carry the answer of the level being waited on
+        as it is generated; an escalating reply is never shown. The last event
+        is ``result``, with the TaskResult. Errors from the run are raised
+        from the iterator, and closing it early cancels the run.
+        """
+        events = _EventStream()
+        token = _events.set(events)
+        try:
+            run = asyncio.create_task(self.run(task, context, priority))
+        finally:
+            _events.reset(token)
+        run.add_done_callback(lambda _: events.queue.put_nowait(None))
+        try:
+            while (event := await events.queue.get()) is not None:
+                yield event
+            result = await run
+        finally:
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+        yield OrchestrationEvent(
+            type=EventType.result, level=result.final_level, result=result
+        )
+
+    def _export(self, result: TaskResult) -> None:
+        """Hand a finished result's spans to every exporter."""
+        for exporter in self.exporters:
+            try:
+                exporter.export(result)
+            except Exception:
+                logger.exception("Span exporter %r failed", exporter)
+
+    async def _plan(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        handoff: str,
+        costs: list[CostRecord],
+        spans: list[Span],
+    ) -> list[Subtask]:
+        """Ask ``level`` to split a task into independent subtasks.
+
+        A plan that cannot be had counts as no subtasks, so the task is done whole.
+        """
+        started_at, t0 = time.time(), time.perf_counter()
+        config = get_config(level)
+
+        async def plan(model: str) -> tuple[list[Subtask], CostRecord]:
+            params = plan_request(level, model, task, context, handoff)
+            async with self._admit(level, params) as reservation:
+                async with self._model_slot(model):
+                    message = await self.client.messages.create(**params)
+                subtasks = parse_plan(message)
+                usage = TokenUsage.from_api(message.usage)
+                cost = calculate_cost(
+                    level, usage, f"Plan ({len(subtasks)} subtasks)", model_id=model
+                )
+                if reservation is not None:
+                    reservation.settle(cost)
+            return subtasks, cost
+
+        calls: list[CallAttempt[None]] = []
+        try:
+            subtasks, cost = await self.resilience.call(
+                "plan",
+                [config.model_id, *config.fallback_model_ids],
+                lambda model: (None, plan(model)),
+                calls,
+            )
+        except Exception:
+            logger.warning(
+                "Planning at %s failed; doing the task whole", level.value, exc_info=True
+            )
+            subtasks, cost = [], None
+        costs.extend(
+            _unanswered_cost(
+                level, "Plan", plan_request(level, call.model_id, task, context, handoff), call
+            )
+            for call in calls
+            if call.status != "ok"
+        )
+        if cost is not None:
+            costs.append(cost)
+        status = "failed" if cost is None else "ok" if len(subtasks) > 1 else "whole"
+        span = _phase_span("plan", started_at, t0, status)
+        span.level = level
+        span.retries = sum(call.status == "failed" for call in calls)
+        spans.append(span)
+        _emit(
+            EventType.plan,
+            level=level,
+            subtasks=subtasks,
+            costs=[cost] if cost is not None else [],
+            span=span,
+        )
+        return subtasks
+
+    async def _run_subtask(
+        self, task: str, context: str, classified: _Classified | None = None
+    ) -> TaskResult:
+        """Route one subtask like a task of its own, without fanning it out again.
+
+        Its events are not streamed; the parent reports it once finished.
+        """
+        started_at, t0 = time.time(), time.perf_counter()
+        token = _preclassified.set((task, *classified) if classified else None)
+        events_token = _events.set(None)
+        pending: dict[LadderLevel, _Attempt] = {}
+        try:
+            result = await self._run(task, context, pending, fan_out=False)
+        finally:
+            await self._cancel_attempts(pending, [])
+            _events.reset(events_token)
+            _preclassified.reset(token)
+        result.spans.insert(0, _phase_span("run", started_at, t0, "ok"))
+        return result
+
+    async def _fan_out(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        handoff: str,
+        max_tokens: int,
+        costs: list[CostRecord],
+        spans: list[Span],
+        results: list[TaskResult],
+    ) -> AgentResponse | None:
+        """Plan a task at ``level``, run its subtasks concurrently and merge their answers.
+
+        The merge call writes only what ties the subtask answers together, and
+        its response text is that followed by the answers, so the planning
+        level never regenerates them. Subtask results are appended to
+        ``results``. Returns None (with only the plan recorded) when the plan
+        has fewer than two subtasks.
+        """
+        plan = await self._plan(level, task, context, handoff, costs, spans)
+        if len(plan) < 2:
+            return None
+
+        started_at, t0 = time.time(), time.perf_counter()
+        classified = await self._classify_many([subtask.task for subtask in plan])
+
+        async def run_subtask(subtask: Subtask, c: _Classified | None) -> TaskResult:
+            result = await self._run_subtask(subtask.task, context, c)
+            _emit(EventType.subtask, level=result.final_level, text=subtask.title, result=result)
+            return result
+
+        runs = [asyncio.create_task(run_subtask(*entry)) for entry in zip(plan, classified)]
+        try:
+            results.extend(await asyncio.gather(*runs))
+        except BaseException:
+            for run in runs:
+                run.cancel()
+            await asyncio.gather(*runs, return_exceptions=True)
+            raise
+        spans.append(_phase_span("fan_out", started_at, t0, "ok"))
+        for i, result in enumerate(results, 1):
+            costs.extend(
+                c.model_copy(update={"description": f"Subtask {i}: {c.description}"})
+                for c in result.costs
+            )
+
+        attempt = self._start_attempt(
+            level, merge_task(task, plan, results), context, max_tokens=max_tokens
+        )
+        events = _events.get()
+        if events is not None:
+            events.watch(level)
+        response = await attempt.task
+        recorded = len(costs)
+        self._record_calls(attempt, costs, spans)
+        costs.append(
+            response.cost.model_copy(update={"description": f"Merge: {response.cost.description}"})
+        )
+        spans.append(response.span)
+        _emit(EventType.attempt, level=level, costs=costs[recorded:], span=response.span)
+        if response.escalated:
+            return response
+        return response.model_copy(update={"text": merged_response(response.text, plan, results)})
+
+    async def _run(
+        self,
+        task: str,
+        context: str,
+        pending: dict[LadderLevel, _Attempt],
+        fan_out: bool = True,
+    ) -> TaskResult:
+        # Without a selector every level is sent ``context`` as preflight last
+        # fitted it; with one, each level is sent the chunks selected for it.
+        selected: dict[LadderLevel, str] = {}
+
+        async def context_for(lvl: LadderLevel) -> str:
+            if self.context_selector is None:
+                return context
+            if lvl not in selected:
+                selected[lvl] = await asyncio.to_thread(
+                    self.context_selector.select, lvl, task, context
+                )
+            return selected[lvl]
+
+        def use_fitted(plan: PreflightPlan) -> None:
+            nonlocal context
+            if self.context_selector is None:
+                context = plan.context
+            else:
+                selected[plan.estimate.level] = plan.context
+
+        if self.speculative:
+            intern_context = await context_for(LadderLevel.intern)
+            if await self._head_start_allowed(task, intern_context):
+                pending[LadderLevel.intern] = self._start_attempt(
+                    LadderLevel.intern, task, intern_context
+                )
+
+        classification, costs, classifier_span = await self._classify(task)
+        spans = [classifier_span]
+        events = _events.get()
+        _emit(
+            EventType.classified,
+            level=classification.level,
+            classification=classification,
+            costs=costs,
+            span=classifier_span,
+        )
         escalations: list[EscalationReason] = []
+        subtasks: list[TaskResult] = []
+        # Escalation reasons from lower levels, handed forward to the next one.
+        notes: list[tuple[LadderLevel, str]] = []
 
         level = classification.level
         initial_level = level
+        bumped = next_level(level)
+        low_confidence = classification.confidence < CONFIDENCE_THRESHOLD and bumped is not None
+        if self.routing is not None:
+            start = self.routing.start_level(classification)
+            if start != level:
+                # One reason per level skipped, like a low-confidence bump.
+                _emit(
+                    EventType.escalated,
+                    level=level,
+                    to_level=start,
+                    reason=EscalationReason.calibrated,
+                )
+                while level != start:
+                    escalations.append(EscalationReason.calibrated)
+                    level = next_level(level)
+                bumped, low_confidence = next_level(level), False
+
+        estimate = None
+        fitted = None
+        if self.preflight is not None:
+            # Size for the bumped level on low confidence, so the context also
+            # fits the level below it when the two are raced.
+            first = bumped if low_confidence else level
+            plan = await self._preflight(
+                first,
+                task,
+                await context_for(first),
+                costs,
+                spans,
+                first=True,
+                expected_output_tokens=self.output_budget.expected_tokens(classification),
+            )
+            estimate, fitted = plan.estimate, plan.estimate.level
+            use_fitted(plan)
+            if fitted != first:
+                # Levels below were skipped as too small for the expected answer.
+                level, low_confidence = fitted, False
+
+        def budget(lvl: LadderLevel) -> int:
+            return self.output_budget.max_tokens(classification, lvl)
+
+        def observe(lvl: LadderLevel, attempt: _Attempt, response: AgentResponse) -> None:
+            recorded = len(costs)
+            self._record_calls(attempt, costs, spans)
+            costs.append(response.cost)
+            spans.append(response.span)
+            _emit(EventType.attempt, level=lvl, costs=costs[recorded:], span=response.span)
+            if self.routing is not None:
+                wall_s = response.span.wall_s if response.span is not None else 0.0
+                self.routing.record(
+                    classification, lvl, response.escalated, response.cost.cost_usd, wall_s
+                )
+
+        def escalate(lvl: LadderLevel, response: AgentResponse) -> None:
+            escalations.append(EscalationReason.self_escalation)
+            if response.escalation_note:
+                notes.append((lvl, response.escalation_note))
+            _emit(
+                EventType.escalated,
+                level=lvl,
+                to_level=next_level(lvl),
+                reason=EscalationReason.self_escalation,
+                text=response.escalation_note or "",
+            )
 
-        # Bump level if classifier confidence is low
-        if classification.confidence < CONFIDENCE_THRESHOLD:
-            bumped = next_level(level)
-            if bumped is not None:
-                level = bumped
+        async def finish(final_level: LadderLevel, response: AgentResponse) -> TaskResult:
+            await self._cancel_attempts(pending, costs, spans)
+            if events is not None:
+                events.finish(final_level, response.text)
+            # A merged answer's length says nothing about answers done whole.
+            if not response.escalated and not response.truncated and not subtasks:
+                self.output_budget.record(classification, response.cost.usage.output_tokens)
+            return TaskResult(
+                task=task,
+                classification=classification,
+                initial_level=initial_level,
+                final_level=final_level,
+                response=response.text,
+                escalations=escalations,
+                costs=costs,
+                total_cost_usd=sum(c.cost_usd for c in costs),
+                truncated=response.truncated or any(sub.truncated for sub in subtasks),
+                spans=spans,
+                preflight=estimate,
+                subtasks=subtasks,
+            )
+
+        wanted = {level, bumped} if self.speculative and low_confidence else {level}
+        await self._cancel_attempts(
+            {lvl: pending.pop(lvl) for lvl in list(pending) if lvl not in wanted}, costs, spans
+        )
+
+        # Fan out at most once, at the first planning level the task reaches.
+        fan_out = fan_out and self.fan_out
+        escalation_count = 0
+        if low_confidence:
+            if self.speculative:
+                # Race the classified level against the next one up; keep the
+                # cheaper answer unless it escalates.
+                for lvl in (level, bumped):
+                    if lvl not in pending:
+                        pending[lvl] = self._start_attempt(
+                            lvl, task, await context_for(lvl), max_tokens=budget(lvl)
+                        )
+                attempt = pending.pop(level)
+                if events is not None:
+                    events.watch(level)
+                response = await attempt.task
+                observe(level, attempt, response)
+                if not response.escalated:
+                    return await finish(level, response)
+                escalate(level, response)
+                escalation_count += 1
+            else:
+                # Bump level if classifier confidence is low
                 escalations.append(EscalationReason.low_confidence)
+                _emit(
+                    EventType.escalated,
+                    level=level,
+                    to_level=bumped,
+                    reason=EscalationReason.low_confidence,
+                )
+            level = bumped
 
         # Run agent with escalation loop
-        escalation_count = 0
         while escalation_count <= MAX_ESCALATIONS:
-            agent = LadderAgent(self.client, level)
-            response = await agent.run(task, context)
-            costs.append(response.cost)
+            if fitted is not None and level != fitted and level not in pending:
+                plan = await self._preflight(level, task, await context_for(level), costs, spans)
+                level = fitted = plan.estimate.level
+                use_fitted(plan)
+            response = None
+            if fan_out and level in FAN_OUT_LEVELS and level not in pending:
+                fan_out = False
+                response = await self._fan_out(
+                    level,
+                    task,
+                    await context_for(level),
+                    handoff_note(notes),
+                    budget(level),
+                    costs,
+                    spans,
+                    subtasks,
+                )
+            if response is None:
+                attempt = pending.pop(level, None) or self._start_attempt(
+                    level, task, await context_for(level), handoff_note(notes), budget(level)
+                )
+                if events is not None:
+                    events.watch(level)
+                response = await attempt.task
+                observe(level, attempt, response)
 
             if not response.escalated:
-                total_cost = sum(c.cost_usd for c in costs)
-                return TaskResult(
-                    task=task,
-                    classification=classification,
-                    initial_level=initial_level,
-                    final_level=level,
-                    response=response.text,
-                    escalations=escalations,
-                    costs=costs,
-                    total_cost_usd=total_cost,
-                )
+                return await finish(level, response)
 
             # Agent requested escalation
-            escalations.append(EscalationReason.self_escalation)
+            escalate(level, response)
             escalation_count += 1
             higher = next_level(level)
             if higher is None:
                 # Already at principal — use the escalation response as-is
-                total_cost = sum(c.cost_usd for c in costs)
-                return TaskResult(
-                    task=task,
-                    classification=classification,
-                    initial_level=initial_level,
-                    final_level=level,
-                    response=response.text,
-                    escalations=escalations,
-                    costs=costs,
-                    total_cost_usd=total_cost,
-                )
+                return await finish(level, response)
             level = higher
 
         # Max escalations reached — return last response
-        total_cost = sum(c.cost_usd for c in costs)
-        return TaskResult(
-            task=task,
-            classification=classification,
-            initial_level=initial_level,
-            final_level=level,
-            response=response.text,
-            escalations=escalations,
-            costs=costs,
-            total_cost_usd=total_cost,
-        )
+        return await finish(level, response)
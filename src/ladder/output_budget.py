@@ -0,0 +1,100 @@
+"""Output token budgets sized from task complexity and observed answer lengths."""
+
+from __future__ import annotations
+
+import json
+import math
+import statistics
+from collections import defaultdict, deque
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+from .levels import get_config
+from .models import ClassificationResult, LadderLevel, TaskCategory
+
+DEFAULT_HISTORY_PATH = DEFAULT_CACHE_DIR / "output_lengths.json"
+
+# Starting budget per estimated complexity (1-10), before any history exists.
+COMPLEXITY_OUTPUT_TOKENS: dict[int, int] = {
+    1: 1024,
+    2: 1024,
+    3: 2048,
+    4: 2048,
+    5: 4096,
+    6: 4096,
+    7: 8192,
+    8: 8192,
+    9: 16384,
+    10: 32768,
+}
+MIN_OUTPUT_TOKENS = 512
+# Past answer lengths kept per category, newest last.
+HISTORY_SIZE = 500
+MIN_SAMPLES = 20
+# The budget is this multiple of the 95th percentile of similar past answers.
+HISTORY_HEADROOM = 1.25
+BUDGET_ROUNDING = 256
+
+
+class OutputBudget:
+    """Chooses ``max_tokens`` for each agent attempt.
+
+    With at least ``MIN_SAMPLES`` past answers in the task's category
+    (preferring those within one point of its complexity), the budget is
+    ``HISTORY_HEADROOM`` times their 95th percentile; otherwise it comes from
+    ``COMPLEXITY_OUTPUT_TOKENS``. A budget that proves too small costs a
+    continuation turn rather than a fresh call.
+    """
+
+    def __init__(self) -> None:
+        # (estimated complexity, output tokens) of finished answers.
+        self._history: defaultdict[TaskCategory, deque[tuple[int, int]]] = defaultdict(
+            lambda: deque(maxlen=HISTORY_SIZE)
+        )
+
+    def max_tokens(self, classification: ClassificationResult, level: LadderLevel) -> int:
+        """Output budget for running ``level`` on a classified task."""
+        return min(self.expected_tokens(classification), get_config(level).max_output_tokens)
+
+    def expected_tokens(self, classification: ClassificationResult) -> int:
+        """Output budget for a classified task before any level's cap."""
+        complexity = classification.estimated_complexity
+        samples = self._history.get(classification.category, ())
+        similar = [tokens for c, tokens in samples if abs(c - complexity) <= 1]
+        if len(similar) < MIN_SAMPLES:
+            similar = [tokens for _, tokens in samples]
+        if len(similar) >= MIN_SAMPLES:
+            p95 = statistics.quantiles(similar, n=20, method="inclusive")[-1]
+            budget = p95 * HISTORY_HEADROOM
+        else:
+            budget = COMPLEXITY_OUTPUT_TOKENS[complexity]
+        budget = math.ceil(budget / BUDGET_ROUNDING) * BUDGET_ROUNDING
+        return max(budget, MIN_OUTPUT_TOKENS)
+
+    def record(self, classification: ClassificationResult, output_tokens: int) -> None:
+        """Remember the length of a complete answer."""
+        self._history[classification.category].append(
+            (classification.estimated_complexity, output_tokens)
+        )
+
+    @property
+    def num_samples(self) -> int:
+        return sum(len(samples) for samples in self._history.values())
+
+    def save(self, path: str | Path = DEFAULT_HISTORY_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {category.value: list(samples) for category, samples in self._history.items()}
+        path.write_text(json.dumps(data))
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_HISTORY_PATH) -> OutputBudget:
+        """Load recorded answer lengths, starting empty if none exist."""
+        budget = cls()
+        path = Path(path)
+        if path.exists():
+            for category, samples in json.loads(path.read_text()).items():
+                budget._history[TaskCategory(category)].extend(
+                    (complexity, tokens) for complexity, tokens in samples
+                )
+        return budget
@@ -0,0 +1,331 @@
+"""Pre-flight input token counting, context fitting and cost estimates."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from anthropic import AsyncAnthropic
+
+from .agent import CHARS_PER_TOKEN, LadderAgent
+from .cache import CacheStats, MemoryCache
+from .cost import calculate_cost
+from .enums import ContextPolicy
+from .levels import get_config, next_level
+from .models import CostRecord, LadderLevel, PreflightEstimate, TokenUsage
+from .prompts import CONTEXT_SUMMARY_PROMPT
+
+# Truncation aims this far under the budget, since token counts of the
+# trimmed text are only known after re-counting.
+FIT_MARGIN = 0.95
+FIT_ATTEMPTS = 3
+# Upper bound on the length of a context summary.
+SUMMARY_MAX_TOKENS = 8192
+OMITTED_MARKER = "\n\n[... {n} characters omitted ...]\n\n"
+
+# Makes one preflight API call: the ``messages`` method ("count_tokens" or
+# "create"), the level it is made for and its parameters. Returns the response
+# and the model that served it, which may be a fallback of the same tier. The
+# orchestrator passes one that goes through its scheduler and resilience policy.
+ApiCall = Callable[[str, LadderLevel, dict], Awaitable[tuple[Any, str]]]
+
+
+class PreflightError(Exception):
+    """A task cannot be sent as given."""
+
+
+class ContextTooLargeError(PreflightError):
+    """The input does not fit the level's budget under the context policy."""
+
+
+class BudgetExceededError(PreflightError):
+    """The estimated cost of a task is over the caller's limit."""
+
+    def __init__(self, estimate: PreflightEstimate, max_cost_usd: float) -> None:
+        self.estimate = estimate
+        self.max_cost_usd = max_cost_usd
+        super().__init__(
+            f"Estimated cost ${estimate.estimated_cost_usd:.6f} at "
+            f"{estimate.level.value} exceeds the ${max_cost_usd:.6f} limit"
+        )
+
+
+def _text_of(content: object) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def estimate_tokens(params: dict) -> int:
+    """Rough input token count of a Messages API request, from its length."""
+    text = _text_of(params.get("system", "")) + "".join(
+        _text_of(m["content"]) for m in params["messages"]
+    )
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_middle(text: str, max_chars: int) -> str:
+    """Cut ``text`` to about ``max_chars``, keeping its head and tail."""
+    if len(text) <= max_chars:
+        return text
+    keep = max(max_chars - len(OMITTED_MARKER), 0)
+    head = keep * 3 // 4
+    tail = keep - head
+    marker = OMITTED_MARKER.format(n=len(text) - keep)
+    return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+class TokenCounter:
+    """Counts request input tokens, memoized by request content.
+
+    With ``use_api`` the counts come from the token-counting endpoint and are
+    exact; otherwise they are a local characters-per-token estimate.
+    """
+
+    def __init__(
+        self,
+        client: AsyncAnthropic | None = None,
+        use_api: bool = False,
+        max_entries: int = 4096,
+    ) -> None:
+        if use_api and client is None:
+            raise ValueError("use_api requires a client")
+        self.client = client
+        self.use_api = use_api
+        self.stats = CacheStats()
+        self._memo = MemoryCache(max_entries=max_entries)
+
+    async def count(
+        self, params: dict, call: ApiCall | None = None, level: LadderLevel | None = None
+    ) -> int:
+        """Input tokens of a request; with the API, counted through ``call`` if given."""
+        request = {k: params[k] for k in ("model", "system", "messages") if k in params}
+        key = hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+        memo = self._memo.get(key)
+        if memo is not None:
+            self.stats.hits += 1
+            return int(memo)
+        self.stats.misses += 1
+        if self.use_api and call is not None:
+            response, _ = await call("count_tokens", level, request)
+            tokens = response.input_tokens
+        elif self.use_api:
+            tokens = (await self.client.messages.count_tokens(**request)).input_tokens
+        else:
+            tokens = estimate_tokens(request)
+        self._memo.set(key, str(tokens))
+        return tokens
+
+
+@dataclass
+class PreflightPlan:
+    """The level and (possibly shortened) context to run a task with."""
+
+    estimate: PreflightEstimate
+    context: str
+    # Cost of calls made while fitting, e.g. summarizing the context.
+    costs: list[CostRecord] = field(default_factory=list)
+
+
+class Preflight:
+    """Sizes a request before it is sent and fits it to a level.
+
+    A level's input budget is its context window less its ``max_output_tokens``
+    (the API rejects requests whose sum exceeds the window), optionally capped
+    by ``max_input_tokens``. Input that does not fit is handled by ``policy``;
+    moving up the ladder would not help, as higher levels reserve more output
+    and so have smaller input budgets. A task is moved up only when its
+    expected answer is longer than a level's ``max_output_tokens``.
+    """
+
+    def __init__(
+        self,
+        client: AsyncAnthropic,
+        counter: TokenCounter | None = None,
+        policy: ContextPolicy = ContextPolicy.reject,
+        max_input_tokens: int | None = None,
+        max_cost_usd: float | None = None,
+    ) -> None:
+        self.client = client
+        self.counter = counter or TokenCounter(client)
+        self.policy = policy
+        self.max_input_tokens = max_input_tokens
+        self.max_cost_usd = max_cost_usd
+
+    def input_budget(self, level: LadderLevel) -> int:
+        config = get_config(level)
+        budget = config.context_window - config.max_output_tokens
+        if self.max_input_tokens is not None:
+            budget = min(budget, self.max_input_tokens)
+        return budget
+
+    async def count(
+        self, level: LadderLevel, task: str, context: str = "", call: ApiCall | None = None
+    ) -> int:
+        """Input tokens of running ``level`` on a task."""
+        params = LadderAgent(self.client, level).request_params(task, context)
+        return await self.counter.count(params, call, level)
+
+    async def check(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str = "",
+        expected_output_tokens: int = 0,
+        dry_run: bool = False,
+        call: ApiCall | None = None,
+    ) -> PreflightPlan:
+        """Plan the first attempt of a task and enforce the cost limit.
+
+        Levels whose ``max_output_tokens`` is below ``expected_output_tokens``
+        are skipped. A ``dry_run`` makes no API calls besides token counting
+        (a summary is assumed to fill the budget) and never raises
+        ``BudgetExceededError``. API calls go through ``call`` if given, or
+        straight to the client.
+        """
+        skipped = []
+        while expected_output_tokens > get_config(level).max_output_tokens:
+            higher = next_level(level)
+            if higher is None:
+                break
+            skipped.append(level)
+            level = higher
+
+        plan = await self.fit(level, task, context, expected_output_tokens, dry_run, call)
+        plan.estimate.skipped_levels[:0] = skipped
+        if (
+            not dry_run
+            and self.max_cost_usd is not None
+            and plan.estimate.estimated_cost_usd > self.max_cost_usd
+        ):
+            raise BudgetExceededError(plan.estimate, self.max_cost_usd)
+        return plan
+
+    async def fit(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str = "",
+        expected_output_tokens: int = 0,
+        dry_run: bool = False,
+        call: ApiCall | None = None,
+    ) -> PreflightPlan:
+        """Fit a task's input to ``level``, shortening the context under the policy if needed."""
+        tokens = await self.count(level, task, context, call)
+        if tokens <= self.input_budget(level):
+            return self._plan(level, [], tokens, expected_output_tokens, "none", context)
+
+        base = await self.count(level, task, call=call)
+        room = self.input_budget(level) - base
+        if room <= 0 or self.policy == ContextPolicy.reject:
+            raise ContextTooLargeError(
+                f"Input of {tokens} tokens exceeds the {self.input_budget(level)}-token "
+                f"budget of {level.value} (context policy: {self.policy.value})"
+            )
+
+        costs: list[CostRecord] = []
+        if self.policy == ContextPolicy.summarize:
+            if dry_run:
+                return self._plan(
+                    level, [], base + room, expected_output_tokens, "summarized", context
+                )
+            context, cost = await self._summarize(task, context, tokens - base, room, call)
+            costs.append(cost)
+            tokens = await self.count(level, task, context, call)
+            action = "summarized"
+        else:
+            action = "truncated"
+        if tokens > self.input_budget(level):
+            context, tokens = await self._truncate(
+                level, task, context, tokens, base, room, call
+            )
+        plan = self._plan(level, [], tokens, expected_output_tokens, action, context)
+        plan.costs = costs
+        plan.estimate.estimated_cost_usd += sum(c.cost_usd for c in costs)
+        return plan
+
+    def _plan(
+        self,
+        level: LadderLevel,
+        skipped: list[LadderLevel],
+        input_tokens: int,
+        expected_output_tokens: int,
+        action: str,
+        context: str,
+    ) -> PreflightPlan:
+        # Without an expected size, assume the worst case for the level.
+        max_output_tokens = get_config(level).max_output_tokens
+        output_tokens = min(expected_output_tokens or max_output_tokens, max_output_tokens)
+        usage = TokenUsage(input_tokens=input_tokens, output_tokens=output_tokens)
+        estimate = PreflightEstimate(
+            level=level,
+            skipped_levels=skipped,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            context_action=action,
+            estimated_cost_usd=calculate_cost(level, usage).cost_usd,
+        )
+        return PreflightPlan(estimate=estimate, context=context)
+
+    async def _truncate(
+        self,
+        level: LadderLevel,
+        task: str,
+        context: str,
+        tokens: int,
+        base: int,
+        room: int,
+        call: ApiCall | None = None,
+    ) -> tuple[str, int]:
+        """Drop the middle of the context until the input fits."""
+        trimmed = context
+        for _ in range(FIT_ATTEMPTS):
+            target = int(len(trimmed) * room / max(tokens - base, 1) * FIT_MARGIN)
+            trimmed = truncate_middle(context, target)
+            tokens = await self.count(level, task, trimmed, call)
+            if tokens <= self.input_budget(level):
+                return trimmed, tokens
+        raise ContextTooLargeError(
+            f"Could not truncate the context under the {self.input_budget(level)}-token "
+            f"budget of {level.value}"
+        )
+
+    async def _summarize(
+        self,
+        task: str,
+        context: str,
+        context_tokens: int,
+        room: int,
+        call: ApiCall | None = None,
+    ) -> tuple[str, CostRecord]:
+        """Condense the context with the intern model to at most ``room`` tokens."""
+        config = get_config(LadderLevel.intern)
+        max_tokens = min(room, SUMMARY_MAX_TOKENS)
+        system = CONTEXT_SUMMARY_PROMPT.format(max_tokens=max_tokens, task=task)
+        # The summarizer has its own window; pre-trim what it cannot read.
+        source_room = config.context_window - max_tokens - math.ceil(len(system) / CHARS_PER_TOKEN)
+        chars_per_token = len(context) / max(context_tokens, 1)
+        source = truncate_middle(context, int(source_room * chars_per_token * FIT_MARGIN))
+
+        params = {
+            "model": config.model_id,
+            "max_tokens": max_tokens,
+            "system": system,
+            "messages": [{"role": "user", "content": source}],
+        }
+        if call is None:
+            message, model = await self.client.messages.create(**params), config.model_id
+        else:
+            message, model = await call("create", LadderLevel.intern, params)
+        summary = "".join(block.text for block in message.content if block.type == "text")
+        cost = calculate_cost(
+            LadderLevel.intern,
+            TokenUsage.from_api(message.usage),
+            "Context summary",
+            model_id=model,
+        )
+        return summary, cost
@@ -2,7 +2,15 @@
 
 from __future__ import annotations
 
-from .models import LadderLevel
+from .enums import LadderLevel
+from .levels import get_config
+
+# Shortest prefix, in tokens, the API writes to the prompt cache (longer on
+# Haiku). A breakpoint ending a shorter prefix is ignored, so none is sent.
+MIN_CACHEABLE_TOKENS = 1024
+MIN_CACHEABLE_TOKENS_HAIKU = 2048
+# Same rough ratio as agent.CHARS_PER_TOKEN, used to size prefixes without a tokenizer.
+CHARS_PER_TOKEN = 4
 
 LEVEL_PROMPTS: dict[LadderLevel, str] = {
     LadderLevel.intern: (
@@ -94,3 +102,77 @@ CLASSIFIER_PROMPT = (
     "- reasoning: brief explanation of your classification\n"
     "- estimated_complexity: 1-10 scale"
 )
+
+CLASSIFIER_BATCH_PROMPT = (
+    "You will receive several tasks, each wrapped in a <task index=\"N\"> element. "
+    "Classify each task on its own, ignoring the others, and report all of them in a "
+    "single call to the record_classifications tool, with one entry per task index."
+)
+
+PLAN_PROMPT = (
+    "Before doing this task yourself, decide whether it splits into independent "
+    "subtasks that other engineers could do in parallel without seeing each other's "
+    "work, such as changes to separate files or modules. If it does, call the "
+    "plan_subtasks tool with 2 to {max_subtasks} subtasks, each self-contained: state "
+    "everything needed to do it, since its engineer sees only the subtask and the "
+    "shared context. If the task is small or its parts depend on each other, call "
+    "the tool with no subtasks."
+)
+
+MERGE_PROMPT = (
+    "Your team split the task below into independent subtasks and completed them; "
+    "their work follows and will be delivered after your reply, so do not repeat it. "
+    "Write only what ties it into one complete answer to the original task: how the "
+    "parts fit together, corrections where they conflict or are wrong, and anything "
+    "missing.\n\n"
+    "Original task:\n{task}"
+)
+
+CONTEXT_SUMMARY_PROMPT = (
+    "You condense background material for a software engineer who will work on "
+    "the task below. Keep file paths, identifiers, signatures, error messages and "
+    "anything the task refers to verbatim; drop boilerplate and unrelated code. "
+    "Reply with the condensed material only, in at most {max_tokens} tokens.\n\n"
+    "Task:\n{task}"
+)
+
+
+def min_cacheable_tokens(model: str) -> int:
+    """Shortest prompt prefix ``model`` will cache."""
+    return MIN_CACHEABLE_TOKENS_HAIKU if "haiku" in model else MIN_CACHEABLE_TOKENS
+
+
+def cached_blocks(texts: list[str], model: str) -> list[dict]:
+    """Text blocks, each marked as a cache breakpoint once the prefix it ends can be cached."""
+    blocks = []
+    chars = 0
+    for text in texts:
+        chars += len(text)
+        block = {"type": "text", "text": text}
+        if chars // CHARS_PER_TOKEN >= min_cacheable_tokens(model):
+            block["cache_control"] = {"type": "ephemeral"}
+        blocks.append(block)
+    return blocks
+
+
+def agent_system(level: LadderLevel, context: str = "", model: str = "") -> list[dict]:
+    """System blocks for an agent call on ``model`` (the level's own by default).
+
+    The shared context comes first so that its cached prefix is reused by
+    every level on the same model, including after an escalation. The level
+    prompts alone are too short to cache, so only a long enough context gets
+    breakpoints.
+    """
+    texts = [f"Context:\n{context}"] if context else []
+    texts.append(LEVEL_PROMPTS[level])
+    return cached_blocks(texts, model or get_config(level).model_id)
+
+
+def handoff_note(notes: list[tuple[LadderLevel, str]]) -> str:
+    """Compact hand-off from lower levels that escalated the task."""
+    if not notes:
+        return ""
+    lines = ["Earlier attempts escalated this task to you with these notes:"]
+    lines += [f"- {level.value}: {note}" for level, note in notes]
+    lines.append("Build on their analysis rather than repeating it.")
+    return "\n".join(lines)
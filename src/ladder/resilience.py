@@ -0,0 +1,283 @@
+"""Retries with jittered backoff, hedged requests, model fallbacks and circuit breakers."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+import anthropic
+
+# Statuses worth retrying: timeouts, conflicts, rate limits, server errors and overload.
+_RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Error types reported by an error event inside an otherwise successful stream.
+_RETRYABLE_ERROR_TYPES = {"api_error", "overloaded_error", "rate_limit_error"}
+# Latency samples kept per kind of call and model.
+LATENCY_WINDOW = 200
+# SDK-level retries for clients used with Resilience. The SDK's own retries
+# would multiply ours, unseen by the breaker, hedging and cost records.
+CLIENT_MAX_RETRIES = 0
+
+H = TypeVar("H")
+T = TypeVar("T")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an API error is transient, so the same request may succeed later."""
+    if isinstance(exc, anthropic.APIConnectionError):
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        if exc.status_code in _RETRYABLE_STATUSES or exc.status_code >= 500:
+            return True
+        error = exc.body.get("error") if isinstance(exc.body, dict) else None
+        return isinstance(error, dict) and error.get("type") in _RETRYABLE_ERROR_TYPES
+    return False
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """The server's retry-after for an error, in seconds, if it sent one."""
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter on retryable errors."""
+
+    max_retries: int = 3
+    base_delay_s: float = 0.5
+    max_delay_s: float = 30.0
+
+    def delay(self, retry: int, after: float | None = None) -> float:
+        """Seconds to wait before retry number ``retry`` (from 1).
+
+        A server's retry-after is a floor, since retrying sooner would fail again.
+        """
+        delay = random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** (retry - 1)))
+        return delay if after is None else max(delay, after)
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to fire a duplicate of a slow call.
+
+    A call still waiting after the ``quantile`` of recent latencies for its
+    model gets a duplicate (up to ``max_hedges``); whichever finishes first
+    wins and the rest are cancelled. Until ``min_samples`` latencies are
+    known, ``initial_delay_s`` is used, and None means no hedging yet.
+    """
+
+    quantile: float = 0.95
+    min_samples: int = 20
+    max_hedges: int = 1
+    initial_delay_s: float | None = None
+
+
+class LatencyTracker:
+    """Recent call latencies per key, for hedging thresholds."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self._samples: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, key: str, seconds: float) -> None:
+        self._samples[key].append(seconds)
+
+    def quantile(self, key: str, q: float, min_samples: int = 1) -> float | None:
+        samples = self._samples.get(key, ())
+        if len(samples) < max(min_samples, 2):
+            return None
+        return statistics.quantiles(samples, n=100, method="inclusive")[round(q * 100) - 1]
+
+
+class CircuitBreaker:
+    """Stops sending calls to a model after ``failure_threshold`` consecutive failures.
+
+    An open circuit stays open for ``reset_after_s``. Then it is half-open:
+    one trial call is let through per ``reset_after_s``, and its outcome
+    closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_after_s: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self._failures: defaultdict[str, int] = defaultdict(int)
+        self._opened_at: dict[str, float] = {}
+        self._trial_at: dict[str, float] = {}
+
+    def state(self, model_id: str) -> str:
+        opened_at = self._opened_at.get(model_id)
+        if opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - opened_at < self.reset_after_s else "half_open"
+
+    def allow(self, model_id: str) -> bool:
+        """Whether a call may go to ``model_id`` now; claims the trial of a half-open circuit."""
+        state = self.state(model_id)
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half_open" and now - self._trial_at.get(model_id, 0.0) >= self.reset_after_s:
+            self._trial_at[model_id] = now
+            return True
+        return False
+
+    def record_success(self, model_id: str) -> None:
+        self._failures.pop(model_id, None)
+        self._opened_at.pop(model_id, None)
+        self._trial_at.pop(model_id, None)
+
+    def record_failure(self, model_id: str) -> None:
+        self._failures[model_id] += 1
+        if model_id in self._opened_at or self._failures[model_id] >= self.failure_threshold:
+            self._opened_at[model_id] = time.monotonic()
+
+
+@dataclass
+class CallAttempt(Generic[H]):
+    """One API call made towards a logical call: ok, failed or cancelled."""
+
+    model_id: str
+    handle: H
+    hedge: bool = False
+    status: str = "running"
+    error: BaseException | None = None
+
+
+class Resilience:
+    """Runs a logical API call with retries, hedging, fallback models and circuit breaking.
+
+    Hedging is off unless a ``HedgePolicy`` is given.
+    """
+
+    def __init__(
+        self,
+        retry: RetryPolicy | None = None,
+        hedge: HedgePolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+
+    def choose(self, models: Sequence[str], after: str | None = None) -> str:
+        """The first model after ``after`` (cyclically) whose circuit allows a call.
+
+        When every circuit is open, the one that would be tried first anyway.
+        """
+        start = 0 if after is None else (models.index(after) + 1) % len(models)
+        ordered = [*models[start:], *models[:start]]
+        return next((m for m in ordered if self.breaker.allow(m)), ordered[0])
+
+    async def call(
+        self,
+        kind: str,
+        models: Sequence[str],
+        start: Callable[[str], tuple[H, Awaitable[T]]],
+        attempts: list[CallAttempt[H]],
+        first_output: Callable[[H], float | None] | None = None,
+    ) -> T:
+        """Run ``start(model_id)`` until a call succeeds, and return its result.
+
+        ``start`` returns a handle and the call itself. Every call is appended
+        to ``attempts`` with its outcome, so the caller can cost the ones that
+        failed or lost a hedge even when this raises. A retryable error moves
+        on to the next model in ``models`` whose circuit is closed, with a
+        jittered backoff before a model that already failed is tried again.
+
+        ``first_output`` gives a call's seconds to first output, or None if it
+        has produced none yet. With it, hedging thresholds are based on time
+        to first output and a call that is already streaming is never hedged.
+        """
+        failed: set[str] = set()
+        retries = 0
+        model = self.choose(models)
+        while True:
+            try:
+                return await self._hedged(kind, model, start, attempts, first_output)
+            except Exception as exc:
+                if not is_retryable(exc) or retries >= self.retry.max_retries:
+                    raise
+                retries += 1
+                failed.add(model)
+                model = self.choose(models, after=model)
+                if model in failed:
+                    await asyncio.sleep(self.retry.delay(retries, retry_after(exc)))
+
+    def _hedge_delay(self, key: str) -> float | None:
+        if self.hedge is None:
+            return None
+        delay = self.latencies.quantile(key, self.hedge.quantile, self.hedge.min_samples)
+        return self.hedge.initial_delay_s if delay is None else delay
+
+    async def _hedged(
+        self,
+        kind: str,
+        model: str,
+        start: Callable[[str], tuple[H, Awaitable[T]]],
+        attempts: list[CallAttempt[H]],
+        first_output: Callable[[H], float | None] | None,
+    ) -> T:
+        """Run one call to ``model``, duplicating it if it is slower than usual."""
+        key = f"{kind}:{model}"
+        delay = self._hedge_delay(key)
+        t0 = time.monotonic()
+        running: dict[asyncio.Future[T], CallAttempt[H]] = {}
+        hedges = 0
+
+        def launch(hedge: bool) -> None:
+            handle, call = start(model)
+            attempt = CallAttempt(model, handle, hedge)
+            attempts.append(attempt)
+            running[asyncio.ensure_future(call)] = attempt
+
+        launch(hedge=False)
+        error: BaseException | None = None
+        try:
+            while running:
+                timeout = None
+                if delay is not None and hedges < self.hedge.max_hedges:
+                    timeout = max(t0 + delay * (hedges + 1) - time.monotonic(), 0.0)
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if first_output is not None and any(
+                        first_output(a.handle) is not None for a in running.values()
+                    ):
+                        # Already streaming; a duplicate would not finish sooner.
+                        delay = None
+                    else:
+                        hedges += 1
+                        launch(hedge=True)
+                    continue
+                for future in done:
+                    attempt = running.pop(future)
+                    exc = future.exception()
+                    if exc is None:
+                        attempt.status = "ok"
+                        self.breaker.record_success(model)
+                        latency = first_output(attempt.handle) if first_output else None
+                        self.latencies.record(
+                            key, time.monotonic() - t0 if latency is None else latency
+                        )
+                        return future.result()
+                    attempt.status, attempt.error = "failed", exc
+                    if is_retryable(exc):
+                        self.breaker.record_failure(model)
+                    error = exc
+            raise error
+        finally:
+            for future, attempt in running.items():
+                future.cancel()
+                attempt.status = "cancelled"
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
@@ -0,0 +1,88 @@
+"""Opt-in cache of complete TaskResults for exact repeat requests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR, CacheBackend, CacheStats, MemoryCache, SQLiteCache
+from .classifier import classifier_fingerprint
+from .levels import LEVEL_CONFIGS
+from .models import TaskResult
+from .prompts import LEVEL_PROMPTS
+
+RESULT_CACHE_TTL = 24 * 3600
+
+
+def config_fingerprint() -> str:
+    """Hash of every level's model, budget and prompt plus the classifier config.
+
+    The final level is only known after a run, so a result is keyed on the
+    configuration of all levels it could have finished at.
+    """
+    config = {
+        level.value: [cfg.model_id, cfg.max_output_tokens, LEVEL_PROMPTS[level]]
+        for level, cfg in LEVEL_CONFIGS.items()
+    }
+    config["classifier"] = classifier_fingerprint()
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """Caches TaskResults keyed on task, context hash and model/prompt configuration.
+
+    The key also covers ``options``, the caller's settings that change the
+    answer to the same input (e.g. fan-out or how context is selected), so a
+    result is never served under other options. Hits come back marked
+    ``cached=True`` with no cost records, since they made no API calls.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.stats = CacheStats()
+        self._fingerprint = config_fingerprint()
+
+    @classmethod
+    def memory(
+        cls,
+        max_entries: int = 1024,
+        max_bytes: int | None = 64 * 1024 * 1024,
+        ttl: float | None = RESULT_CACHE_TTL,
+    ) -> ResultCache:
+        return cls(MemoryCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes))
+
+    @classmethod
+    def sqlite(
+        cls,
+        path: str | Path | None = None,
+        max_entries: int = 50_000,
+        max_bytes: int | None = 512 * 1024 * 1024,
+        ttl: float | None = RESULT_CACHE_TTL,
+    ) -> ResultCache:
+        path = path or DEFAULT_CACHE_DIR / "results.sqlite3"
+        return cls(SQLiteCache(path, max_entries=max_entries, ttl=ttl, max_bytes=max_bytes))
+
+    def key(self, task: str, context: str = "", options: dict | None = None) -> str:
+        task_hash = hashlib.sha256(task.encode()).hexdigest()
+        context_hash = hashlib.sha256(context.encode()).hexdigest()
+        options_json = json.dumps(options or {}, sort_keys=True)
+        options_hash = hashlib.sha256(options_json.encode()).hexdigest()[:16]
+        return f"{self._fingerprint}:{options_hash}:{task_hash}:{context_hash}"
+
+    def get(
+        self, task: str, context: str = "", options: dict | None = None
+    ) -> TaskResult | None:
+        value = self.backend.get(self.key(task, context, options))
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        result = TaskResult.model_validate_json(value)
+        return result.model_copy(update={"costs": [], "total_cost_usd": 0.0, "cached": True})
+
+    def put(
+        self, task: str, context: str, result: TaskResult, options: dict | None = None
+    ) -> None:
+        self.backend.set(self.key(task, context, options), result.model_dump_json())
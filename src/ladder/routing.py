@@ -0,0 +1,237 @@
+"""Escalation outcomes per kind of task, used to choose the level a task starts at."""
+
+from __future__ import annotations
+
+import json
+import random
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .cache import DEFAULT_CACHE_DIR
+from .enums import LadderLevel, TaskCategory
+from .levels import next_level
+
+if TYPE_CHECKING:
+    from .models import ClassificationResult
+
+DEFAULT_STATS_PATH = DEFAULT_CACHE_DIR / "routing_stats.json"
+
+# Upper bound of each estimated-complexity (1-10) bucket; tasks in a bucket share statistics.
+COMPLEXITY_BUCKETS = ((3, "low"), (6, "medium"), (10, "high"))
+# Attempts at a level before its escalation rate is trusted enough to skip it.
+MIN_SAMPLES = 10
+# Counts are halved at this many attempts, so old outcomes fade as models and prompts change.
+HISTORY_SIZE = 200
+# What a second of waiting is worth in USD when trading latency against cost.
+LATENCY_USD_PER_S = 0.005
+# Share of the expected score a skip must save, so near-ties do not move tasks up on noise.
+MIN_SAVING = 0.05
+# Share of tasks started at their classified level anyway, so its statistics stay current.
+EXPLORE_RATE = 0.05
+
+# (category, classified level, complexity bucket)
+RoutingKey = tuple[TaskCategory, LadderLevel, str]
+
+
+def complexity_bucket(complexity: int) -> str:
+    return next(name for bound, name in COMPLEXITY_BUCKETS if complexity <= bound)
+
+
+@dataclass
+class LevelOutcomes:
+    """How attempts at one level went for one kind of task."""
+
+    attempts: float = 0.0
+    escalations: float = 0.0
+    cost_usd: float = 0.0
+    wall_s: float = 0.0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.attempts if self.attempts else 0.0
+
+    @property
+    def mean_cost_usd(self) -> float:
+        return self.cost_usd / self.attempts if self.attempts else 0.0
+
+    @property
+    def mean_wall_s(self) -> float:
+        return self.wall_s / self.attempts if self.attempts else 0.0
+
+    def add(self, escalated: bool, cost_usd: float, wall_s: float) -> None:
+        if self.attempts >= HISTORY_SIZE:
+            self.attempts /= 2
+            self.escalations /= 2
+            self.cost_usd /= 2
+            self.wall_s /= 2
+        self.attempts += 1
+        self.escalations += escalated
+        self.cost_usd += cost_usd
+        self.wall_s += wall_s
+
+
+class RoutingStats:
+    """Chooses where on the ladder a classified task starts, from past escalations.
+
+    Every agent attempt is recorded under the task's category, classified
+    level and complexity bucket. Starting at a level is scored as its mean
+    cost plus ``latency_usd_per_s`` times its mean wall time, plus the score
+    of the level above weighted by how often this one escalates. A level is
+    skipped only when it has ``min_samples`` attempts and starting above it
+    scores at least ``MIN_SAVING`` lower. Levels not yet tried for a kind of
+    task are assumed to answer, at their mean cost across all kinds of task.
+    """
+
+    def __init__(
+        self,
+        min_samples: int = MIN_SAMPLES,
+        latency_usd_per_s: float = LATENCY_USD_PER_S,
+        explore_rate: float = EXPLORE_RATE,
+        seed: int | None = None,
+    ) -> None:
+        self.min_samples = min_samples
+        self.latency_usd_per_s = latency_usd_per_s
+        self.explore_rate = explore_rate
+        self._outcomes: defaultdict[RoutingKey, dict[LadderLevel, LevelOutcomes]] = defaultdict(
+            dict
+        )
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def key(classification: ClassificationResult) -> RoutingKey:
+        return (
+            classification.category,
+            classification.level,
+            complexity_bucket(classification.estimated_complexity),
+        )
+
+    def record(
+        self,
+        classification: ClassificationResult,
+        level: LadderLevel,
+        escalated: bool,
+        cost_usd: float,
+        wall_s: float,
+    ) -> None:
+        """Remember how an attempt at ``level`` went for a classified task."""
+        outcomes = self._outcomes[self.key(classification)]
+        outcomes.setdefault(level, LevelOutcomes()).add(escalated, cost_usd, wall_s)
+
+    def _pooled(self, level: LadderLevel) -> LevelOutcomes | None:
+        """Outcomes at ``level`` across every kind of task."""
+        pooled = LevelOutcomes()
+        for outcomes in self._outcomes.values():
+            if level in outcomes:
+                for name, value in asdict(outcomes[level]).items():
+                    setattr(pooled, name, getattr(pooled, name) + value)
+        return pooled if pooled.attempts else None
+
+    def expected_score(self, key: RoutingKey, level: LadderLevel) -> float | None:
+        """Expected cost plus priced latency of starting at ``level`` and escalating as before.
+
+        None when some level that may be reached has never been tried.
+        """
+        outcomes = self._outcomes.get(key, {})
+        score, reach = 0.0, 1.0
+        current: LadderLevel | None = level
+        while current is not None and reach > 0:
+            seen = outcomes.get(current)
+            mean = seen if seen is not None else self._pooled(current)
+            if mean is None:
+                return None
+            score += reach * (mean.mean_cost_usd + self.latency_usd_per_s * mean.mean_wall_s)
+            if seen is not None and seen.attempts >= self.min_samples:
+                reach *= seen.escalation_rate
+            else:
+                reach = 0.0
+            current = next_level(current)
+        return score
+
+    def best_start(self, key: RoutingKey) -> LadderLevel:
+        """The starting level with the lowest expected score for a kind of task."""
+        classified = key[1]
+        best, best_score = classified, self.expected_score(key, classified)
+        if best_score is None:
+            return best
+        outcomes = self._outcomes.get(key, {})
+        level = classified
+        while (higher := next_level(level)) is not None:
+            seen = outcomes.get(level)
+            if seen is None or seen.attempts < self.min_samples:
+                break
+            score = self.expected_score(key, higher)
+            if score is None:
+                break
+            if score < best_score * (1 - MIN_SAVING):
+                best, best_score = higher, score
+            level = higher
+        return best
+
+    def start_level(self, classification: ClassificationResult) -> LadderLevel:
+        """Where to start a classified task; its classified level when exploring."""
+        if self._random.random() < self.explore_rate:
+            return classification.level
+        return self.best_start(self.key(classification))
+
+    def items(self) -> list[tuple[RoutingKey, dict[LadderLevel, LevelOutcomes]]]:
+        order = list(LadderLevel)
+        return sorted(
+            ((key, dict(outcomes)) for key, outcomes in self._outcomes.items()),
+            key=lambda item: (item[0][0].value, order.index(item[0][1]), item[0][2]),
+        )
+
+    def to_dict(self) -> list[dict]:
+        return [
+            {
+                "category": category.value,
+                "level": level.value,
+                "complexity": bucket,
+                "start": self.best_start((category, level, bucket)).value,
+                "outcomes": {lvl.value: asdict(o) for lvl, o in outcomes.items()},
+            }
+            for (category, level, bucket), outcomes in self.items()
+        ]
+
+    def save(self, path: str | Path = DEFAULT_STATS_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_STATS_PATH, **kwargs) -> RoutingStats:
+        """Load recorded outcomes, starting empty if none exist."""
+        stats = cls(**kwargs)
+        path = Path(path)
+        if path.exists():
+            for entry in json.loads(path.read_text()):
+                key = (
+                    TaskCategory(entry["category"]),
+                    LadderLevel(entry["level"]),
+                    entry["complexity"],
+                )
+                stats._outcomes[key] = {
+                    LadderLevel(lvl): LevelOutcomes(**o) for lvl, o in entry["outcomes"].items()
+                }
+        return stats
+
+
+def format_routing_table(stats: RoutingStats) -> str:
+    """Format recorded outcomes and the chosen start level per kind of task."""
+    items = stats.items()
+    if not items:
+        return "No routing outcomes recorded."
+    lines = []
+    for (category, level, bucket), outcomes in items:
+        start = stats.best_start((category, level, bucket))
+        note = f"start at {start.value}" if start != level else "start as classified"
+        lines.append(f"{category.value} / {level.value} / {bucket} complexity: {note}")
+        for lvl in LadderLevel:
+            if lvl in outcomes:
+                o = outcomes[lvl]
+                lines.append(
+                    f"  {lvl.value:<10} {o.escalation_rate:6.1%} escalate of {o.attempts:>6,.0f}"
+                    f"   ${o.mean_cost_usd:.6f} avg   {o.mean_wall_s:6.2f}s avg"
+                )
+    return "\n".join(lines)
@@ -0,0 +1,343 @@
+"""Rate-limit and spend-aware admission of API calls, with priorities and backpressure."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+import anthropic
+
+from .levels import RateLimits, get_rate_limits
+from .models import CostRecord
+from .resilience import retry_after
+
+# Pause applied to a model after a 429 or 529 without a retry-after header.
+DEFAULT_BACKOFF_S = 5.0
+SPEND_WINDOW_S = 3600.0
+# HTTP statuses that mean the model is saturated rather than the request being bad.
+_SATURATED_STATUSES = {429, 529}
+
+
+class Priority(IntEnum):
+    """Scheduling priority; lower values are admitted first."""
+
+    interactive = 0
+    batch = 1
+
+
+# Priority of the calls made on behalf of the current task.
+current_priority: ContextVar[Priority] = ContextVar(
+    "ladder_priority", default=Priority.interactive
+)
+
+
+class BackpressureError(Exception):
+    """The scheduler will not admit a call soon enough; try again after ``retry_after``."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A bucket refilled continuously at ``per_minute`` units per minute.
+
+    The level may go negative when actual usage exceeds what was reserved;
+    the debt is paid back by refill before anything else is admitted.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (capped at capacity) is available."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    input_tokens: int = field(compare=False)
+    output_tokens: int = field(compare=False)
+    cost_usd: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class _ModelLimiter:
+    """Buckets and the priority queue of waiting calls for one model."""
+
+    def __init__(self, limits: RateLimits | None) -> None:
+        self.requests = self.input = self.output = None
+        if limits is not None:
+            self.requests = TokenBucket(limits.requests_per_min)
+            self.input = TokenBucket(limits.input_tokens_per_min)
+            self.output = TokenBucket(limits.output_tokens_per_min)
+        self.queue: list[_Waiter] = []
+        self.paused_until = 0.0
+        self.timer: asyncio.TimerHandle | None = None
+
+    def wait_time(self, input_tokens: int, output_tokens: int, now: float) -> float:
+        wait = max(self.paused_until - now, 0.0)
+        if self.requests is not None:
+            wait = max(
+                wait,
+                self.requests.wait_time(1, now),
+                self.input.wait_time(input_tokens, now),
+                self.output.wait_time(output_tokens, now),
+            )
+        return wait
+
+    def take(self, input_tokens: int, output_tokens: int, now: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1, now)
+            self.input.take(input_tokens, now)
+            self.output.take(output_tokens, now)
+
+
+class Reservation:
+    """Capacity granted to one call; settle it with the call's actual cost."""
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        model_id: str,
+        input_tokens: int,
+        output_tokens: int,
+        cost_usd: float,
+    ) -> None:
+        self.scheduler = scheduler
+        self.model_id = model_id
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cost_usd = cost_usd
+        self.settled = False
+
+    def settle(self, cost: CostRecord | None = None) -> None:
+        """Replace the reservation with actual usage; without a cost, refund it."""
+        if not self.settled:
+            self.settled = True
+            self.scheduler._settle(self, cost)
+
+
+class Scheduler:
+    """Admits API calls within per-model token buckets and a global spend cap.
+
+    Each model has buckets for requests, input tokens and output tokens per
+    minute, taken from ``LEVEL_CONFIGS`` unless overridden. A call reserves its
+    estimated input, its ``max_tokens`` and its worst-case cost, and is given
+    back the difference when it settles. Waiting calls are admitted in
+    priority order per model, so interactive tasks overtake bulk ones. A 429
+    or 529 pauses the model for its retry-after period, so queued calls wait
+    instead of piling onto an overloaded endpoint.
+
+    When a call would wait longer than ``max_wait`` seconds, or ``max_queue``
+    calls are already waiting for its model, ``reserve`` raises
+    ``BackpressureError`` rather than queueing it.
+    """
+
+    def __init__(
+        self,
+        rate_limits: dict[str, RateLimits] | None = None,
+        max_usd_per_hour: float | None = None,
+        max_queue: int | None = None,
+        max_wait: float | None = None,
+    ) -> None:
+        self.rate_limits = rate_limits or {}
+        self.max_usd_per_hour = max_usd_per_hour
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._models: dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+        # Settled spend as (monotonic time, USD), plus worst-case cost of calls in flight.
+        self._spend: deque[tuple[float, float]] = deque()
+        self._spent = 0.0
+        self._reserved = 0.0
+
+    def _limiter(self, model_id: str) -> _ModelLimiter:
+        limiter = self._models.get(model_id)
+        if limiter is None:
+            limits = self.rate_limits.get(model_id) or get_rate_limits(model_id)
+            limiter = self._models[model_id] = _ModelLimiter(limits)
+        return limiter
+
+    @property
+    def spent_last_hour(self) -> float:
+        cutoff = time.monotonic() - SPEND_WINDOW_S
+        while self._spend and self._spend[0][0] <= cutoff:
+            self._spent -= self._spend.popleft()[1]
+        return max(self._spent, 0.0)
+
+    def queue_depth(self, model_id: str | None = None) -> int:
+        """Calls waiting for admission, for one model or in total."""
+        limiters = [self._limiter(model_id)] if model_id else self._models.values()
+        return sum(sum(not w.future.done() for w in l.queue) for l in limiters)
+
+    def _spend_wait(self, cost_usd: float, now: float) -> float | None:
+        """Seconds until ``cost_usd`` fits under the hourly cap; None if only a settle helps."""
+        if self.max_usd_per_hour is None:
+            return 0.0
+        excess = self.spent_last_hour + self._reserved + cost_usd - self.max_usd_per_hour
+        if excess <= 0:
+            return 0.0
+        for at, cost in self._spend:
+            excess -= cost
+            if excess <= 0:
+                return at + SPEND_WINDOW_S - now
+        return None
+
+    def estimated_wait(self, model_id: str, input_tokens: int, output_tokens: int) -> float:
+        """Rough seconds before a new call for ``model_id`` would be admitted."""
+        now = time.monotonic()
+        limiter = self._limiter(model_id)
+        queued_in = sum(w.input_tokens for w in limiter.queue if not w.future.done())
+        queued_out = sum(w.output_tokens for w in limiter.queue if not w.future.done())
+        wait = limiter.wait_time(input_tokens + queued_in, output_tokens + queued_out, now)
+        if limiter.requests is not None:
+            queued = self.queue_depth(model_id)
+            wait = max(wait, limiter.requests.wait_time(queued + 1, now))
+        return wait
+
+    async def reserve(
+        self,
+        model_id: str,
+        input_tokens: int,
+        output_tokens: int,
+        cost_usd: float = 0.0,
+        priority: Priority | None = None,
+    ) -> Reservation:
+        """Wait for capacity for one call and reserve it."""
+        if priority is None:
+            priority = current_priority.get()
+        if self.max_usd_per_hour is not None and cost_usd > self.max_usd_per_hour:
+            raise BackpressureError(
+                f"Estimated cost ${cost_usd:.4f} exceeds the hourly cap", SPEND_WINDOW_S
+            )
+        limiter = self._limiter(model_id)
+        if self.max_queue is not None and self.queue_depth(model_id) >= self.max_queue:
+            raise BackpressureError(
+                f"{self.max_queue} calls already queued for {model_id}",
+                self.estimated_wait(model_id, input_tokens, output_tokens),
+            )
+        if self.max_wait is not None:
+            wait = self.estimated_wait(model_id, input_tokens, output_tokens)
+            if wait > self.max_wait:
+                raise BackpressureError(
+                    f"{model_id} is saturated (estimated wait {wait:.1f}s)", wait
+                )
+
+        waiter = _Waiter(
+            priority=int(priority),
+            seq=next(self._seq),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=cost_usd,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(limiter.queue, waiter)
+        self._dispatch(model_id)
+        reservation = Reservation(self, model_id, input_tokens, output_tokens, cost_usd)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted, then cancelled before resuming: no call will be made.
+                if limiter.requests is not None:
+                    limiter.requests.give(1)
+                reservation.settle()
+            raise
+        return reservation
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model_id: str,
+        input_tokens: int,
+        output_tokens: int,
+        cost_usd: float = 0.0,
+    ) -> AsyncIterator[Reservation]:
+        """Reserve capacity for the duration of a call.
+
+        A reservation left unsettled is refunded on exit. Saturation errors
+        from the API pause the model before propagating.
+        """
+        reservation = await self.reserve(model_id, input_tokens, output_tokens, cost_usd)
+        try:
+            yield reservation
+        except anthropic.APIStatusError as exc:
+            if exc.status_code in _SATURATED_STATUSES:
+                after = retry_after(exc)
+                self.backoff(model_id, DEFAULT_BACKOFF_S if after is None else after)
+            raise
+        finally:
+            reservation.settle()
+
+    def backoff(self, model_id: str, seconds: float = DEFAULT_BACKOFF_S) -> None:
+        """Stop admitting calls to a model for ``seconds``."""
+        limiter = self._limiter(model_id)
+        limiter.paused_until = max(limiter.paused_until, time.monotonic() + seconds)
+
+    def _settle(self, reservation: Reservation, cost: CostRecord | None) -> None:
+        self._reserved -= reservation.cost_usd
+        limiter = self._limiter(reservation.model_id)
+        if limiter.requests is not None:
+            usage = cost.usage if cost is not None else None
+            limiter.input.give(reservation.input_tokens - (usage.input_tokens if usage else 0))
+            limiter.output.give(reservation.output_tokens - (usage.output_tokens if usage else 0))
+        if cost is not None and cost.cost_usd:
+            self._spend.append((time.monotonic(), cost.cost_usd))
+            self._spent += cost.cost_usd
+        for model_id in self._models:
+            self._dispatch(model_id)
+
+    def _dispatch(self, model_id: str) -> None:
+        """Admit waiting calls for a model in priority order while capacity lasts."""
+        limiter = self._models[model_id]
+        if limiter.timer is not None:
+            limiter.timer.cancel()
+            limiter.timer = None
+        now = time.monotonic()
+        while limiter.queue:
+            waiter = limiter.queue[0]
+            if waiter.future.done():
+                heapq.heappop(limiter.queue)
+                continue
+            wait = limiter.wait_time(waiter.input_tokens, waiter.output_tokens, now)
+            spend_wait = self._spend_wait(waiter.cost_usd, now)
+            if spend_wait is None:
+                # Only a settling call can free spend; _settle dispatches again.
+                return
+            wait = max(wait, spend_wait)
+            if wait > 0:
+                limiter.timer = asyncio.get_running_loop().call_later(
+                    wait, self._dispatch, model_id
+                )
+                return
+            heapq.heappop(limiter.queue)
+            limiter.take(waiter.input_tokens, waiter.output_tokens, now)
+            self._reserved += waiter.cost_usd
+            waiter.future.set_result(None)
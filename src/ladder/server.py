@@ -0,0 +1,298 @@
+"""Long-running HTTP service that keeps one warm client and Orchestrator alive.
+
+Endpoints (JSON in, JSON out, HTTP/1.1 keep-alive):
+
+- ``POST /run`` with ``{"task", "context"?}`` returns a ``TaskResult``.
+- ``POST /batch`` with ``{"tasks": [...], "concurrency"?}`` streams one
+  ``BatchOutcome`` per line (chunked NDJSON) in completion order.
+- ``GET /health`` and ``GET /stats``.
+
+Identical ``/run`` tasks already in flight are coalesced onto a single run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+from pydantic import ValidationError
+
+from .client import DEFAULT_HOST, DEFAULT_PORT
+from .models import BatchTask, TaskResult
+from .orchestrator import DEFAULT_BATCH_CONCURRENCY, Orchestrator
+from .preflight import PreflightError
+from .resilience import CLIENT_MAX_RETRIES
+from .scheduler import BackpressureError, Priority
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Keep upstream connections open between bursts of tasks.
+KEEPALIVE_EXPIRY_S = 300.0
+MAX_CONNECTIONS = 200
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+def warm_client() -> AsyncAnthropic:
+    """An API client whose connection pool keeps idle connections alive for reuse.
+
+    Retries are left to the orchestrator's Resilience.
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_S,
+    )
+    return AsyncAnthropic(
+        http_client=DefaultAsyncHttpxClient(limits=limits), max_retries=CLIENT_MAX_RETRIES
+    )
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict[str, str] | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class _StreamAborted(ConnectionError):
+    """A streamed response failed after its head was sent; only closing can end it."""
+
+
+@dataclass
+class ServerStats:
+    """Counters of what the server handled."""
+
+    requests: int = 0
+    runs: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+class LadderServer:
+    """Serves an Orchestrator over HTTP, coalescing duplicate in-flight tasks."""
+
+    def __init__(
+        self, orchestrator: Orchestrator, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.host = host
+        self.port = port
+        self.stats = ServerStats()
+        self._in_flight: dict[str, asyncio.Task[TaskResult]] = {}
+
+    async def start(self) -> asyncio.Server:
+        return await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def run(
+        self, task: str, context: str = "", priority: Priority | None = None
+    ) -> TaskResult:
+        """Run a task, sharing the upstream run with identical tasks already in flight.
+
+        The shared run is shielded, so a client disconnecting does not cancel
+        it for the others.
+        """
+        key = hashlib.sha256(f"{task}\0{context}".encode()).hexdigest()
+        shared = self._in_flight.get(key)
+        if shared is None:
+            self.stats.runs += 1
+            shared = asyncio.create_task(self.orchestrator.run(task, context, priority))
+            self._in_flight[key] = shared
+            self.stats.in_flight = len(self._in_flight)
+            shared.add_done_callback(lambda _: self._done(key))
+        else:
+            self.stats.coalesced += 1
+        result = await asyncio.shield(shared)
+        return result.model_copy(deep=True)
+
+    def _done(self, key: str) -> None:
+        self._in_flight.pop(key, None)
+        self.stats.in_flight = len(self._in_flight)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except _HTTPError as exc:
+                    await _send_json(writer, exc.status, {"error": str(exc)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.stats.requests += 1
+                await self._dispatch(writer, method, path, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        path: str,
+        body: bytes,
+        keep_alive: bool,
+    ) -> None:
+        path = path.split("?", 1)[0]
+        try:
+            if path == "/health":
+                await _send_json(writer, 200, {"ok": True}, keep_alive)
+            elif path == "/stats":
+                await _send_json(writer, 200, self._stats(), keep_alive)
+            elif path == "/run":
+                _require_post(method)
+                item = _parse_task(body)
+                result = await self.run(item.task, item.context, Priority.interactive)
+                await _send_body(
+                    writer, 200, result.model_dump_json().encode(), keep_alive=keep_alive
+                )
+            elif path == "/batch":
+                _require_post(method)
+                await self._batch(writer, body, keep_alive)
+            else:
+                raise _HTTPError(404, f"No route for {path}")
+        except _HTTPError as exc:
+            await _send_json(writer, exc.status, {"error": str(exc)}, keep_alive, exc.headers)
+        except BackpressureError as exc:
+            headers = {"Retry-After": str(max(1, round(exc.retry_after)))}
+            await _send_json(writer, 429, {"error": str(exc)}, keep_alive, headers)
+        except PreflightError as exc:
+            await _send_json(writer, 422, {"error": str(exc)}, keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as exc:
+            logger.exception("Request to %s failed", path)
+            await _send_json(writer, 500, {"error": f"{type(exc).__name__}: {exc}"}, keep_alive)
+
+    async def _batch(self, writer: asyncio.StreamWriter, body: bytes, keep_alive: bool) -> None:
+        try:
+            payload = json.loads(body)
+            tasks = [BatchTask.model_validate(t) for t in payload["tasks"]]
+            concurrency = int(payload.get("concurrency", DEFAULT_BATCH_CONCURRENCY))
+        except (ValueError, KeyError, TypeError, ValidationError) as exc:
+            raise _HTTPError(400, f"Invalid batch: {exc}") from exc
+
+        headers = {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked"}
+        writer.write(_head(200, headers, keep_alive))
+        try:
+            async for outcome in self.orchestrator.run_many(tasks, concurrency):
+                line = outcome.model_dump_json().encode() + b"\n"
+                writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as exc:
+            # No error response can follow the 200 head; closing without the
+            # final chunk tells the client the stream is incomplete.
+            logger.exception("Batch stream failed")
+            raise _StreamAborted(f"{type(exc).__name__}: {exc}") from exc
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _stats(self) -> dict:
+        stats = asdict(self.stats)
+        scheduler = self.orchestrator.scheduler
+        if scheduler is not None:
+            stats["queued_calls"] = scheduler.queue_depth()
+            stats["spent_last_hour_usd"] = scheduler.spent_last_hour
+        return stats
+
+
+def _require_post(method: str) -> None:
+    if method != "POST":
+        raise _HTTPError(405, "Use POST")
+
+
+def _parse_task(body: bytes) -> BatchTask:
+    try:
+        return BatchTask.model_validate_json(body)
+    except ValidationError as exc:
+        raise _HTTPError(400, f"Invalid request: {exc}") from exc
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, dict[str, str], bytes] | None:
+    """Read one HTTP/1.1 request, or None when the client closed the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _HTTPError(400, "Malformed request line") from None
+    headers: dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise _HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise _HTTPError(413, f"Body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def _head(status: int, headers: dict[str, str], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send_body(
+    writer: asyncio.StreamWriter,
+    status: int,
+    body: bytes,
+    headers: dict[str, str] | None = None,
+    keep_alive: bool = True,
+) -> None:
+    headers = {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        **(headers or {}),
+    }
+    writer.write(_head(status, headers, keep_alive) + body)
+    await writer.drain()
+
+
+async def _send_json(
+    writer: asyncio.StreamWriter,
+    status: int,
+    payload: object,
+    keep_alive: bool = True,
+    headers: dict[str, str] | None = None,
+) -> None:
+    await _send_body(writer, status, json.dumps(payload).encode(), headers, keep_alive)
@@ -0,0 +1,242 @@
+"""Incremental JSONL sink for batch outcomes, with out-of-line responses and resume."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import zlib
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO
+
+from .models import BatchOutcome, EscalationReason
+
+# Responses longer than this many characters are stored in their own file.
+DEFAULT_BLOB_THRESHOLD = 16 * 1024
+# Key of the out-of-line response path in a record, relative to the blob directory.
+BLOB_KEY = "response_blob"
+
+
+def outcome_key(outcome: BatchOutcome) -> str:
+    """How a task is identified across restarts: its id, else its index."""
+    return outcome.id if outcome.id is not None else str(outcome.index)
+
+
+def _open_text(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+@dataclass
+class SinkSummary:
+    """Running totals over written outcomes, independent of how many there are."""
+
+    succeeded: int = 0
+    failed: int = 0
+    total_cost_usd: float = 0.0
+    escalated_tasks: int = 0
+    escalations: int = 0
+    tasks_by_level: dict[str, int] = field(default_factory=dict)
+    cost_by_level: dict[str, float] = field(default_factory=dict)
+
+    def add(self, entry: dict) -> None:
+        """Count an outcome from its ``index_entry``."""
+        if not entry["ok"]:
+            self.failed += 1
+            return
+        level, cost = entry["level"], entry["cost_usd"]
+        self.succeeded += 1
+        self.total_cost_usd += cost
+        self.escalated_tasks += entry["escalations"] > 0
+        self.escalations += entry["escalations"]
+        self.tasks_by_level[level] = self.tasks_by_level.get(level, 0) + 1
+        self.cost_by_level[level] = self.cost_by_level.get(level, 0.0) + cost
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def index_entry(outcome: BatchOutcome) -> dict:
+    """The short line an outcome leaves in the resume index."""
+    entry: dict = {"key": outcome_key(outcome), "ok": outcome.ok}
+    result = outcome.result
+    if result is not None:
+        entry["cost_usd"] = result.total_cost_usd
+        entry["level"] = result.final_level.value
+        entry["escalations"] = result.escalations.count(EscalationReason.self_escalation)
+    return entry
+
+
+class ResultSink:
+    """Writes each outcome to JSONL as soon as it finishes, flushed line by line.
+
+    A path ending in ``.gz`` is gzip-compressed. Responses longer than
+    ``blob_threshold`` characters are written once each, by content hash, to
+    ``blob_dir`` (``<path>.blobs`` by default), and the record holds their
+    relative path under ``response_blob`` instead.
+
+    Next to the output, ``<path>.index`` gets one short line per outcome
+    after its record is flushed. It is the resume index: opening with
+    ``resume=True`` reads it to learn which tasks already succeeded
+    (``done``) and to restore the summary, and appends to the output
+    rather than replacing it. Failed tasks are not done, so a resumed job
+    retries them. A task that finished just before a crash, but is not in
+    the index, runs again and appears twice.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        resume: bool = False,
+        blob_threshold: int | None = DEFAULT_BLOB_THRESHOLD,
+        blob_dir: str | Path | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".index")
+        self.blob_dir = Path(blob_dir or self.path.with_name(self.path.name + ".blobs"))
+        self.blob_threshold = blob_threshold
+        self.summary = SinkSummary()
+        self._done: set[str] = set()
+        self._failed: set[str] = set()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.index_path.exists():
+            self._load_index()
+            self._recover()
+        else:
+            self.path.unlink(missing_ok=True)
+            self.index_path.unlink(missing_ok=True)
+        self._out = _open_text(self.path, "a")
+        self._index = self.index_path.open("a", encoding="utf-8")
+
+    def _load_index(self) -> None:
+        with self.index_path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; its task is simply not done.
+                    continue
+                self._count(entry)
+
+    def _count(self, entry: dict) -> None:
+        key = entry["key"]
+        if key in self._done:
+            return
+        if entry["ok"]:
+            if key in self._failed:
+                self._failed.discard(key)
+                self.summary.failed -= 1
+            self._done.add(key)
+            self.summary.add(entry)
+        elif key not in self._failed:
+            self._failed.add(key)
+            self.summary.add(entry)
+
+    def _recover(self) -> None:
+        """Drop a record cut short by a crash, so appended records stay readable."""
+        if not self.path.exists():
+            return
+        if self.path.suffix != ".gz":
+            # Truncate after the last complete line, scanning back from the end.
+            with self.path.open("rb+") as f:
+                end = pos = f.seek(0, io.SEEK_END)
+                while pos > 0:
+                    start = max(pos - 4096, 0)
+                    f.seek(start)
+                    newline = f.read(pos - start).rfind(b"\n")
+                    if newline >= 0:
+                        pos = start + newline + 1
+                        break
+                    pos = start
+                if pos != end:
+                    f.truncate(pos)
+            return
+        # A gzip member without its trailer cannot be appended to; copy the
+        # complete lines into a fresh file instead.
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(self.path, "rt", encoding="utf-8") as src, gzip.open(
+            tmp, "wt", encoding="utf-8"
+        ) as dst:
+            try:
+                for line in src:
+                    if line.endswith("\n"):
+                        dst.write(line)
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                pass
+        os.replace(tmp, self.path)
+
+    def done(self, key: str) -> bool:
+        """Whether the task with this key already succeeded."""
+        return key in self._done
+
+    def _store_blob(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        suffix = ".txt.gz" if self.path.suffix == ".gz" else ".txt"
+        relative = f"{digest[:2]}/{digest}{suffix}"
+        path = self.blob_dir / relative
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written under a hidden name first, so a blob is never seen half-written.
+            tmp = path.with_name(f".{path.name}")
+            with _open_text(tmp, "w") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        return relative
+
+    def write(self, outcome: BatchOutcome) -> None:
+        """Append an outcome, flush it, then record it in the resume index."""
+        record = outcome.model_dump(mode="json")
+        result = record.get("result")
+        if (
+            result is not None
+            and self.blob_threshold is not None
+            and len(result["response"]) > self.blob_threshold
+        ):
+            record[BLOB_KEY] = self._store_blob(result["response"])
+            result["response"] = ""
+        self._out.write(json.dumps(record) + "\n")
+        # For gzip this is a sync flush: everything so far can be decompressed.
+        self._out.flush()
+        entry = index_entry(outcome)
+        self._index.write(json.dumps(entry) + "\n")
+        self._index.flush()
+        self._count(entry)
+
+    def close(self) -> None:
+        self._out.close()
+        self._index.close()
+
+    def __enter__(self) -> ResultSink:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def read_outcomes(
+    path: str | Path, blob_dir: str | Path | None = None, load_blobs: bool = True
+) -> Iterator[BatchOutcome]:
+    """Yield the outcomes in a sink's output, reading out-of-line responses back in.
+
+    A record cut short by a crash ends the iteration.
+    """
+    path = Path(path)
+    blob_dir = Path(blob_dir or path.with_name(path.name + ".blobs"))
+    with _open_text(path, "r") as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    return
+                record = json.loads(line)
+                blob = record.pop(BLOB_KEY, None)
+                if blob is not None and load_blobs:
+                    with _open_text(blob_dir / blob, "r") as b:
+                        record["result"]["response"] = b.read()
+                yield BatchOutcome.model_validate(record)
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            return
@@ -0,0 +1,237 @@
+"""Durable SQLite task queue with leases, shared by producers and `ladder worker` processes."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cache import DEFAULT_CACHE_DIR
+
+DEFAULT_QUEUE_PATH = DEFAULT_CACHE_DIR / "queue.sqlite3"
+# A leased task not finished or extended within this many seconds is handed out again.
+VISIBILITY_TIMEOUT_S = 300.0
+# Leases per task before it is marked failed, including leases that expired.
+MAX_ATTEMPTS = 3
+# Seconds a process waits for another one's write lock before giving up.
+BUSY_TIMEOUT_S = 30.0
+
+# Scheduling priority of queued tasks; lower runs first (matches scheduler.Priority).
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    task_id TEXT,
+    task TEXT NOT NULL,
+    context TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_queued ON tasks (status, priority, id);
+"""
+
+
+@dataclass(frozen=True)
+class QueuedTask:
+    """A task leased from the queue."""
+
+    id: int
+    task: str
+    context: str
+    task_id: str | None
+    priority: int
+    attempts: int
+
+
+@dataclass(frozen=True)
+class FinishedTask:
+    """A done or failed task; ``result`` is the TaskResult JSON of a done one."""
+
+    id: int
+    task_id: str | None
+    status: str
+    attempts: int
+    result: str | None
+    error: str | None
+
+
+class TaskQueue:
+    """Tasks in a SQLite file, handed out under leases for at-least-once delivery.
+
+    ``lease`` marks the next ready task (by priority, then age) as leased
+    until ``visibility_timeout`` from now. The holder extends the lease while
+    it works and then calls ``complete``, ``fail`` or ``release``. If it dies
+    instead, the lease expires and another worker gets the task, so a task
+    can run more than once but is never lost. After ``max_attempts`` leases
+    it is marked failed.
+
+    Every state change is one immediate transaction, so producers and any
+    number of worker processes can share the file.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_QUEUE_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        items: Iterable[tuple[str, str, str | None]],
+        priority: int = PRIORITIES["batch"],
+        delay: float = 0.0,
+    ) -> list[int]:
+        """Add ``(task, context, task_id)`` items; returns their queue ids."""
+        now = time.time()
+        ids = []
+        with self._transaction() as conn:
+            for task, context, task_id in items:
+                cursor = conn.execute(
+                    "INSERT INTO tasks (task_id, task, context, priority, status,"
+                    " available_at, enqueued_at) VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                    (task_id, task, context, priority, now + delay, now),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def lease(
+        self, owner: str, visibility_timeout: float = VISIBILITY_TIMEOUT_S
+    ) -> QueuedTask | None:
+        """Lease the next ready task to ``owner``, or None if none is ready."""
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT id, task, context, task_id, priority, attempts FROM tasks"
+                    " WHERE (status = 'queued' AND available_at <= ?)"
+                    " OR (status = 'leased' AND lease_expires <= ?)"
+                    " ORDER BY priority, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[5] >= self.max_attempts:
+                    # Only an expired lease gets here: its holders died every time.
+                    conn.execute(
+                        "UPDATE tasks SET status = 'failed', finished_at = ?, lease_owner = NULL,"
+                        " error = ? WHERE id = ?",
+                        (now, f"Lease expired {row[5]} times", row[0]),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + visibility_timeout, row[0]),
+                )
+                return QueuedTask(*row[:5], attempts=row[5] + 1)
+
+    def extend(
+        self, task_id: int, owner: str, visibility_timeout: float = VISIBILITY_TIMEOUT_S
+    ) -> bool:
+        """Push back a lease's expiry; False if ``owner`` no longer holds it."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?"
+                " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + visibility_timeout, task_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, result: str) -> bool:
+        """Store a task's result. The first completion wins, even from a lapsed lease."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, finished_at = ?,"
+                " lease_owner = NULL, lease_expires = NULL"
+                " WHERE id = ? AND status != 'done'",
+                (result, time.time(), task_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(
+        self, task_id: int, owner: str, error: str, retry: bool = True, retry_after: float = 0.0
+    ) -> str:
+        """Record a failed attempt and return the task's new status.
+
+        It is queued again after ``retry_after`` seconds, unless ``retry`` is
+        false or it is out of attempts, when it is marked failed.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (task_id, owner),
+            ).fetchone()
+            if row is None:
+                return "lost"
+            status = "queued" if retry and row[0] < self.max_attempts else "failed"
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, available_at = ?, finished_at = ?,"
+                " lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                (status, error, now + retry_after, now if status == "failed" else None, task_id),
+            )
+        return status
+
+    def release(self, task_id: int, owner: str, delay: float = 0.0) -> bool:
+        """Give a leased task back without counting the attempt."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'queued', attempts = attempts - 1, available_at = ?,"
+                " lease_owner = NULL, lease_expires = NULL"
+                " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + delay, task_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def counts(self) -> dict[str, int]:
+        """Tasks per status: queued, leased, done and failed."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+            counts = dict(rows.fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "leased", "done", "failed")}
+
+    def unfinished(self) -> int:
+        counts = self.counts()
+        return counts["queued"] + counts["leased"]
+
+    def finished(self, after_id: int = 0, limit: int = 1000) -> list[FinishedTask]:
+        """Done and failed tasks with queue ids above ``after_id``, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, task_id, status, attempts, result, error FROM tasks"
+                " WHERE id > ? AND status IN ('done', 'failed') ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [FinishedTask(*row) for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,125 @@
+"""Timing span exporters and formatting."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from pathlib import Path
+from typing import Protocol
+
+from .models import Span, TaskResult
+
+try:
+    from opentelemetry.trace import set_span_in_context
+except ImportError:
+    set_span_in_context = None
+
+
+class SpanExporter(Protocol):
+    """Receives every finished TaskResult so its spans can be recorded elsewhere."""
+
+    def export(self, result: TaskResult) -> None: ...
+
+
+class JsonlSpanExporter:
+    """Appends one JSON line per span, grouped by a per-task trace ID.
+
+    Tasks are identified by a hash rather than their text.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, result: TaskResult) -> None:
+        trace_id = uuid.uuid4().hex
+        task_hash = hashlib.sha256(result.task.encode()).hexdigest()[:16]
+        with self.path.open("a") as f:
+            for span in result.spans:
+                record = {"trace_id": trace_id, "task_sha256": task_hash}
+                record.update(span.model_dump(mode="json"))
+                f.write(json.dumps(record) + "\n")
+
+
+class OpenTelemetryExporter:
+    """Replays spans into an OpenTelemetry-style tracer.
+
+    Works with any object offering ``start_span(name, context=, attributes=,
+    start_time=)`` returning a span with ``end(end_time=)``. With the
+    ``opentelemetry`` package installed, phases are nested under the run span.
+    """
+
+    def __init__(self, tracer: object) -> None:
+        self.tracer = tracer
+
+    def export(self, result: TaskResult) -> None:
+        if not result.spans:
+            return
+        root, *children = result.spans
+        root_span = self.tracer.start_span(
+            "ladder.run",
+            attributes={
+                **_attributes(root),
+                "ladder.final_level": result.final_level.value,
+                "ladder.total_cost_usd": result.total_cost_usd,
+            },
+            start_time=_ns(root.start_time),
+        )
+        context = set_span_in_context(root_span) if set_span_in_context else None
+        for span in children:
+            child = self.tracer.start_span(
+                f"ladder.{span.name}",
+                context=context,
+                attributes=_attributes(span),
+                start_time=_ns(span.start_time),
+            )
+            child.end(end_time=_ns(span.start_time + span.wall_s))
+        root_span.end(end_time=_ns(root.start_time + root.wall_s))
+
+
+def _ns(seconds: float) -> int:
+    return int(seconds * 1_000_000_000)
+
+
+def _attributes(span: Span) -> dict[str, object]:
+    attributes: dict[str, object] = {
+        "ladder.status": span.status,
+        "ladder.retries": span.retries,
+        "ladder.output_tokens": span.output_tokens,
+    }
+    if span.level is not None:
+        attributes["ladder.level"] = span.level.value
+    if span.ttft_s is not None:
+        attributes["ladder.ttft_s"] = span.ttft_s
+    if span.output_tokens_per_s is not None:
+        attributes["ladder.output_tokens_per_s"] = span.output_tokens_per_s
+    return attributes
+
+
+def format_timing_summary(spans: list[Span]) -> str:
+    """Format timing spans into a human-readable summary."""
+    if not spans:
+        return "No timing recorded."
+
+    lines = ["Timing Breakdown:", "-" * 50]
+    total = None
+    for span in spans:
+        if span.name == "run":
+            total = span
+            continue
+        name = f"{span.name} ({span.level.value})" if span.level else span.name
+        parts = [f"{span.wall_s:.3f}s"]
+        if span.ttft_s is not None:
+            parts.append(f"ttft {span.ttft_s:.3f}s")
+        if span.output_tokens_per_s is not None:
+            parts.append(f"{span.output_tokens_per_s:.1f} tok/s")
+        if span.retries:
+            parts.append(f"{span.retries} retries")
+        if span.status != "ok":
+            parts.append(span.status)
+        lines.append(f"  {name}: {', '.join(parts)}")
+    lines.append("-" * 50)
+    if total is not None:
+        lines.append(f"  Total: {total.wall_s:.3f}s")
+    return "\n".join(lines)
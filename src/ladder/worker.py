@@ -0,0 +1,142 @@
+"""Long-running consumers that take tasks from a TaskQueue and run them on one Orchestrator."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from .preflight import PreflightError
+from .scheduler import BackpressureError, Priority
+from .task_queue import VISIBILITY_TIMEOUT_S, QueuedTask, TaskQueue
+
+if TYPE_CHECKING:
+    from .orchestrator import Orchestrator
+
+logger = logging.getLogger(__name__)
+
+# Seconds an idle consumer sleeps before looking for work again (with jitter).
+POLL_INTERVAL_S = 1.0
+# Delay before a failed task is retried, doubled for each earlier attempt.
+RETRY_DELAY_S = 30.0
+
+
+def worker_id() -> str:
+    """A lease owner name unique to this process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class WorkerStats:
+    completed: int = 0
+    failed: int = 0
+    retried: int = 0
+    released: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class Worker:
+    """Runs ``consumers`` tasks at a time from a queue on one shared Orchestrator.
+
+    All consumers share the orchestrator's client, scheduler and caches, so
+    the tasks of every producer are throttled together. Each consumer leases
+    one task, extends the lease every third of ``visibility_timeout`` while
+    it runs, and writes the TaskResult JSON back on success. A failed task is
+    queued again with a growing delay until the queue's ``max_attempts``;
+    preflight rejections fail at once. A task refused by the scheduler, or
+    interrupted by shutdown, is released without counting the attempt.
+
+    Several workers, in one or many processes, can share a queue file.
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        orchestrator: Orchestrator,
+        consumers: int = 1,
+        visibility_timeout: float = VISIBILITY_TIMEOUT_S,
+        poll_interval: float = POLL_INTERVAL_S,
+        owner: str | None = None,
+    ) -> None:
+        self.queue = queue
+        self.orchestrator = orchestrator
+        self.consumers = max(1, consumers)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.owner = owner or worker_id()
+        self.stats = WorkerStats()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop taking new tasks; tasks in flight finish first."""
+        self._stopping.set()
+
+    async def run(self, exit_when_empty: bool = False) -> WorkerStats:
+        """Consume until stopped, or with ``exit_when_empty`` until no task is left
+        queued or leased by anyone."""
+        await asyncio.gather(*(self._consume(exit_when_empty) for _ in range(self.consumers)))
+        return self.stats
+
+    async def _consume(self, exit_when_empty: bool) -> None:
+        while not self._stopping.is_set():
+            item = await asyncio.to_thread(self.queue.lease, self.owner, self.visibility_timeout)
+            if item is not None:
+                await self._process(item)
+                continue
+            if exit_when_empty and await asyncio.to_thread(self.queue.unfinished) == 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.poll_interval * random.uniform(0.5, 1.5)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self, item: QueuedTask) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            held = await asyncio.to_thread(
+                self.queue.extend, item.id, self.owner, self.visibility_timeout
+            )
+            if not held:
+                logger.warning("Lost the lease on queued task %d; it may run twice", item.id)
+                return
+
+    async def _process(self, item: QueuedTask) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(item))
+        try:
+            result = await self.orchestrator.run(item.task, item.context, Priority(item.priority))
+        except BackpressureError as exc:
+            await asyncio.to_thread(self.queue.release, item.id, self.owner, exc.retry_after)
+            self.stats.released += 1
+        except asyncio.CancelledError:
+            # Shutting down: hand the task straight to another worker.
+            await asyncio.shield(asyncio.to_thread(self.queue.release, item.id, self.owner))
+            self.stats.released += 1
+            raise
+        except Exception as exc:
+            status = await asyncio.to_thread(
+                self.queue.fail,
+                item.id,
+                self.owner,
+                f"{type(exc).__name__}: {exc}",
+                not isinstance(exc, PreflightError),
+                RETRY_DELAY_S * 2 ** (item.attempts - 1),
+            )
+            if status == "queued":
+                self.stats.retried += 1
+            elif status == "failed":
+                self.stats.failed += 1
+                logger.warning("Queued task %d failed: %s", item.id, exc)
+        else:
+            await asyncio.to_thread(self.queue.complete, item.id, result.model_dump_json())
+            self.stats.completed += 1
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,116 @@
+import math
+
+import pytest
+
+from ladder.agent import (
+    CHARS_PER_TOKEN,
+    CONTINUE_PROMPT,
+    MAX_CONTINUATIONS,
+    LadderAgent,
+    escalation_state,
+)
+from ladder.bench.fake import DEFAULT_PROFILES, FakeAnthropic, FakeConfig, ModelProfile
+from ladder.enums import LadderLevel
+from ladder.levels import get_config
+
+
+class ScriptedAnthropic(FakeAnthropic):
+    """The fake API, always answering with ``reply``."""
+
+    def __init__(self, reply: str) -> None:
+        super().__init__(FakeConfig(time_scale=0.0))
+        self.reply = reply
+
+    def _reply(self, params):
+        return self.reply, len(self.reply) // CHARS_PER_TOKEN
+
+
+def _spy_requests(client):
+    sent = []
+    create = client.messages.create
+
+    async def spy(**params):
+        sent.append(params)
+        return await create(**params)
+
+    client.messages.create = spy
+    return sent
+
+
+def test_escalation_prefix_stays_ambiguous_until_decided():
+    assert escalation_state("") is None
+    assert escalation_state("  esc") is None
+    assert escalation_state("ESCALATE") is None
+    assert escalation_state("ESCALATE: too hard") is True
+    assert escalation_state("ESCAPE the quotes") is False
+    assert escalation_state("Here is") is False
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_once_the_escalation_note_is_complete():
+    client = FakeAnthropic(FakeConfig(time_scale=0.0, escalation_rate=1.0))
+    agent = LadderAgent(client, LadderLevel.intern)
+    response = await agent.run("Redesign the storage layer [bench:principal]")
+
+    assert response.escalated
+    assert response.escalation_note == "This task is beyond this level (simulated)."
+    assert client.stats.cancelled_streams == 1
+    full = len("ESCALATE: This task is beyond this level (simulated).\n\n" + "detail " * 200)
+    assert len(response.text) < full
+    # No final usage event arrived, so output is estimated from the text read.
+    assert response.cost.usage.output_tokens == math.ceil(len(response.text) / CHARS_PER_TOKEN)
+    assert "cancelled" not in response.cost.description
+
+
+@pytest.mark.asyncio
+async def test_text_is_held_back_while_the_prefix_is_ambiguous():
+    # The fake streams 64 characters per delta, so "ESCAPE" is split after "ESCA".
+    reply = " " * 60 + "ESCAPE sequences are handled by the parser. " * 5
+    agent = LadderAgent(ScriptedAnthropic(reply), LadderLevel.intern)
+    seen = []
+    agent.on_text = lambda a, text: seen.append(a.text)
+    response = await agent.run("Explain the escaping")
+
+    assert not response.escalated
+    assert response.text == reply
+    assert len(seen[0]) > 64
+
+    escalating = LadderAgent(
+        ScriptedAnthropic(" " * 60 + "ESCALATE: needs a senior\n\n" + "more " * 50),
+        LadderLevel.intern,
+    )
+    escalating.on_text = lambda a, text: seen.append(text)
+    seen.clear()
+    response = await escalating.run("Explain the escaping")
+    assert response.escalated and response.escalation_note == "needs a senior"
+    assert seen == []
+
+
+@pytest.mark.asyncio
+async def test_truncated_answers_are_continued_with_doubling_budgets():
+    profiles = {model: ModelProfile(0.1, output_tokens=(150, 150)) for model in DEFAULT_PROFILES}
+    client = FakeAnthropic(FakeConfig(profiles=profiles, time_scale=0.0))
+    sent = _spy_requests(client)
+    response = await LadderAgent(client, LadderLevel.mid).run("Write it out", max_tokens=50)
+
+    assert [params["max_tokens"] for params in sent] == [50, 100, 200]
+    assert sent[1]["messages"][-1]["content"] == CONTINUE_PROMPT
+    assert sent[2]["messages"][1]["content"] == "x" * (150 * CHARS_PER_TOKEN)
+    assert response.continuations == 2 and not response.truncated
+    assert response.text == "x" * (300 * CHARS_PER_TOKEN)
+    assert response.cost.usage.output_tokens == 300
+    assert response.cost.description == "Agent (mid, 2 continuations)"
+
+
+@pytest.mark.asyncio
+async def test_continuations_stop_at_the_limit_and_flag_truncation():
+    cap = get_config(LadderLevel.mid).max_output_tokens
+    profiles = {model: ModelProfile(0.1, output_tokens=(cap, cap)) for model in DEFAULT_PROFILES}
+    client = FakeAnthropic(FakeConfig(profiles=profiles, time_scale=0.0))
+    sent = _spy_requests(client)
+    response = await LadderAgent(client, LadderLevel.mid).run("Write it out", max_tokens=50)
+
+    assert [params["max_tokens"] for params in sent] == [50 * 2**i for i in range(4)]
+    assert response.continuations == MAX_CONTINUATIONS
+    assert response.truncated
+    assert response.cost.usage.output_tokens == 50 + 100 + 200 + 400
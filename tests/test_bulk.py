@@ -0,0 +1,103 @@
+import pytest
+
+from ladder.agent import CONTINUE_PROMPT, MAX_CONTINUATIONS
+from ladder.bench.fake import DEFAULT_PROFILES, FakeAnthropic, FakeConfig, ModelProfile
+from ladder.bulk import BulkJob
+from ladder.cost import calculate_cost
+from ladder.enums import EscalationReason, LadderLevel
+from ladder.levels import get_config
+from ladder.models import BatchTask
+
+
+class _InternClassifier(FakeAnthropic):
+    """Classifies every task as intern work, with a fixed confidence."""
+
+    def __init__(self, confidence: float = 0.95, **config) -> None:
+        super().__init__(FakeConfig(time_scale=0.0, escalation_rate=1.0, **config))
+        self.confidence = confidence
+        self.batched: list[list[dict]] = []
+        create = self.messages.batches.create
+
+        async def spy(*, requests):
+            self.batched.append(requests)
+            return await create(requests=requests)
+
+        self.messages.batches.create = spy
+
+    def _classification(self, task):
+        return {
+            "level": "intern",
+            "category": "implementation",
+            "confidence": self.confidence,
+            "reasoning": "",
+            "estimated_complexity": 2,
+        }
+
+
+async def _finish(job: BulkJob, client: FakeAnthropic) -> None:
+    for _ in range(10):
+        if await job.poll(client) == "done":
+            return
+    raise AssertionError("bulk job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_escalations_run_in_follow_up_rounds_at_batch_prices(tmp_path):
+    client = _InternClassifier()
+    job = BulkJob.create(tmp_path / "state.json", [BatchTask(task="Build it [bench:mid]")])
+    await _finish(job, client)
+
+    (outcome,) = job.outcomes()
+    result = outcome.result
+    assert (result.initial_level, result.final_level) == (LadderLevel.intern, LadderLevel.mid)
+    assert result.escalations == [EscalationReason.self_escalation] * 2
+    assert len(job.state.batch_ids) == 4
+    # The mid attempt is handed the notes of the two levels below.
+    handoff = client.batched[3][0]["params"]["messages"][0]["content"]
+    assert "intern" in handoff[-1]["text"] and "junior" in handoff[-1]["text"]
+    for cost in result.costs:
+        full = calculate_cost(cost.level, cost.usage).cost_usd
+        assert cost.cost_usd == pytest.approx(full / 2)
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_bumps_the_starting_level(tmp_path):
+    client = _InternClassifier(confidence=0.5)
+    job = BulkJob.create(tmp_path / "state.json", [BatchTask(task="Fix it [bench:junior]")])
+    await _finish(job, client)
+
+    (outcome,) = job.outcomes()
+    assert outcome.result.final_level == LadderLevel.junior
+    assert outcome.result.escalations == [EscalationReason.low_confidence]
+    assert len(job.state.batch_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_resumed_job_does_not_resubmit_the_batch_in_flight(tmp_path):
+    client = _InternClassifier()
+    path = tmp_path / "state.json"
+    job = BulkJob.create(path, [BatchTask(task=f"Task {i} [bench:intern]") for i in range(3)])
+    batch_id = await job.submit(client)
+
+    resumed = BulkJob.load(path)
+    assert await resumed.submit(client) == batch_id
+    await _finish(resumed, client)
+    assert len(client.batched) == 2
+    assert [o.result.final_level for o in resumed.outcomes()] == [LadderLevel.intern] * 3
+    assert BulkJob.load(path).state.done
+
+
+@pytest.mark.asyncio
+async def test_answers_cut_off_are_continued_then_flagged(tmp_path):
+    cap = get_config(LadderLevel.intern).max_output_tokens
+    profiles = {m: ModelProfile(0.1, output_tokens=(cap, cap)) for m in DEFAULT_PROFILES}
+    client = _InternClassifier(profiles=profiles)
+    job = BulkJob.create(tmp_path / "state.json", [BatchTask(task="Write it [bench:intern]")])
+    await _finish(job, client)
+
+    (outcome,) = job.outcomes()
+    assert outcome.result.truncated
+    assert len(job.state.batch_ids) == 2 + MAX_CONTINUATIONS
+    last = client.batched[-1][0]["params"]["messages"]
+    assert last[-1]["content"] == CONTINUE_PROMPT
+    assert outcome.result.response == "x" * (4 * cap * (1 + MAX_CONTINUATIONS))
@@ -0,0 +1,50 @@
+import copy
+
+import pytest
+
+from ladder import classifier
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.classifier import ClassificationCache, classify_tasks
+from ladder.orchestrator import Orchestrator
+
+
+@pytest.mark.asyncio
+async def test_classify_span_reports_cache_hits(tmp_path):
+    cache = ClassificationCache.open(tmp_path / "classifications.sqlite3")
+    orchestrator = Orchestrator(
+        client=FakeAnthropic(FakeConfig(time_scale=0.0)), classification_cache=cache
+    )
+    task = "Fix the typo in the README"
+
+    first, _, span = await orchestrator._classify(task)
+    assert not first.cached and span.status == "ok"
+
+    second, costs, span = await orchestrator._classify(task)
+    assert second.cached and span.status == "cached"
+    assert second.model_copy(update={"cached": False}) == first
+    assert costs[-1].cost_usd == 0
+
+
+def test_cache_keys_track_model_prompts_and_tool_schema(tmp_path, monkeypatch):
+    task = "Fix the typo in the README"
+    key = ClassificationCache.key(task)
+    assert ClassificationCache.key(task, "claude-haiku-fallback") != key
+
+    monkeypatch.setattr(classifier, "CLASSIFIER_BATCH_PROMPT", "Classify them all.")
+    assert ClassificationCache.key(task) != key
+    monkeypatch.undo()
+
+    schema = copy.deepcopy(classifier.CLASSIFY_TOOL)
+    schema["input_schema"]["properties"]["classifications"]["items"]["required"].pop()
+    monkeypatch.setattr(classifier, "CLASSIFY_TOOL", schema)
+    assert ClassificationCache.key(task) != key
+
+
+@pytest.mark.asyncio
+async def test_fallback_model_results_are_cached_apart(tmp_path):
+    cache = ClassificationCache.open(tmp_path / "classifications.sqlite3")
+    client = FakeAnthropic(FakeConfig(time_scale=0.0))
+    tasks = ["Fix the typo [bench:intern]", "Design the platform [bench:staff]"]
+    await classify_tasks(client, tasks, cache, model="claude-haiku-fallback")
+    assert cache.get(tasks[0], "claude-haiku-fallback") is not None
+    assert cache.get(tasks[0]) is None
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ladder import context_index
+from ladder.context_index import OPEN_BUNDLES, ContextIndex, ContextSelector, estimate_tokens
+from ladder.enums import LadderLevel
+
+
+def test_minified_context_is_split_to_fit_the_budget(tmp_path):
+    context = "var a=1;" * 91_000
+    selector = ContextSelector(index_dir=tmp_path)
+    try:
+        selected = selector.select(LadderLevel.mid, "var", context)
+    finally:
+        selector.close()
+    assert selected
+    assert estimate_tokens(selected) <= selector.budget(LadderLevel.mid)
+
+
+def test_unmatched_task_still_gets_leading_context(tmp_path):
+    context = "\n".join(f"line {i} of the report" for i in range(100_000))
+    selector = ContextSelector(index_dir=tmp_path, budgets={LadderLevel.intern: 500})
+    try:
+        selected = selector.select(LadderLevel.intern, "zebra", context)
+    finally:
+        selector.close()
+    assert selected.count("line 0 of the report") == 1
+    assert estimate_tokens(selected) <= 500
+
+
+def test_concurrent_selections_over_evicted_bundles(tmp_path):
+    selector = ContextSelector(index_dir=tmp_path, budgets={LadderLevel.intern: 100})
+    contexts = [f"bundle {n} " * 400 for n in range(OPEN_BUNDLES * 2)]
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            selected = list(
+                pool.map(lambda c: selector.select(LadderLevel.intern, "bundle", c), contexts * 3)
+            )
+    finally:
+        selector.close()
+    assert all(selected)
+
+
+def _age(index, seconds=7200):
+    then = time.time() - seconds
+    for suffix in ("", "-wal"):
+        path = f"{index.path}{suffix}"
+        if os.path.exists(path):
+            os.utime(path, (then, then))
+
+
+def test_pruning_keeps_open_and_recently_used_bundles(tmp_path, monkeypatch):
+    monkeypatch.setattr(context_index, "MAX_BUNDLE_INDEXES", 1)
+    in_use = ContextIndex.for_bundle("in use", tmp_path)
+    stale = ContextIndex.for_bundle("stale", tmp_path)
+    stale.close()
+    recent = ContextIndex.for_bundle("recent", tmp_path)
+    recent.close()
+    _age(in_use)
+    _age(stale)
+
+    newest = ContextIndex.for_bundle("newest", tmp_path)
+    assert in_use.path.exists() and in_use.leading(100)
+    assert not stale.path.exists()
+    assert recent.path.exists() and newest.path.exists()
+    in_use.close()
+    newest.close()
+
+
+def test_bundle_reused_from_memory_is_touched(tmp_path):
+    context = "def handler(): pass\n" * 2000
+    selector = ContextSelector(index_dir=tmp_path, budgets={LadderLevel.intern: 100})
+    try:
+        selector.select(LadderLevel.intern, "handler", context)
+        (path,) = tmp_path.glob("bundle-*.sqlite3")
+        os.utime(path, (0, 0))
+        selector.select(LadderLevel.intern, "handler", context)
+        assert path.stat().st_mtime > time.time() - 60
+    finally:
+        selector.close()
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.enums import LadderLevel
+from ladder.fan_out import MAX_SUBTASKS, PLAN_TOOL_NAME, merged_response, parse_plan
+from ladder.models import Subtask, TaskResult
+from ladder.orchestrator import Orchestrator
+
+TASK = "Split the monolith's billing module into a service [bench:staff]"
+
+
+class ConfidentFake(FakeAnthropic):
+    """Classifies every task at its true level with high confidence."""
+
+    def _classification(self, task: str) -> dict:
+        return {**super()._classification(task), "confidence": 0.95}
+
+
+class NoPlanFake(ConfidentFake):
+    def _plan(self, level: LadderLevel) -> list[dict]:
+        return []
+
+
+def _client(cls=ConfidentFake) -> FakeAnthropic:
+    return cls(FakeConfig(time_scale=0.0, classifier_accuracy=1.0))
+
+
+def _tool_message(subtasks: object) -> SimpleNamespace:
+    block = SimpleNamespace(type="tool_use", name=PLAN_TOOL_NAME, input={"subtasks": subtasks})
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text="Plan"), block])
+
+
+def test_parse_plan_keeps_valid_subtasks_up_to_the_limit():
+    entries = [{"title": f"Part {i}", "task": f"Do part {i}"} for i in range(MAX_SUBTASKS + 2)]
+    entries[1:1] = [{"title": "No task"}, {"title": "Blank", "task": "  "}, "not a subtask"]
+    subtasks = parse_plan(_tool_message(entries))
+    assert [s.title for s in subtasks] == [f"Part {i}" for i in range(MAX_SUBTASKS)]
+    assert parse_plan(_tool_message("not a list")) == []
+
+
+def test_merged_response_follows_notes_with_each_answer():
+    subtasks = [Subtask(title="API", task="a"), Subtask(title="Schema", task="b")]
+    results = [
+        TaskResult.model_construct(response=" The API answer\n"),
+        TaskResult.model_construct(response="The schema answer"),
+    ]
+    merged = merged_response("How they fit\n", subtasks, results)
+    assert merged == (
+        "How they fit\n\n## API\n\nThe API answer\n\n## Schema\n\nThe schema answer"
+    )
+
+
+@pytest.mark.asyncio
+async def test_fan_out_plans_runs_subtasks_and_merges():
+    orchestrator = Orchestrator(client=_client(), fan_out=True)
+    result = await orchestrator.run(TASK)
+
+    assert result.final_level == LadderLevel.staff
+    assert len(result.subtasks) == 3
+    assert all(sub.final_level == LadderLevel.mid for sub in result.subtasks)
+    for i, sub in enumerate(result.subtasks, 1):
+        assert f"## Part {i}\n\n{sub.response.strip()}" in result.response
+    assert result.response.index("## Part 1") < result.response.index("## Part 3")
+
+    descriptions = [c.description for c in result.costs]
+    assert any(d.startswith("Plan (3 subtasks)") for d in descriptions)
+    assert sum(d.startswith("Merge: ") for d in descriptions) == 1
+    for i, sub in enumerate(result.subtasks, 1):
+        subtask_costs = [
+            c.cost_usd for c in result.costs if c.description.startswith(f"Subtask {i}: ")
+        ]
+        assert sum(subtask_costs) == pytest.approx(sub.total_cost_usd)
+        assert sub.total_cost_usd > 0
+    assert result.total_cost_usd == pytest.approx(sum(c.cost_usd for c in result.costs))
+
+
+@pytest.mark.asyncio
+async def test_task_is_done_whole_without_a_plan():
+    orchestrator = Orchestrator(client=_client(NoPlanFake), fan_out=True)
+    result = await orchestrator.run(TASK)
+
+    assert result.final_level == LadderLevel.staff
+    assert result.subtasks == []
+    assert "## " not in result.response
+    descriptions = [c.description for c in result.costs]
+    assert any(d.startswith("Plan (0 subtasks)") for d in descriptions)
+    assert not any(d.startswith(("Merge: ", "Subtask ")) for d in descriptions)
+
+
+@pytest.mark.asyncio
+async def test_lower_levels_are_not_fanned_out():
+    client = _client()
+    orchestrator = Orchestrator(client=client, fan_out=True)
+    result = await orchestrator.run("Rename a helper [bench:senior]")
+    assert result.subtasks == []
+    assert not any(c.description.startswith("Plan") for c in result.costs)
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from ladder.cost import calculate_cost
+from ladder.enums import LadderLevel, TaskCategory
+from ladder.ledger import CostLedger
+from ladder.levels import get_config
+from ladder.models import ClassificationResult, TaskResult, TokenUsage
+
+FALLBACK = "claude-fallback-test"
+
+
+def _result(model_id: str | None = None) -> TaskResult:
+    usage = TokenUsage(input_tokens=1000, output_tokens=200)
+    cost = calculate_cost(LadderLevel.mid, usage, "Agent (mid)", model_id=model_id)
+    return TaskResult(
+        task="Add a retry to the client",
+        classification=ClassificationResult(
+            level=LadderLevel.mid,
+            category=TaskCategory.implementation,
+            confidence=0.9,
+            reasoning="",
+            estimated_complexity=4,
+        ),
+        initial_level=LadderLevel.mid,
+        final_level=LadderLevel.mid,
+        response="Done",
+        costs=[cost],
+        total_cost_usd=cost.cost_usd,
+    )
+
+
+@pytest.mark.asyncio
+async def test_flushed_spend_is_rolled_up_by_serving_model(tmp_path):
+    ledger = CostLedger(tmp_path / "ledger.sqlite3", flush_interval=60)
+    ledger.export(_result())
+    ledger.export(_result(FALLBACK))
+    assert ledger.spend_by("model") == []
+    await ledger.flush()
+
+    by_model = {row.key: row for row in ledger.spend_by("model")}
+    assert set(by_model) == {get_config(LadderLevel.mid).model_id, FALLBACK}
+    assert by_model[FALLBACK].calls == 1
+    assert by_model[FALLBACK].input_tokens == 1000
+    (mid,) = ledger.spend_by("level")
+    assert mid.calls == 2
+    assert mid.cost_usd == pytest.approx(2 * _result().total_cost_usd)
+    (rate,) = ledger.escalation_rates()
+    assert (rate.key, rate.tasks, rate.escalated) == ("mid", 2, 0)
+    await ledger.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_entries_and_forgets_rolled_back_models(tmp_path):
+    path = tmp_path / "ledger.sqlite3"
+    ledger = CostLedger(path, flush_interval=60)
+    ledger._conn.execute(
+        "CREATE TRIGGER fail BEFORE INSERT ON daily_tasks BEGIN SELECT RAISE(ABORT, 'full'); END"
+    )
+    ledger.export(_result(FALLBACK))
+    with pytest.raises(sqlite3.IntegrityError):
+        await ledger.flush()
+    assert FALLBACK not in ledger._models
+
+    ledger._conn.execute("DROP TRIGGER fail")
+    await ledger.flush()
+    assert [row.key for row in ledger.spend_by("model")] == [FALLBACK]
+    await ledger.aclose()
+
+    reopened = CostLedger(path)
+    assert [row.calls for row in reopened.spend_by("day")] == [1]
+    reopened.close()
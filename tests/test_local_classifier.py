@@ -0,0 +1,56 @@
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.enums import LadderLevel, TaskCategory
+from ladder.local_classifier import LocalClassifier
+from ladder.orchestrator import LOCAL_CONFIDENCE_THRESHOLD, Orchestrator
+
+INTERN, JUNIOR = LadderLevel.intern, LadderLevel.junior
+DOCS = TaskCategory.documentation
+
+
+def _history(n=200):
+    """Typo fixes that are intern work only 70% of the time."""
+    return [
+        (f"fix the typo in section {i}", JUNIOR if i % 10 >= 7 else INTERN, DOCS)
+        for i in range(n)
+    ]
+
+
+def test_no_trained_model_means_no_local_classifier(tmp_path):
+    assert LocalClassifier.load(tmp_path / "local_classifier.json") is None
+
+
+def test_training_calibrates_overconfident_posteriors(tmp_path):
+    raw = LocalClassifier().fit(_history())
+    assert raw.classify("fix the typo in section 3").confidence > LOCAL_CONFIDENCE_THRESHOLD
+
+    model = LocalClassifier.train(_history(), seed=False)
+    assert model.calibrated
+    confidence = model.classify("fix the typo in section 3").confidence
+    assert 0.5 < confidence < LOCAL_CONFIDENCE_THRESHOLD
+
+    model.save(tmp_path / "model.json")
+    loaded = LocalClassifier.load(tmp_path / "model.json")
+    assert loaded.classify("fix the typo in section 3").confidence == pytest.approx(confidence)
+
+
+def test_too_little_history_is_not_trained():
+    with pytest.raises(ValueError, match="too few"):
+        LocalClassifier.train(_history(50))
+
+
+@pytest.mark.asyncio
+async def test_haiku_is_skipped_only_above_the_threshold():
+    client = FakeAnthropic(FakeConfig(time_scale=0.0))
+    sure = [(f"fix the typo in section {i}", INTERN, DOCS) for i in range(200)]
+    confident = Orchestrator(client=client, local_classifier=LocalClassifier.train(sure))
+    classification, _, span = await confident._classify("fix the typo in section 3")
+    assert span.status == "local"
+    assert classification.level == INTERN
+    assert client.stats.calls == 0
+
+    unsure = Orchestrator(client=client, local_classifier=LocalClassifier.train(_history()))
+    _, _, span = await unsure._classify("fix the typo in section 3")
+    assert span.status == "ok"
+    assert client.stats.calls == 1
@@ -0,0 +1,25 @@
+import pytest
+
+from ladder.agent import LadderAgent
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.cost import zero_cost
+from ladder.models import AgentResponse, Span
+from ladder.orchestrator import Orchestrator
+
+
+@pytest.mark.asyncio
+async def test_truncated_final_answer_is_flagged(monkeypatch):
+    async def run(self, task, context="", handoff="", max_tokens=None):
+        return AgentResponse(
+            text="The first half of the answer",
+            escalated=False,
+            cost=zero_cost(self.level, self.describe("3 continuations")),
+            span=Span(name="agent", level=self.level, start_time=0.0, wall_s=0.0),
+            continuations=3,
+            truncated=True,
+        )
+
+    monkeypatch.setattr(LadderAgent, "run", run)
+    orchestrator = Orchestrator(client=FakeAnthropic(FakeConfig(time_scale=0.0)))
+    result = await orchestrator.run("Write the full migration plan")
+    assert result.truncated
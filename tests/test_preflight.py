@@ -0,0 +1,114 @@
+import anthropic
+import httpx
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.enums import ContextPolicy, LadderLevel
+from ladder.orchestrator import Orchestrator
+from ladder.preflight import SUMMARY_MAX_TOKENS, ContextTooLargeError, Preflight, TokenCounter
+from ladder.resilience import Resilience, RetryPolicy
+from ladder.scheduler import Scheduler
+
+
+class _CountingPreflight(Preflight):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.counted: list[LadderLevel] = []
+
+    async def count(self, level, task, context="", call=None):
+        self.counted.append(level)
+        return await super().count(level, task, context, call)
+
+
+def _client() -> FakeAnthropic:
+    return FakeAnthropic(FakeConfig(time_scale=0.0))
+
+
+@pytest.mark.asyncio
+async def test_oversized_input_is_not_counted_at_every_level():
+    preflight = _CountingPreflight(_client())
+    with pytest.raises(ContextTooLargeError):
+        await preflight.check(LadderLevel.intern, "Summarize this", "x" * 4 * 300_000)
+    assert LadderLevel.junior not in preflight.counted
+
+
+@pytest.mark.asyncio
+async def test_levels_too_small_for_the_expected_answer_are_skipped():
+    plan = await Preflight(_client()).check(LadderLevel.intern, "Write the spec", "", 10_000)
+    assert plan.estimate.level == LadderLevel.senior
+    assert plan.estimate.skipped_levels == [
+        LadderLevel.intern,
+        LadderLevel.junior,
+        LadderLevel.mid,
+    ]
+    assert plan.estimate.output_tokens == 10_000
+
+
+@pytest.mark.asyncio
+async def test_speculative_head_start_runs_with_a_preflight():
+    client = _client()
+    orchestrator = Orchestrator(client=client, speculative=True, preflight=Preflight(client))
+    assert await orchestrator._head_start_allowed("Fix a typo", "")
+    assert not await orchestrator._head_start_allowed("Fix a typo", "x" * 4 * 300_000)
+    orchestrator.preflight.max_cost_usd = 0.000001
+    assert not await orchestrator._head_start_allowed("Fix a typo", "")
+
+
+class _AdmissionSpy(Scheduler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reserved: list[tuple[str, int, int]] = []
+
+    async def reserve(self, model_id, input_tokens, output_tokens, cost_usd=0.0, priority=None):
+        self.reserved.append((model_id, input_tokens, output_tokens))
+        return await super().reserve(model_id, input_tokens, output_tokens, cost_usd, priority)
+
+
+def _fail_first(method, status: int, error: type[anthropic.APIStatusError], when=None):
+    """Make the first call matching ``when`` fail with a retryable status."""
+    failed = []
+
+    async def call(**params):
+        if not failed and (when is None or when(params)):
+            failed.append(params["model"])
+            response = httpx.Response(
+                status, headers={"retry-after": "0"}, request=httpx.Request("POST", "https://x")
+            )
+            raise error("busy", response=response, body=None)
+        return await method(**params)
+
+    return call, failed
+
+
+@pytest.mark.asyncio
+async def test_preflight_calls_are_admitted_and_retried():
+    client = _client()
+    client.messages.count_tokens, counts_failed = _fail_first(
+        client.messages.count_tokens, 429, anthropic.RateLimitError
+    )
+    client.messages.create, summaries_failed = _fail_first(
+        client.messages.create,
+        529,
+        anthropic.InternalServerError,
+        when=lambda params: params["max_tokens"] == SUMMARY_MAX_TOKENS,
+    )
+    scheduler = _AdmissionSpy()
+    orchestrator = Orchestrator(
+        client=client,
+        preflight=Preflight(
+            client, TokenCounter(client, use_api=True), policy=ContextPolicy.summarize
+        ),
+        scheduler=scheduler,
+        resilience=Resilience(RetryPolicy(base_delay_s=0.0)),
+    )
+    result = await orchestrator.run("Summarize the log", "y" * 4 * 300_000)
+
+    assert counts_failed and summaries_failed
+    assert result.preflight.context_action == "summarized"
+    assert any(c.description.startswith("Context summary (failed") for c in result.costs)
+    summary = next(c for c in result.costs if c.description == "Context summary")
+    assert summary.cost_usd > 0
+    assert (counts_failed[0], 0, 0) in scheduler.reserved
+    assert (summary.model_id, SUMMARY_MAX_TOKENS) in {
+        (model, output) for model, _, output in scheduler.reserved
+    }
@@ -0,0 +1,22 @@
+from ladder.classifier import batch_classifier_request, classifier_request
+from ladder.enums import LadderLevel
+from ladder.prompts import agent_system
+
+
+def _breakpoints(blocks):
+    return [block for block in blocks if "cache_control" in block]
+
+
+def test_short_prompts_get_no_cache_breakpoints():
+    assert _breakpoints(agent_system(LadderLevel.mid)) == []
+    assert _breakpoints(agent_system(LadderLevel.mid, "def f(): pass")) == []
+    assert "cache_control" not in str(classifier_request("Fix a typo"))
+    assert "cache_control" not in str(batch_classifier_request(["a", "b"]))
+
+
+def test_long_context_is_marked_for_caching():
+    context = "x" * 4 * 1500
+    sonnet = agent_system(LadderLevel.mid, context)
+    assert [block["text"] for block in _breakpoints(sonnet)][0].startswith("Context:")
+    # Haiku needs twice the prefix, so the same context is not marked there.
+    assert _breakpoints(agent_system(LadderLevel.intern, context)) == []
@@ -0,0 +1,9 @@
+from ladder.cli import _build_orchestrator
+from ladder.orchestrator import Orchestrator
+from ladder.server import warm_client
+
+
+def test_default_clients_leave_retries_to_resilience():
+    assert Orchestrator().client.max_retries == 0
+    assert _build_orchestrator(no_cache=True, no_ledger=True, no_calibration=True).client.max_retries == 0
+    assert warm_client().max_retries == 0
@@ -0,0 +1,29 @@
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.orchestrator import Orchestrator
+from ladder.result_cache import ResultCache
+
+
+@pytest.mark.asyncio
+async def test_repeat_is_free_and_other_options_miss():
+    client = FakeAnthropic(FakeConfig(time_scale=0.0))
+    cache = ResultCache.memory()
+    orchestrator = Orchestrator(client=client, result_cache=cache)
+    task = "Design the sharding strategy for the orders table [bench:staff]"
+
+    first = await orchestrator.run(task)
+    assert not first.cached and first.total_cost_usd > 0
+
+    repeat = await orchestrator.run(task)
+    assert repeat.cached
+    assert repeat.total_cost_usd == 0.0 and repeat.costs == []
+    assert repeat.response == first.response
+    assert cache.stats.hits == 1
+
+    for options in ({"fan_out": True}, {"speculative": True}):
+        other = Orchestrator(client=client, result_cache=cache, **options)
+        result = await other.run(task)
+        assert not result.cached and result.total_cost_usd > 0
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 3
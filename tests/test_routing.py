@@ -0,0 +1,96 @@
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.enums import EscalationReason, LadderLevel, TaskCategory
+from ladder.models import ClassificationResult
+from ladder.orchestrator import Orchestrator
+from ladder.routing import MIN_SAMPLES, RoutingStats
+
+_CLASSIFIED = ClassificationResult(
+    level=LadderLevel.junior,
+    category=TaskCategory.implementation,
+    confidence=0.95,
+    reasoning="test",
+    estimated_complexity=3,
+)
+
+
+class JuniorClassifier(FakeAnthropic):
+    """Classifies every task as a confident junior one, whatever its true level."""
+
+    def _classification(self, task: str) -> dict:
+        return _CLASSIFIED.model_dump(mode="json", exclude={"cached"})
+
+
+def _record(stats, level, escalated, times=MIN_SAMPLES, cost_usd=0.01, wall_s=1.0):
+    for _ in range(times):
+        stats.record(_CLASSIFIED, level, escalated, cost_usd, wall_s)
+
+
+def test_starts_above_a_level_that_always_escalates():
+    stats = RoutingStats(explore_rate=0.0)
+    _record(stats, LadderLevel.junior, escalated=True)
+    _record(stats, LadderLevel.mid, escalated=False)
+    assert stats.start_level(_CLASSIFIED) == LadderLevel.mid
+
+
+def test_keeps_classified_level_until_enough_samples():
+    stats = RoutingStats(explore_rate=0.0)
+    _record(stats, LadderLevel.junior, escalated=True, times=MIN_SAMPLES - 1)
+    _record(stats, LadderLevel.mid, escalated=False)
+    assert stats.start_level(_CLASSIFIED) == LadderLevel.junior
+
+
+def test_keeps_classified_level_when_it_usually_answers():
+    stats = RoutingStats(explore_rate=0.0)
+    # Junior is cheaper and faster, and escalates one task in ten.
+    cheap = {"cost_usd": 0.002, "wall_s": 0.5}
+    _record(stats, LadderLevel.junior, escalated=False, times=MIN_SAMPLES - 1, **cheap)
+    _record(stats, LadderLevel.junior, escalated=True, times=1, **cheap)
+    _record(stats, LadderLevel.mid, escalated=False)
+    assert stats.start_level(_CLASSIFIED) == LadderLevel.junior
+
+
+def test_exploration_starts_at_classified_level():
+    stats = RoutingStats(explore_rate=1.0)
+    _record(stats, LadderLevel.junior, escalated=True)
+    _record(stats, LadderLevel.mid, escalated=False)
+    assert stats.start_level(_CLASSIFIED) == LadderLevel.junior
+
+
+def test_save_and_load_round_trip(tmp_path):
+    stats = RoutingStats(explore_rate=0.0)
+    _record(stats, LadderLevel.junior, escalated=True)
+    _record(stats, LadderLevel.mid, escalated=False)
+    path = tmp_path / "routing.json"
+    stats.save(path)
+
+    loaded = RoutingStats.load(path, explore_rate=0.0)
+    assert loaded.to_dict() == stats.to_dict()
+    assert loaded.start_level(_CLASSIFIED) == LadderLevel.mid
+    assert RoutingStats.load(tmp_path / "missing.json").items() == []
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_learns_to_skip_escalating_levels():
+    client = JuniorClassifier(FakeConfig(time_scale=0.0, escalation_rate=1.0))
+    routing = RoutingStats(min_samples=3, explore_rate=0.0)
+    orchestrator = Orchestrator(client=client, routing=routing)
+    task = "Rework the retry policy of the payment client [bench:senior]"
+
+    for _ in range(3):
+        result = await orchestrator.run(task)
+        assert result.escalations == [EscalationReason.self_escalation] * 2
+    outcomes = dict(routing.items())[routing.key(_CLASSIFIED)]
+    assert outcomes[LadderLevel.junior].escalation_rate == 1.0
+    assert outcomes[LadderLevel.mid].escalation_rate == 1.0
+    assert outcomes[LadderLevel.senior].attempts == 3
+
+    result = await orchestrator.run(task)
+    assert result.initial_level == LadderLevel.junior
+    assert result.final_level == LadderLevel.senior
+    assert result.escalations == [EscalationReason.calibrated] * 2
+    # The skipped levels made no attempts.
+    assert outcomes[LadderLevel.junior].attempts == 3
+    assert outcomes[LadderLevel.mid].attempts == 3
+    assert outcomes[LadderLevel.senior].attempts == 4
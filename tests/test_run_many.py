@@ -0,0 +1,87 @@
+import click
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.cli import _read_batch_tasks
+from ladder.orchestrator import Orchestrator
+from ladder.scheduler import Priority, Scheduler, current_priority
+
+
+def _orchestrator() -> Orchestrator:
+    return Orchestrator(client=FakeAnthropic(FakeConfig(time_scale=0.0)))
+
+
+def _tasks(count: int, bad: int):
+    for i in range(count):
+        if i == bad:
+            raise ValueError(f"bad task {i}")
+        yield f"Fix the typo in line {i}"
+
+
+@pytest.mark.asyncio
+async def test_run_many_raises_task_iterator_errors_after_draining():
+    outcomes = []
+    with pytest.raises(ValueError, match="bad task 31"):
+        async for outcome in _orchestrator().run_many(_tasks(101, bad=31), concurrency=4):
+            outcomes.append(outcome)
+    assert sorted(outcome.index for outcome in outcomes) == list(range(31))
+    assert all(outcome.ok for outcome in outcomes)
+
+
+def test_read_batch_tasks_names_the_malformed_line(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text('{"task": "a"}\n\n{"task": \n{"task": "c"}\n')
+    tasks = _read_batch_tasks(str(path))
+    assert next(tasks).task == "a"
+    with pytest.raises(click.ClickException, match=r"tasks\.jsonl:3:"):
+        next(tasks)
+
+
+class _PrioritySpy(Scheduler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.admitted: list[tuple[int, Priority]] = []
+
+    async def reserve(self, model_id, input_tokens, output_tokens, cost_usd=0.0, priority=None):
+        self.admitted.append((output_tokens, priority or current_priority.get()))
+        return await super().reserve(model_id, input_tokens, output_tokens, cost_usd, priority)
+
+
+@pytest.mark.asyncio
+async def test_batched_classification_is_admitted_at_batch_priority():
+    scheduler = _PrioritySpy()
+    orchestrator = Orchestrator(
+        client=FakeAnthropic(FakeConfig(time_scale=0.0)), scheduler=scheduler
+    )
+    tasks = [f"Fix the typo in line {i}" for i in range(6)]
+    outcomes = [outcome async for outcome in orchestrator.run_many(tasks, classify_batch_size=3)]
+    assert all(outcome.ok for outcome in outcomes)
+    assert scheduler.admitted
+    assert {priority for _, priority in scheduler.admitted} == {Priority.batch}
+
+
+@pytest.mark.asyncio
+async def test_next_group_is_classified_while_the_current_one_runs(monkeypatch):
+    orchestrator = _orchestrator()
+    events = []
+    classify_many = orchestrator._classify_many
+    run_item = orchestrator._run_batch_item
+
+    async def spy_classify(tasks):
+        events.append(("classify", tasks[0]))
+        return await classify_many(tasks)
+
+    async def spy_run(index, item, classified=None, priority=None):
+        outcome = await run_item(index, item, classified, priority)
+        events.append(("done", item.task))
+        return outcome
+
+    monkeypatch.setattr(orchestrator, "_classify_many", spy_classify)
+    monkeypatch.setattr(orchestrator, "_run_batch_item", spy_run)
+    tasks = [f"Fix the typo in line {i}" for i in range(4)]
+    outcomes = [
+        outcome
+        async for outcome in orchestrator.run_many(tasks, concurrency=1, classify_batch_size=2)
+    ]
+    assert len(outcomes) == 4
+    assert events.index(("classify", tasks[2])) < events.index(("done", tasks[0]))
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from ladder.cost import zero_cost
+from ladder.enums import LadderLevel
+from ladder.scheduler import Scheduler
+
+MODEL = "claude-haiku-4-5-20251001"
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_after_admission_is_refunded():
+    scheduler = Scheduler(max_usd_per_hour=1.0)
+    first = await scheduler.reserve(MODEL, 100, 100, cost_usd=0.6)
+    waiting = asyncio.create_task(scheduler.reserve(MODEL, 100, 100, cost_usd=0.6))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    # Settling the first call admits the waiter; cancel it before it resumes.
+    first.settle(zero_cost(LadderLevel.intern))
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler._reserved == pytest.approx(0.0)
+    reservation = await asyncio.wait_for(scheduler.reserve(MODEL, 100, 100, cost_usd=0.6), 1)
+    reservation.settle()
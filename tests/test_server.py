@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from ladder.models import BatchOutcome
+from ladder.server import LadderServer, _HTTPError, _read_request
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1e3"])
+async def test_invalid_content_length_is_a_bad_request(length):
+    request = b"POST /run HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"
+    with pytest.raises(_HTTPError) as exc:
+        await _read_request(_reader(request))
+    assert exc.value.status == 400
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.data = b""
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+
+class _FailingOrchestrator:
+    scheduler = None
+
+    async def run_many(self, tasks, concurrency):
+        yield BatchOutcome(index=0, error="ValueError: first task")
+        raise RuntimeError("lost the database")
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_after_streaming_starts_closes_the_connection():
+    server = LadderServer(_FailingOrchestrator())
+    writer = _Writer()
+    body = json.dumps({"tasks": [{"task": "a"}, {"task": "b"}]}).encode()
+    with pytest.raises(ConnectionError):
+        await server._dispatch(writer, "POST", "/batch", body, keep_alive=True)
+    assert writer.data.count(b"HTTP/1.1") == 1
+    assert not writer.data.endswith(b"0\r\n\r\n")
@@ -0,0 +1,103 @@
+import gzip
+import json
+
+from ladder.enums import LadderLevel, TaskCategory
+from ladder.models import BatchOutcome, ClassificationResult, TaskResult
+from ladder.sink import BLOB_KEY, ResultSink, read_outcomes
+
+
+def _outcome(index: int, response: str = "Done", error: str | None = None) -> BatchOutcome:
+    if error is not None:
+        return BatchOutcome(index=index, id=f"t{index}", error=error)
+    result = TaskResult(
+        task=f"Task {index}",
+        classification=ClassificationResult(
+            level=LadderLevel.junior,
+            category=TaskCategory.implementation,
+            confidence=0.9,
+            reasoning="",
+            estimated_complexity=3,
+        ),
+        initial_level=LadderLevel.junior,
+        final_level=LadderLevel.junior,
+        response=response,
+        total_cost_usd=0.01,
+    )
+    return BatchOutcome(index=index, id=f"t{index}", result=result)
+
+
+def test_resume_skips_succeeded_tasks_and_retries_failed_ones(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultSink(path) as sink:
+        sink.write(_outcome(0))
+        sink.write(_outcome(1, error="RuntimeError: boom"))
+
+    with ResultSink(path, resume=True) as sink:
+        assert sink.done("t0") and not sink.done("t1")
+        assert (sink.summary.succeeded, sink.summary.failed) == (1, 1)
+        sink.write(_outcome(1))
+        assert (sink.summary.succeeded, sink.summary.failed) == (2, 0)
+        assert sink.summary.cost_by_level == {"junior": 0.02}
+
+    assert [o.ok for o in read_outcomes(path)] == [True, False, True]
+
+
+def test_torn_jsonl_record_is_dropped_on_resume(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with ResultSink(path) as sink:
+        sink.write(_outcome(0))
+    # A crash mid-write leaves half a record and half an index line.
+    with path.open("a") as f:
+        f.write(_outcome(1).model_dump_json()[:40])
+    with path.with_name("results.jsonl.index").open("a") as f:
+        f.write('{"key": "t1", "o')
+
+    with ResultSink(path, resume=True) as sink:
+        assert sink.done("t0") and not sink.done("t1")
+        sink.write(_outcome(1))
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["t0", "t1"]
+
+
+def test_gzip_member_cut_short_is_recovered(tmp_path):
+    path = tmp_path / "results.jsonl.gz"
+    with ResultSink(path) as sink:
+        sink.write(_outcome(0))
+        sink.write(_outcome(1))
+        flushed = path.read_bytes()
+        sink.write(_outcome(2, response="y" * 1000))
+        torn = path.read_bytes()[: len(flushed) + 20]
+    # No gzip trailer, and the third record only partly compressed.
+    path.write_bytes(torn)
+    index = path.with_name("results.jsonl.gz.index")
+    index.write_text("".join(index.read_text().splitlines(keepends=True)[:2]))
+
+    assert [o.id for o in read_outcomes(path)] == ["t0", "t1"]
+    with ResultSink(path, resume=True) as sink:
+        assert not sink.done("t2")
+        sink.write(_outcome(2))
+
+    assert [o.id for o in read_outcomes(path)] == ["t0", "t1", "t2"]
+    with gzip.open(path, "rt") as f:
+        assert len(f.read().splitlines()) == 3
+
+
+def test_long_responses_spill_to_blobs(tmp_path):
+    path = tmp_path / "results.jsonl.gz"
+    long = "z" * 100
+    with ResultSink(path, blob_threshold=50) as sink:
+        sink.write(_outcome(0, response=long))
+        sink.write(_outcome(1, response=long))
+        sink.write(_outcome(2))
+
+    with gzip.open(path, "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert records[0][BLOB_KEY] == records[1][BLOB_KEY]
+    assert records[0]["result"]["response"] == ""
+    assert BLOB_KEY not in records[2]
+    assert len(list((tmp_path / "results.jsonl.gz.blobs").rglob("*.txt.gz"))) == 1
+
+    responses = [o.result.response for o in read_outcomes(path)]
+    assert responses == [long, long, "Done"]
+    assert [o.result.response for o in read_outcomes(path, load_blobs=False)][0] == ""
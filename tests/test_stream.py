@@ -0,0 +1,84 @@
+import pytest
+
+from ladder.bench.fake import FakeAnthropic, FakeConfig
+from ladder.enums import EventType, LadderLevel
+from ladder.orchestrator import Orchestrator
+from ladder.result_cache import ResultCache
+
+
+class JuniorClassifier(FakeAnthropic):
+    """Classifies every task as a confident junior one, whatever its true level."""
+
+    def _classification(self, task: str) -> dict:
+        return {**super()._classification(task), "level": "junior", "confidence": 0.95}
+
+
+def _client(time_scale: float = 0.0) -> FakeAnthropic:
+    return JuniorClassifier(FakeConfig(time_scale=time_scale, escalation_rate=1.0))
+
+
+async def _collect(orchestrator: Orchestrator, task: str) -> list:
+    return [event async for event in orchestrator.stream(task)]
+
+
+def _text(events: list) -> str:
+    return "".join(e.text for e in events if e.type == EventType.token)
+
+
+@pytest.mark.asyncio
+async def test_events_of_a_direct_answer():
+    events = await _collect(Orchestrator(client=_client()), "Fix the typo [bench:junior]")
+    types = [e.type for e in events]
+
+    assert types[0] == EventType.classified
+    assert types[-2:] == [EventType.attempt, EventType.result]
+    assert set(types[1:-2]) == {EventType.token}
+    assert len(types) > 4
+    result = events[-1].result
+    assert _text(events) == result.response
+    assert events[-1].level == result.final_level == LadderLevel.junior
+
+
+@pytest.mark.asyncio
+async def test_escalating_replies_are_never_shown():
+    events = await _collect(Orchestrator(client=_client()), "Redesign the cache [bench:senior]")
+    types = [e.type for e in events]
+
+    escalated = [e for e in events if e.type == EventType.escalated]
+    assert [(e.level, e.to_level) for e in escalated] == [
+        (LadderLevel.junior, LadderLevel.mid),
+        (LadderLevel.mid, LadderLevel.senior),
+    ]
+    attempts = [e.level for e in events if e.type == EventType.attempt]
+    assert attempts == [LadderLevel.junior, LadderLevel.mid, LadderLevel.senior]
+    tokens = [e for e in events if e.type == EventType.token]
+    assert {e.level for e in tokens} == {LadderLevel.senior}
+    assert types.index(EventType.token) > max(
+        i for i, t in enumerate(types) if t == EventType.escalated
+    )
+    assert EventType.restart not in types
+    assert "ESCALATE" not in _text(events)
+    assert _text(events) == events[-1].result.response
+
+
+@pytest.mark.asyncio
+async def test_cached_result_is_streamed_whole():
+    orchestrator = Orchestrator(client=_client(), result_cache=ResultCache.memory())
+    task = "Fix the typo [bench:junior]"
+    first = await _collect(orchestrator, task)
+
+    events = await _collect(orchestrator, task)
+    assert [e.type for e in events] == [EventType.token, EventType.result]
+    assert events[-1].result.cached
+    assert events[0].text == first[-1].result.response
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_the_run():
+    client = _client(time_scale=0.01)
+    stream = Orchestrator(client=client).stream("Fix the typo [bench:junior]")
+    async for event in stream:
+        if event.type == EventType.token:
+            break
+    await stream.aclose()
+    assert client.stats.cancelled_streams == 1
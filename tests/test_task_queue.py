@@ -0,0 +1,89 @@
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from ladder.cli import main
+from ladder.task_queue import TaskQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = TaskQueue(tmp_path / "queue.sqlite3", max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def test_expired_lease_is_taken_over(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    assert queue.lease("a", visibility_timeout=0.05).id == task_id
+    assert queue.lease("b") is None
+
+    time.sleep(0.1)
+    leased = queue.lease("b")
+    assert leased.id == task_id and leased.attempts == 2
+    assert not queue.extend(task_id, "a")
+    assert queue.fail(task_id, "a", "too late") == "lost"
+    assert queue.complete(task_id, "{}")
+    assert queue.counts()["done"] == 1
+
+
+def test_release_does_not_count_the_attempt(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    queue.lease("a")
+    assert queue.release(task_id, "a")
+    assert queue.lease("b").attempts == 1
+    assert not queue.release(task_id, "a")
+
+
+def test_release_delay_hides_the_task(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    queue.lease("a")
+    queue.release(task_id, "a", delay=60)
+    assert queue.lease("b") is None
+    assert queue.unfinished() == 1
+
+
+def test_failures_stop_at_max_attempts(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    queue.lease("a")
+    assert queue.fail(task_id, "a", "boom") == "queued"
+    queue.lease("a")
+    assert queue.fail(task_id, "a", "boom again") == "failed"
+    (finished,) = queue.finished()
+    assert finished.status == "failed" and finished.attempts == 2
+
+
+def test_expired_leases_stop_at_max_attempts(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    for owner in ("a", "b"):
+        assert queue.lease(owner, visibility_timeout=0.01).id == task_id
+        time.sleep(0.05)
+    assert queue.lease("c") is None
+    (finished,) = queue.finished()
+    assert finished.status == "failed" and "Lease expired" in finished.error
+
+
+def test_no_retry_fails_at_once(queue):
+    (task_id,) = queue.enqueue([("Fix a typo", "", None)])
+    queue.lease("a")
+    assert queue.fail(task_id, "a", "rejected", retry=False) == "failed"
+
+
+def test_enqueue_jsonl_names_the_bad_line_and_stores_nothing(tmp_path):
+    tasks = tmp_path / "tasks.jsonl"
+    tasks.write_text('{"task": "a", "id": "x"}\n{"context": "no task"}\n')
+    queue_path = tmp_path / "queue.sqlite3"
+    args = ["enqueue", "--jsonl", str(tasks), "--queue", str(queue_path)]
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 1
+    assert "tasks.jsonl:2:" in result.output
+    assert not isinstance(result.exception, KeyError)
+
+    tasks.write_text('{"task": "a", "id": "x"}\n\n{"task": "b", "context": "c"}\n')
+    assert CliRunner().invoke(main, args).exit_code == 0
+    queue = TaskQueue(queue_path)
+    try:
+        assert queue.counts()["queued"] == 2
+    finally:
+        queue.close()